@@ -139,21 +139,22 @@ print(chain.invoke({"input": "Qual é o meu nome?"}))
 
 # ## 2. Adicionando Histórico com `RunnableWithMessageHistory`
 # 
-# Essa é a forma recomendada no LCEL moderno. Precisamos de uma classe para armazenar o histórico (aqui usaremos `ChatMessageHistory` em memória, mas poderia ser num banco de dados).
+# Essa é a forma recomendada no LCEL moderno. Precisamos de uma classe para armazenar o histórico (o `ChatMessageHistory` guarda em memória; aqui usaremos um histórico persistente em SQLite, do módulo `chat_historico`).
 
 
 
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
-# Dicionário para guardar os históricos de diferentes sessões (session_ids)
-store = {}
+# Um dicionário em memória (store = {}) cresce sem limite e se perde ao
+# reiniciar. Aqui os históricos ficam em SQLite: cada sessão guarda só as
+# mensagens que cabem em uma janela de tokens e sessões ociosas são apagadas.
+from chat_historico import ArmazemHistorico
+
+armazem_historico = ArmazemHistorico(".chat_historico.db", max_tokens=2000, max_sessoes=10_000)
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in store:
-        store[session_id] = ChatMessageHistory()
-    return store[session_id]
+    return armazem_historico.get_session_history(session_id)
 
 
 # Agora criamos o prompt aceitando um `MessagesPlaceholder` para injetar o histórico.
@@ -216,6 +217,38 @@ response3 = with_message_history.invoke(
 print(f"Resposta 3 (Sessão Nova): {response3}")
 
 
+# ## 5. Conversas Longas: Memória com Resumo
+# 
+# Com o histórico completo, cada turno envia todas as mensagens anteriores: o prompt (e a latência) cresce a cada pergunta. A `MemoriaResumida` mantém só as últimas K trocas literais e resume as mais antigas em segundo plano, sem atrasar a resposta. O tamanho do prompt fica limitado. As mensagens ficam em SQLite (um `ArmazemHistorico` sem recorte, em `.chat_resumo.db`); em memória fica só o resumo de cada sessão, descartado junto com as sessões ociosas.
+
+
+
+from chat_historico import MemoriaResumida
+
+memoria_resumida = MemoriaResumida(llm, k_turnos=3)
+
+with_summary_memory = RunnableWithMessageHistory(
+    runnable,
+    memoria_resumida.get_session_history,
+    input_messages_key="input",
+    history_messages_key="history"
+)
+
+config_longa = {"configurable": {"session_id": "conversa_longa"}}
+for pergunta in [
+    "Oi, meu nome é Nauber e trabalho com auditoria.",
+    "Estou analisando contratos de obras.",
+    "Quais riscos costumam aparecer nesses contratos?",
+    "E em contratos de serviços de TI?",
+    "Lembra qual é o meu nome e minha área?",
+]:
+    print(f"Você: {pergunta}")
+    print(f"Bot: {with_summary_memory.invoke({'input': pergunta}, config=config_longa)}\n")
+
+memoria_resumida.aguardar("conversa_longa")
+print("Resumo:", memoria_resumida.resumo("conversa_longa"))
+
+
 # ## Conclusão
 # 
 # Neste notebook, aprendemos a manter o estado da conversa usando `RunnableWithMessageHistory` e `ChatMessageHistory`.
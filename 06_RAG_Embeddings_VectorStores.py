@@ -176,10 +176,12 @@ splits = text_splitter.split_documents(data)
 
 
 
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+# GoogleGenerativeAIEmbeddings (models/embedding-001, lê a GOOGLE_API_KEY) com
+# cache local, que evita reembedar chunks idênticos em execuções seguintes;
+# RAG_EMBEDDINGS=local calcula os embeddings na CPU, sem rede
+from rag_embeddings import criar_embeddings
 
-# Substitua 'SUA_CHAVE_API' pela sua chave do Google Generative AI
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=os.getenv("GOOGLE_API_KEY", "SUA_CHAVE_API"))
+embeddings = criar_embeddings()
 
 
 # ## 3. Vector Store (FAISS)
@@ -188,10 +190,10 @@ embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_a
 
 
 
-from langchain_community.vectorstores import FAISS
+from rag_index import carregar_ou_criar_indice
 
-# Cria o índice vetorial
-vectorstore = FAISS.from_documents(documents=splits, embedding=embeddings)
+# Cria o índice vetorial (ou reabre o salvo em disco se o corpus não mudou)
+vectorstore = carregar_ou_criar_indice(splits, embeddings, nome="agents_post")
 
 # Podemos consultar o índice
 retriever = vectorstore.as_retriever(search_kwargs={"k": 2}) # k=2 retorna os 2 mais similares
@@ -114,8 +114,9 @@ except:
 
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
+# Gemini (models/embedding-001) com cache; RAG_EMBEDDINGS=local roda sem rede
+from rag_embeddings import criar_embeddings
+from rag_index import carregar_ou_criar_indice
 
 # 1. Load
 loader = WebBaseLoader("https://lilianweng.github.io/posts/2023-06-23-agent/")
@@ -126,7 +127,7 @@ text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=20
 splits = text_splitter.split_documents(docs)
 
 # 3. Index
-vectorstore = FAISS.from_documents(splits, GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+vectorstore = carregar_ou_criar_indice(splits, criar_embeddings(), nome="agents_post")
 retriever = vectorstore.as_retriever()
 
 
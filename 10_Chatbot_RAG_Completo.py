@@ -132,35 +132,42 @@ except ImportError:
 
 
 
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
+# Gemini (models/embedding-001) com cache; RAG_EMBEDDINGS=local roda sem rede
+from rag_embeddings import criar_embeddings
+from rag_index import carregar_ou_criar_indice
+from rag_loaders import CarregadorPDFParalelo
 
-# Loader
-loader = PyPDFLoader("sample.pdf")
-docs = loader.load()
+# Loader: extrai as páginas em paralelo e as entrega uma a uma (lazy_load),
+# sem carregar o PDF inteiro antes de dividir
+loader = CarregadorPDFParalelo("sample.pdf")
 
 # Splitter
 text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-splits = text_splitter.split_documents(docs)
+splits = text_splitter.split_documents(loader.lazy_load())
 
-# Index
-vectorstore = FAISS.from_documents(splits, GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
+# Cache semântico de respostas (usado na seção 3): o índice informa a sua
+# versão e o cache se esvazia quando o PDF é reindexado
+from rag_cache import CacheSemantico
+
+embeddings = criar_embeddings()
+cache_semantico = CacheSemantico(embeddings, limiar=0.92, ttl_segundos=3600)
+
+# Index (reaproveita o índice salvo em disco enquanto o PDF não mudar)
+vectorstore = carregar_ou_criar_indice(splits, embeddings, nome="chatbot_pdf", caches=[cache_semantico])
 retriever = vectorstore.as_retriever()
 
 
 # ## 3. Configurando a Chain com Histórico
 # 
-# Vamos usar `create_history_aware_retriever` para reformular a pergunta com base no histórico antes de buscar, garantindo que o chat flua bem.
+# Vamos reformular a pergunta com base no histórico antes de buscar (como o `create_history_aware_retriever`), mas só quando ela depende do histórico, garantindo que o chat flua bem sem chamadas extras ao LLM.
 
 
 
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
@@ -183,9 +190,13 @@ contextualize_q_prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-history_aware_retriever = create_history_aware_retriever(
-    llm, retriever, contextualize_q_prompt
-)
+# Caminho rápido: no primeiro turno, ou quando a pergunta não tem pronomes nem
+# referências ao histórico, a busca usa a pergunta original sem chamar o LLM.
+# Quando é preciso reformular, reformulação e busca especulativa rodam juntas.
+from rag_retrievers import RecuperadorComHistoricoRapido
+
+recuperador_historico = RecuperadorComHistoricoRapido(llm, retriever, contextualize_q_prompt)
+history_aware_retriever = recuperador_historico.como_runnable()
 
 ### 2. Answer Question ###
 # Responde à pergunta usando os docs recuperados
@@ -208,16 +219,32 @@ qa_prompt = ChatPromptTemplate.from_messages(
 question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
 rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
+### Cache Semântico ###
+# Perguntas equivalentes ("qual o prazo?" / "quanto tempo tenho?") reaproveitam
+# a resposta anterior sem nova busca nem chamada ao LLM. O cache expira por TTL
+# e é esvaziado se o índice do PDF mudar (criado junto com o índice, acima).
+# Com histórico, o cache consulta a pergunta reformulada: pergunta_autonoma
+# já deixa a busca de documentos em andamento enquanto o cache é consultado,
+# e o history_aware_retriever da rag_chain reaproveita essa busca.
+from langchain_core.runnables import RunnableLambda
+
+rag_chain_com_cache = cache_semantico.envolver(
+    rag_chain,
+    reformular=RunnableLambda(recuperador_historico.pergunta_autonoma),
+)
+
 ### 3. State Management ###
-store = {}
+# Histórico persistente em SQLite, com janela de tokens por sessão e
+# remoção das sessões ociosas (ver chat_historico.py)
+from chat_historico import ArmazemHistorico
+
+armazem_historico = ArmazemHistorico(".chat_historico.db", max_tokens=2000)
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in store:
-        store[session_id] = ChatMessageHistory()
-    return store[session_id]
+    return armazem_historico.get_session_history(session_id)
 
 conversational_rag_chain = RunnableWithMessageHistory(
-    rag_chain,
+    rag_chain_com_cache,
     get_session_history,
     input_messages_key="input",
     history_messages_key="chat_history",
@@ -243,12 +270,15 @@ while True:
         print("Bot: Até mais!")
         break
     
-    response = conversational_rag_chain.invoke(
+    # .stream() mostra a resposta à medida que o modelo gera os tokens
+    print("Bot: ", end="", flush=True)
+    for trecho in conversational_rag_chain.stream(
         {"input": user_input},
         config={"configurable": {"session_id": session_id}},
-    )
-    
-    print(f"Bot: {response['answer']}\n")
+    ):
+        if "answer" in trecho:
+            print(trecho["answer"], end="", flush=True)
+    print("\n")
 
 
 # ## Conclusão do Curso
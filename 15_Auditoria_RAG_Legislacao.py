@@ -116,16 +116,32 @@ II - para outros serviços e compras de valor até R$ 50.000,00 (cinquenta mil r
 
 
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
+# Gemini (models/embedding-001) com cache; RAG_EMBEDDINGS=local roda sem rede
+from rag_embeddings import criar_embeddings
+from langchain_core.documents import Document
+from rag_index import atualizar_indice_incremental
+from rag_splitters import DivisorLegislacao
+
+# Dividindo por dispositivo (Art. -> § -> inciso): cada chunk pertence a um só
+# artigo e traz "artigo", "paragrafo" e "inciso" nos metadados
+text_splitter = DivisorLegislacao(chunk_size=1500)
+
+# Cada norma é um documento identificado por "source". Quando o texto muda,
+# só os chunks novos são embedados e os que deixaram de existir são removidos.
+normas = [Document(page_content=lei_texto, metadata={"source": "lei_13303"})]
+
+vectorstore = atualizar_indice_incremental(
+    normas,
+    criar_embeddings(),
+    dividir=lambda doc: text_splitter.split_documents([doc]),
+    nome="legislacao"
+)
 
-# Dividindo por caracteres (idealmente dividiríamos por Artigo, mas manteremos simples)
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-splits = text_splitter.create_documents([lei_texto])
+# Busca híbrida: BM25 acerta tokens exatos ("Art. 29", "inciso II") e o FAISS
+# cobre a semântica; as duas listas são fundidas por Reciprocal Rank Fusion
+from rag_retrievers import RecuperadorHibrido
 
-vectorstore = FAISS.from_documents(splits, GoogleGenerativeAIEmbeddings(model="models/embedding-001"))
-retriever = vectorstore.as_retriever()
+retriever = RecuperadorHibrido.criar(vectorstore, k=4)
 
 
 # ## 3. Consultoria Jurídica via RAG
@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 from tcu_scraper import TCUScraper
 from tcu_analyzer import TCUAnalyzer
 from tcu_models import RelatorioExecutivo
+from tcu_pipeline import EscritorJSONL, processar_noticias_stream
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -95,6 +96,12 @@ def main():
         default='relatorio_tcu',
         help='Nome base dos arquivos de saída (padrão: relatorio_tcu)'
     )
+    parser.add_argument(
+        '--fila',
+        type=int,
+        default=4,
+        help='Máximo de notícias baixadas aguardando análise (padrão: 4)'
+    )
     parser.add_argument(
         '--no-analise',
         action='store_true',
@@ -114,37 +121,46 @@ def main():
         print("Configure a variável de ambiente ou use --no-analise")
         return
     
-    # 1. Extrair notícias
-    scraper = TCUScraper(delay=1.0)
-    noticias = scraper.extrair_noticias_completas(quantidade=args.quantidade)
-    
-    if not noticias:
-        print("❌ Nenhuma notícia foi extraída. Verifique a conexão ou o site.")
-        return
-    
-    # Salvar notícias em JSON
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    arquivo_noticias = f"{args.output}_noticias_{timestamp}.json"
+    arquivo_noticias = f"{args.output}_noticias_{timestamp}.jsonl"
+    arquivo_analises = f"{args.output}_analises_{timestamp}.jsonl"
     
-    noticias_dict = [n.dict() for n in noticias]
-    salvar_json(noticias_dict, arquivo_noticias)
+    scraper = TCUScraper(delay=1.0)
     
     if args.no_analise:
+        # Apenas extração: cada notícia é gravada assim que é baixada
+        total = 0
+        with EscritorJSONL(arquivo_noticias) as escritor:
+            for noticia in scraper.iterar_noticias_completas(quantidade=args.quantidade):
+                escritor.escrever(noticia.model_dump())
+                total += 1
+        
+        if not total:
+            print("❌ Nenhuma notícia foi extraída. Verifique a conexão ou o site.")
+            return
+        
+        print(f"💾 Dados salvos em: {arquivo_noticias}")
         print("\n✅ Extração concluída! (análise desabilitada)")
         return
     
-    # 2. Analisar notícias com IA
+    # 1 e 2. Extrair e analisar em streaming: a análise de uma notícia
+    # acontece enquanto as seguintes ainda estão sendo baixadas
     analyzer = TCUAnalyzer()
-    noticias_analisadas = analyzer.analisar_noticias(noticias)
+    noticias_analisadas = list(processar_noticias_stream(
+        scraper,
+        analyzer,
+        quantidade=args.quantidade,
+        tamanho_fila=args.fila,
+        arquivo_noticias=arquivo_noticias,
+        arquivo_analises=arquivo_analises
+    ))
     
     if not noticias_analisadas:
-        print("❌ Nenhuma notícia foi analisada.")
+        print("❌ Nenhuma notícia foi extraída ou analisada. Verifique a conexão ou o site.")
         return
     
-    # Salvar análises em JSON
-    arquivo_analises = f"{args.output}_analises_{timestamp}.json"
-    analises_dict = [n.dict() for n in noticias_analisadas]
-    salvar_json(analises_dict, arquivo_analises)
+    print(f"💾 Notícias salvas em: {arquivo_noticias}")
+    print(f"💾 Análises salvas em: {arquivo_analises}")
     
     # 3. Gerar relatório executivo
     relatorio = analyzer.gerar_relatorio_executivo(noticias_analisadas)
@@ -13,7 +13,8 @@ from dotenv import load_dotenv
 
 from tcu_scraper import TCUScraper
 from tcu_analyzer import TCUAnalyzer
-from tcu_models import RelatorioExecutivo
+from tcu_models import RelatorioExecutivo, NoticiaAnalisada
+from tcu_pipeline import processar_noticias_stream
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -67,8 +68,20 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+def assinatura_relatorios():
+    """
+    Nome e data de modificação dos relatórios em disco. Usada como chave do
+    cache, para que relatórios regravados pelo monitor (tcu_monitor.py)
+    apareçam sem esperar a expiração do cache.
+    """
+    return tuple(sorted(
+        (arquivo.name, arquivo.stat().st_mtime)
+        for arquivo in Path(".").glob("*_relatorio_*.json")
+    ))
+
+
 @st.cache_data(ttl=3600)
-def carregar_relatorios_salvos():
+def _carregar_relatorios_salvos(assinatura):
     """Carrega relatórios salvos em disco."""
     relatorios = []
     for arquivo in Path(".").glob("*_relatorio_*.json"):
@@ -88,6 +101,11 @@ def carregar_relatorios_salvos():
     return relatorios
 
 
+def carregar_relatorios_salvos():
+    """Carrega relatórios salvos em disco, recarregando quando algum muda."""
+    return _carregar_relatorios_salvos(assinatura_relatorios())
+
+
 def exibir_metricas_principais(relatorio):
     """Exibe métricas principais do relatório."""
     col1, col2, col3, col4 = st.columns(4)
@@ -190,6 +208,25 @@ def exibir_noticias_destaque(relatorio):
         """, unsafe_allow_html=True)
 
 
+def exibir_noticia_analisada(container, analisada: NoticiaAnalisada):
+    """Exibe uma notícia recém-analisada durante a geração do relatório."""
+    classes = {
+        'Alta': 'high-relevance',
+        'Média': 'medium-relevance',
+        'Baixa': 'low-relevance'
+    }
+    classe = classes.get(analisada.analise.relevancia, '')
+    
+    container.markdown(f"""
+    <div class="news-card {classe}">
+        <h4>{analisada.noticia.titulo}</h4>
+        <p><strong>Categoria:</strong> {analisada.analise.categoria} | <strong>Relevância:</strong> {analisada.analise.relevancia}</p>
+        <p>{analisada.analise.resumo_executivo}</p>
+        <p><a href="{analisada.noticia.url}" target="_blank">🔗 Ler notícia completa</a></p>
+    </div>
+    """, unsafe_allow_html=True)
+
+
 def exibir_insights(relatorio):
     """Exibe insights principais."""
     st.markdown("### 💡 Insights Principais")
@@ -337,38 +374,38 @@ def pagina_gerar():
     # Botão de geração
     if st.button("🚀 Gerar Relatório", type="primary", use_container_width=True):
         
-        with st.spinner("Extraindo notícias do portal TCU..."):
+        with st.spinner("Processando notícias do portal TCU..."):
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             try:
-                # 1. Extração
-                status_text.text("📰 Extraindo notícias...")
-                progress_bar.progress(20)
+                # 1 e 2. Extração e análise em streaming: cada notícia é
+                # exibida assim que sua análise termina
+                status_text.text("📰 Extraindo e analisando notícias...")
                 
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 scraper = TCUScraper(delay=0.5)
-                noticias = scraper.extrair_noticias_completas(quantidade=quantidade)
-                
-                if not noticias:
-                    st.error("❌ Nenhuma notícia foi extraída. Verifique a conexão.")
-                    return
-                
-                st.success(f"✅ {len(noticias)} notícias extraídas!")
-                progress_bar.progress(40)
+                analyzer = TCUAnalyzer()
                 
-                # 2. Análise
-                status_text.text("🔍 Analisando notícias com IA...")
-                progress_bar.progress(50)
+                resultados = st.container()
+                noticias_analisadas = []
                 
-                analyzer = TCUAnalyzer()
-                noticias_analisadas = analyzer.analisar_noticias(noticias)
+                for analisada in processar_noticias_stream(
+                    scraper,
+                    analyzer,
+                    quantidade=quantidade,
+                    arquivo_analises=f"{nome_arquivo}_analises_{timestamp}.jsonl"
+                ):
+                    noticias_analisadas.append(analisada)
+                    exibir_noticia_analisada(resultados, analisada)
+                    progress_bar.progress(min(80, 10 + int(70 * len(noticias_analisadas) / quantidade)))
+                    status_text.text(f"🔍 {len(noticias_analisadas)}/{quantidade} notícias analisadas...")
                 
                 if not noticias_analisadas:
-                    st.error("❌ Erro na análise das notícias.")
+                    st.error("❌ Nenhuma notícia foi extraída ou analisada. Verifique a conexão.")
                     return
                 
                 st.success(f"✅ {len(noticias_analisadas)} notícias analisadas!")
-                progress_bar.progress(70)
                 
                 # 3. Relatório
                 status_text.text("📊 Gerando relatório executivo...")
@@ -380,7 +417,6 @@ def pagina_gerar():
                 status_text.text("💾 Salvando arquivos...")
                 progress_bar.progress(90)
                 
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 arquivo_json = f"{nome_arquivo}_relatorio_{timestamp}.json"
                 
                 with open(arquivo_json, 'w', encoding='utf-8') as f:
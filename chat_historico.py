@@ -0,0 +1,391 @@
+"""
+Histórico de conversas persistente e limitado para os chatbots.
+
+O padrão store = {} + ChatMessageHistory guarda todas as sessões na memória
+do processo: cresce sem limite, some ao reiniciar e não é compartilhado
+entre processos. Aqui o histórico fica em SQLite (modo WAL, vários processos
+podem ler e escrever no mesmo arquivo) e o processo não guarda mensagens:
+
+- cada sessão mantém só as mensagens mais recentes que cabem em max_tokens;
+- quando há mais de max_sessoes, as sessões ociosas há mais tempo (LRU)
+  são apagadas, assim como as que passaram de ttl_segundos sem uso;
+- os métodos assíncronos (aget_messages, aadd_messages, aclear) fazem o
+  I/O em uma thread, sem bloquear o event loop.
+
+A MemoriaResumida limita o tamanho do prompt em conversas longas: mantém as
+últimas K trocas literais e resume as anteriores em segundo plano. As
+mensagens ficam em um ArmazemHistorico; em memória só fica o resumo de cada
+sessão, com o mesmo TTL/LRU do armazém.
+
+Uso:
+    armazem = ArmazemHistorico(".chat_historico.db", max_tokens=2000)
+    RunnableWithMessageHistory(chain, armazem.get_session_history, ...)
+
+    memoria = MemoriaResumida(llm, k_turnos=3)
+    RunnableWithMessageHistory(chain, memoria.get_session_history, ...)
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, SystemMessage, message_to_dict, messages_from_dict
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+
+def estimar_tokens(mensagem: BaseMessage) -> int:
+    """Estimativa rápida de tokens (~4 caracteres por token)."""
+    conteudo = mensagem.content if isinstance(mensagem.content, str) else json.dumps(mensagem.content)
+    return len(conteudo) // 4 + 4
+
+
+class ArmazemHistorico:
+    """Banco SQLite com os históricos de todas as sessões."""
+
+    def __init__(
+        self,
+        caminho: str = ".chat_historico.db",
+        max_tokens: Optional[int] = 2000,
+        max_sessoes: int = 10_000,
+        ttl_segundos: Optional[float] = 7 * 24 * 3600,
+        contar_tokens: Callable[[BaseMessage], int] = estimar_tokens
+    ):
+        """
+        Args:
+            caminho: Arquivo do banco (":memory:" não é compartilhado entre threads)
+            max_tokens: Janela de tokens por sessão (None = sem limite)
+            max_sessoes: Máximo de sessões guardadas; as menos usadas saem
+            ttl_segundos: Sessões sem uso há mais tempo que isso são apagadas
+            contar_tokens: Função que estima os tokens de uma mensagem
+        """
+        self.caminho = caminho
+        self.max_tokens = max_tokens
+        self.max_sessoes = max_sessoes
+        self.ttl_segundos = ttl_segundos
+        self.contar_tokens = contar_tokens
+        self._local = threading.local()
+        self._criar_tabelas()
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)."""
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def _criar_tabelas(self):
+        self._conexao().executescript("""
+            CREATE TABLE IF NOT EXISTS sessoes (
+                session_id TEXT PRIMARY KEY,
+                ultimo_acesso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessoes_acesso ON sessoes (ultimo_acesso);
+            CREATE TABLE IF NOT EXISTS mensagens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                mensagem TEXT NOT NULL,
+                tokens INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_mensagens_sessao ON mensagens (session_id, id);
+        """)
+
+    def get_session_history(self, session_id: str) -> "HistoricoSQLite":
+        """Fábrica para RunnableWithMessageHistory (substitui o store = {})."""
+        return HistoricoSQLite(session_id, self)
+
+    # ------------------------------------------------------------------
+    # Operações usadas pelo HistoricoSQLite
+    # ------------------------------------------------------------------
+
+    def ler(self, session_id: str) -> List[BaseMessage]:
+        """Mensagens da sessão, da mais antiga para a mais recente."""
+        conexao = self._conexao()
+        linhas = conexao.execute(
+            "SELECT mensagem FROM mensagens WHERE session_id = ? ORDER BY id", (session_id,)
+        ).fetchall()
+        conexao.execute(
+            "UPDATE sessoes SET ultimo_acesso = ? WHERE session_id = ?", (time.time(), session_id)
+        )
+        return messages_from_dict([json.loads(linha[0]) for linha in linhas])
+
+    def acrescentar(self, session_id: str, mensagens: Sequence[BaseMessage]):
+        """Grava mensagens, recorta a janela de tokens e remove sessões ociosas."""
+        if not mensagens:
+            return
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            conexao.execute(
+                "INSERT INTO sessoes (session_id, ultimo_acesso) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET ultimo_acesso = excluded.ultimo_acesso",
+                (session_id, time.time())
+            )
+            conexao.executemany(
+                "INSERT INTO mensagens (session_id, mensagem, tokens) VALUES (?, ?, ?)",
+                [
+                    (session_id, json.dumps(message_to_dict(m), ensure_ascii=False), self.contar_tokens(m))
+                    for m in mensagens
+                ]
+            )
+            self._recortar(conexao, session_id)
+            self._despejar(conexao)
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+
+    def limpar(self, session_id: str):
+        """Apaga a sessão."""
+        conexao = self._conexao()
+        conexao.execute("DELETE FROM mensagens WHERE session_id = ?", (session_id,))
+        conexao.execute("DELETE FROM sessoes WHERE session_id = ?", (session_id,))
+
+    def _recortar(self, conexao: sqlite3.Connection, session_id: str):
+        """
+        Remove as mensagens mais antigas até a sessão caber em max_tokens.
+
+        A mensagem mais recente sempre fica, e o histórico passa a começar
+        por uma mensagem humana (não sobra resposta sem a pergunta).
+        """
+        if self.max_tokens is None:
+            return
+        linhas = conexao.execute(
+            "SELECT id, tokens, mensagem FROM mensagens WHERE session_id = ? ORDER BY id DESC",
+            (session_id,)
+        ).fetchall()
+
+        total = 0
+        manter = 0
+        for id_, tokens, _ in linhas:
+            if manter and total + tokens > self.max_tokens:
+                break
+            total += tokens
+            manter += 1
+        # Recua até a mensagem mais antiga mantida ser humana
+        while manter > 1 and json.loads(linhas[manter - 1][2])["type"] != "human":
+            manter -= 1
+
+        if manter < len(linhas):
+            conexao.execute(
+                "DELETE FROM mensagens WHERE session_id = ? AND id < ?",
+                (session_id, linhas[manter - 1][0])
+            )
+
+    def _despejar(self, conexao: sqlite3.Connection):
+        """Apaga sessões expiradas e, acima de max_sessoes, as menos usadas."""
+        apagar = []
+        if self.ttl_segundos is not None:
+            apagar += [linha[0] for linha in conexao.execute(
+                "SELECT session_id FROM sessoes WHERE ultimo_acesso < ?",
+                (time.time() - self.ttl_segundos,)
+            )]
+        (total,) = conexao.execute("SELECT COUNT(*) FROM sessoes").fetchone()
+        excesso = total - len(apagar) - self.max_sessoes
+        if excesso > 0:
+            apagar += [linha[0] for linha in conexao.execute(
+                "SELECT session_id FROM sessoes WHERE session_id NOT IN (%s) "
+                "ORDER BY ultimo_acesso LIMIT ?" % ",".join("?" * len(apagar)),
+                (*apagar, excesso)
+            )]
+        if apagar:
+            lotes = [(s,) for s in apagar]
+            conexao.executemany("DELETE FROM mensagens WHERE session_id = ?", lotes)
+            conexao.executemany("DELETE FROM sessoes WHERE session_id = ?", lotes)
+
+    def estatisticas(self) -> dict:
+        """Quantidade de sessões e mensagens guardadas."""
+        conexao = self._conexao()
+        (sessoes,) = conexao.execute("SELECT COUNT(*) FROM sessoes").fetchone()
+        (mensagens,) = conexao.execute("SELECT COUNT(*) FROM mensagens").fetchone()
+        return {"sessoes": sessoes, "mensagens": mensagens}
+
+
+class HistoricoSQLite(BaseChatMessageHistory):
+    """Histórico de uma sessão; não guarda mensagens em memória."""
+
+    def __init__(self, session_id: str, armazem: ArmazemHistorico):
+        self.session_id = session_id
+        self.armazem = armazem
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self.armazem.ler(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.armazem.acrescentar(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.armazem.limpar(self.session_id)
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        return await asyncio.to_thread(self.armazem.ler, self.session_id)
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        await asyncio.to_thread(self.armazem.acrescentar, self.session_id, messages)
+
+    async def aclear(self) -> None:
+        await asyncio.to_thread(self.armazem.limpar, self.session_id)
+
+
+PROMPT_RESUMO = ChatPromptTemplate.from_messages([
+    ("system",
+     "Você mantém o resumo de uma conversa entre um usuário e um assistente. "
+     "Atualize o resumo com as novas mensagens, preservando nomes, fatos, "
+     "decisões e pedidos em aberto. Responda só com o resumo, em poucas frases."),
+    ("human", "Resumo atual:\n{resumo}\n\nNovas mensagens:\n{mensagens}"),
+])
+
+
+class _EstadoResumo:
+    """Resumo de uma sessão e quantas mensagens da base ele já cobre."""
+
+    def __init__(self):
+        self.resumo = ""
+        self.resumidas = 0
+        self.tarefa: Optional[Future] = None
+        self.ultimo_acesso = time.time()
+        self.lock = threading.Lock()
+
+    def reiniciar(self):
+        self.resumo = ""
+        self.resumidas = 0
+
+
+class MemoriaResumida:
+    """
+    Memória com janela literal + resumo incremental.
+
+    O prompt recebe uma mensagem de sistema com o resumo e as últimas
+    k_turnos trocas (pergunta + resposta). Quando mensagens saem da janela,
+    uma thread de fundo dobra essas mensagens no resumo, fora do caminho da
+    resposta; enquanto isso o prompt traz o resumo anterior e, literalmente,
+    as mensagens que ele ainda não cobre.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        k_turnos: int = 3,
+        armazem: Optional[ArmazemHistorico] = None,
+        max_threads: int = 2
+    ):
+        """
+        Args:
+            llm: Modelo usado para resumir (um modelo rápido basta)
+            k_turnos: Trocas mantidas literalmente no prompt
+            armazem: Onde as mensagens são gravadas (padrão: SQLite em
+                .chat_resumo.db). Deve ter max_tokens=None, pois o resumo
+                conta posições; max_sessoes e ttl_segundos também limitam
+                os resumos guardados em memória.
+            max_threads: Resumos simultâneos em segundo plano
+        """
+        self.cadeia_resumo = PROMPT_RESUMO | llm | StrOutputParser()
+        self.k_turnos = k_turnos
+        self.armazem = armazem or ArmazemHistorico(".chat_resumo.db", max_tokens=None)
+        if self.armazem.max_tokens is not None:
+            raise ValueError("O armazém da MemoriaResumida não pode recortar mensagens (use max_tokens=None)")
+        self._estados: "OrderedDict[str, _EstadoResumo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="resumo")
+
+    def get_session_history(self, session_id: str) -> "HistoricoResumido":
+        """Fábrica para RunnableWithMessageHistory."""
+        with self._lock:
+            estado = self._estados.pop(session_id, None) or _EstadoResumo()
+            estado.ultimo_acesso = time.time()
+            self._estados[session_id] = estado
+            self._despejar()
+        return HistoricoResumido(self.armazem.get_session_history(session_id), estado, self)
+
+    def _despejar(self):
+        """Descarta resumos expirados e, acima de max_sessoes, os menos usados (chamar com _lock)."""
+        limite = time.time() - self.armazem.ttl_segundos if self.armazem.ttl_segundos is not None else None
+        while self._estados:
+            session_id, estado = next(iter(self._estados.items()))
+            if len(self._estados) <= self.armazem.max_sessoes and (limite is None or estado.ultimo_acesso >= limite):
+                break
+            del self._estados[session_id]
+
+    def resumo(self, session_id: str) -> str:
+        """Resumo atual da sessão."""
+        estado = self._estados.get(session_id)
+        return estado.resumo if estado else ""
+
+    def aguardar(self, session_id: str):
+        """Espera o resumo em andamento da sessão (útil em scripts e testes)."""
+        estado = self._estados.get(session_id)
+        tarefa = estado.tarefa if estado else None
+        if tarefa is not None:
+            tarefa.result()
+
+    @property
+    def tamanho_janela(self) -> int:
+        return 2 * self.k_turnos
+
+    def _agendar(self, base: BaseChatMessageHistory, estado: _EstadoResumo):
+        """Dispara o resumo se há mensagens fora da janela e nenhum em andamento."""
+        with estado.lock:
+            if estado.tarefa is not None and not estado.tarefa.done():
+                return
+            estado.tarefa = self._executor.submit(self._resumir, base, estado)
+
+    def _resumir(self, base: BaseChatMessageHistory, estado: _EstadoResumo):
+        """Dobra no resumo as mensagens que saíram da janela (roda em segundo plano)."""
+        while True:
+            mensagens = base.messages
+            limite = len(mensagens) - self.tamanho_janela
+            with estado.lock:
+                if len(mensagens) < estado.resumidas:
+                    # A sessão foi apagada do armazém (TTL/LRU): recomeça o resumo
+                    estado.reiniciar()
+            if limite <= estado.resumidas:
+                return
+            novas = "\n".join(
+                f"{m.type}: {m.content}" for m in mensagens[estado.resumidas:limite]
+            )
+            resumo = self.cadeia_resumo.invoke({"resumo": estado.resumo or "(vazio)", "mensagens": novas})
+            with estado.lock:
+                estado.resumo = resumo.strip()
+                estado.resumidas = limite
+
+
+class HistoricoResumido(BaseChatMessageHistory):
+    """Visão de uma sessão da MemoriaResumida: resumo + últimas trocas."""
+
+    def __init__(self, base: BaseChatMessageHistory, estado: _EstadoResumo, memoria: MemoriaResumida):
+        self.base = base
+        self.estado = estado
+        self.memoria = memoria
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        mensagens = self.base.messages
+        with self.estado.lock:
+            resumo, resumidas = self.estado.resumo, self.estado.resumidas
+        if len(mensagens) < resumidas:
+            resumo, resumidas = "", 0
+        # Janela literal + o que saiu dela e ainda não entrou no resumo
+        recentes = mensagens[min(resumidas, max(len(mensagens) - self.memoria.tamanho_janela, 0)):]
+        if not resumo:
+            return recentes
+        return [SystemMessage(content=f"Resumo da conversa até aqui: {resumo}")] + recentes
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self.base.add_messages(messages)
+        if len(self.base.messages) - self.memoria.tamanho_janela > self.estado.resumidas:
+            self.memoria._agendar(self.base, self.estado)
+
+    def clear(self) -> None:
+        self.base.clear()
+        with self.estado.lock:
+            self.estado.reiniciar()
@@ -0,0 +1,59 @@
+"""
+Registro compartilhado e preguiçoso de clientes de LLM.
+
+Criar ChatGoogleGenerativeAI (e importar o pacote) custa tempo, e cada
+instância abre o seu próprio cliente HTTP. Aqui cada configuração de modelo
+é criada uma única vez, só no primeiro uso, e compartilhada pelo processo
+inteiro; assim a conexão HTTP do cliente é reaproveitada entre requisições.
+Runnables derivados (bind_tools, with_structured_output, prompt | llm) também
+são guardados por chave, evitando refazer o vínculo de ferramentas a cada
+mensagem.
+
+Uso:
+    llm = obter_llm("gemini-2.0-flash")
+    agente = obter_vinculado("hospital:triage", lambda: prompt | llm.bind_tools(tools))
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+_lock = threading.Lock()
+_clientes: Dict[Hashable, Any] = {}
+_vinculados: Dict[Hashable, Any] = {}
+
+
+def obter_llm(modelo: str = "gemini-2.0-flash", **opcoes) -> Any:
+    """
+    Cliente de chat do Gemini compartilhado para (modelo, opções).
+
+    O import de langchain_google_genai e a criação do cliente só acontecem
+    na primeira chamada.
+    """
+    chave = (modelo, tuple(sorted(opcoes.items())))
+    cliente = _clientes.get(chave)
+    if cliente is None:
+        with _lock:
+            cliente = _clientes.get(chave)
+            if cliente is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                cliente = ChatGoogleGenerativeAI(model=modelo, **opcoes)
+                _clientes[chave] = cliente
+    return cliente
+
+
+def obter_vinculado(chave: Hashable, fabrica: Callable[[], Any]) -> Any:
+    """Runnable derivado de um cliente, criado por fabrica() só no primeiro uso."""
+    vinculado = _vinculados.get(chave)
+    if vinculado is None:
+        with _lock:
+            vinculado = _vinculados.get(chave)
+            if vinculado is None:
+                vinculado = fabrica()
+                _vinculados[chave] = vinculado
+    return vinculado
+
+
+def limpar():
+    """Descarta clientes e vínculos (ex: após trocar a GOOGLE_API_KEY)."""
+    with _lock:
+        _clientes.clear()
+        _vinculados.clear()
@@ -0,0 +1,100 @@
+"""
+Execução paralela das chamadas de ferramenta de um turno.
+
+Quando o modelo pede várias ferramentas na mesma resposta ("status do SF101
+e voos para Paris"), todas rodam ao mesmo tempo: funções síncronas em um
+pool de threads e corrotinas juntas em um asyncio.gather. Cada chamada tem
+seu timeout e vira um ToolMessage; os resultados voltam ao modelo em uma
+única chamada de acompanhamento.
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import ToolCall, ToolMessage
+
+
+class ExecutorFerramentas:
+    """Executa as tool_calls de uma resposta do modelo em paralelo."""
+
+    def __init__(
+        self,
+        ferramentas: Dict[str, Callable],
+        timeout: float = 15.0,
+        timeouts: Optional[Dict[str, float]] = None,
+        max_threads: int = 8
+    ):
+        """
+        Args:
+            ferramentas: nome -> função (síncrona ou async) que recebe os argumentos da chamada
+            timeout: Tempo máximo padrão de cada chamada, em segundos
+            timeouts: Tempo máximo por ferramenta (sobrepõe o padrão)
+            max_threads: Chamadas síncronas simultâneas
+        """
+        self.ferramentas = ferramentas
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="ferramenta")
+
+    def _limite(self, nome: str) -> float:
+        return self.timeouts.get(nome, self.timeout)
+
+    async def _reunir(self, chamadas: List[ToolCall]) -> list:
+        """Roda as ferramentas async juntas, cada uma com seu timeout."""
+        return await asyncio.gather(*[
+            asyncio.wait_for(self.ferramentas[c["name"]](**c["args"]), self._limite(c["name"]))
+            for c in chamadas
+        ], return_exceptions=True)
+
+    def executar(self, tool_calls: List[ToolCall]) -> List[ToolMessage]:
+        """
+        Executa todas as chamadas e devolve um ToolMessage por chamada, na
+        mesma ordem. Erros e timeouts viram mensagens de erro para o modelo.
+
+        Obs: uma função síncrona que estoura o timeout continua rodando na
+        sua thread; só o resultado dela é descartado.
+        """
+        inicio = time.monotonic()
+        resultados: Dict[int, object] = {}
+        futuros = {}
+        assincronas = []
+
+        for i, chamada in enumerate(tool_calls):
+            func = self.ferramentas.get(chamada["name"])
+            if func is None:
+                resultados[i] = ValueError(f"Ferramenta desconhecida: {chamada['name']}")
+            elif inspect.iscoroutinefunction(func):
+                assincronas.append(i)
+            else:
+                futuros[i] = self._pool.submit(func, **chamada["args"])
+
+        if assincronas:
+            chamadas = [tool_calls[i] for i in assincronas]
+            futuro = self._pool.submit(asyncio.run, self._reunir(chamadas))
+            # wait_for já limita cada corrotina; a folga cobre o agendamento
+            limite = max(self._limite(c["name"]) for c in chamadas) + 1.0
+            try:
+                for i, resultado in zip(assincronas, futuro.result(timeout=limite)):
+                    resultados[i] = resultado
+            except FuturesTimeout as e:
+                resultados.update({i: e for i in assincronas})
+
+        for i, futuro in futuros.items():
+            restante = self._limite(tool_calls[i]["name"]) - (time.monotonic() - inicio)
+            try:
+                resultados[i] = futuro.result(timeout=max(0.0, restante))
+            except Exception as e:
+                resultados[i] = e
+
+        return [self._mensagem(chamada, resultados[i]) for i, chamada in enumerate(tool_calls)]
+
+    def _mensagem(self, chamada: ToolCall, resultado) -> ToolMessage:
+        if isinstance(resultado, (FuturesTimeout, asyncio.TimeoutError)):
+            conteudo, status = f"Erro: a ferramenta {chamada['name']} excedeu o tempo limite.", "error"
+        elif isinstance(resultado, Exception):
+            conteudo, status = f"Erro ao executar {chamada['name']}: {resultado}", "error"
+        else:
+            conteudo, status = str(resultado), "success"
+        return ToolMessage(content=conteudo, tool_call_id=chamada.get("id") or chamada["name"], name=chamada["name"], status=status)
@@ -1,15 +1,19 @@
 import os
 import functools
+import inspect
 import operator
-from typing import Annotated, Sequence, TypedDict, Union, Literal
+from typing import Annotated, Optional, Sequence, TypedDict, Union, Literal
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from clientes_llm import obter_llm, obter_vinculado
+from executor_ferramentas import ExecutorFerramentas
+from roteador_local import RoteadorLocal, SupervisorHibrido
+
 # Carrega chaves
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts/.env"))
 
@@ -37,7 +41,7 @@ class AgentState(TypedDict):
     next: str
 
 # 3. Helper para criar agentes
-def create_agent(llm: ChatGoogleGenerativeAI, tools: list, system_prompt: str):
+def create_agent(llm, tools: list, system_prompt: str):
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
@@ -45,24 +49,34 @@ def create_agent(llm: ChatGoogleGenerativeAI, tools: list, system_prompt: str):
     ])
     return prompt | llm.bind_tools(tools)
 
-# 4. Instância do LLM
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+# 4. LLM e agentes sob demanda: o cliente é criado no primeiro uso e
+# compartilhado (clientes_llm.py); os vínculos de ferramentas são feitos uma vez
+ALL_TOOLS = [check_symptoms, schedule_appointment, get_clinic_hours]
 
-# Agentes Especialistas
-triage_agent = create_agent(
-    llm, [check_symptoms],
-    "Você é o Enfermeiro de Triagem do CareFlow. Ouça os sintomas do paciente e use a ferramenta de triagem."
-)
+def get_llm():
+    return obter_llm("gemini-2.0-flash")
 
-medical_agent = create_agent(
-    llm, [check_symptoms],
-    "Você é o Médico Especialista do CareFlow. Explique as condições de saúde de forma técnica mas acolhedora."
-)
+def get_llm_with_tools():
+    return obter_vinculado("hospital:tools", lambda: get_llm().bind_tools(ALL_TOOLS))
 
-admin_agent = create_agent(
-    llm, [schedule_appointment, get_clinic_hours],
-    "Você é o Secretário do CareFlow. Ajude com agendamentos e horários de funcionamento."
-)
+# Agentes Especialistas
+AGENT_SPECS = {
+    "Triage": (
+        [check_symptoms],
+        "Você é o Enfermeiro de Triagem do CareFlow. Ouça os sintomas do paciente e use a ferramenta de triagem."
+    ),
+    "Medical": (
+        [check_symptoms],
+        "Você é o Médico Especialista do CareFlow. Explique as condições de saúde de forma técnica mas acolhedora."
+    ),
+    "Admin": (
+        [schedule_appointment, get_clinic_hours],
+        "Você é o Secretário do CareFlow. Ajude com agendamentos e horários de funcionamento."
+    ),
+}
+
+def get_agent(name):
+    return obter_vinculado(f"hospital:agent:{name}", lambda: create_agent(get_llm(), *AGENT_SPECS[name]))
 
 # 5. Supervisor (Diretor Clínico)
 members = ["Triage", "Medical", "Admin"]
@@ -80,51 +94,180 @@ class Router(BaseModel):
         description="O próximo profissional a atender ou FINISH."
     )
 
-def supervisor_agent(state):
+def _build_supervisor_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
         ("system", "Quem deve atender o paciente agora? (FINISH, Triage, Medical, Admin)"),
     ])
-    chain = prompt | llm.with_structured_output(Router)
+    return prompt | get_llm().with_structured_output(Router)
+
+def supervisor_agent(state):
+    chain = obter_vinculado("hospital:supervisor", _build_supervisor_chain)
     result = chain.invoke(state)
     return {"next": result.next if hasattr(result, 'next') else "FINISH"}
 
+# Executor das chamadas de ferramenta (paralelas, com timeout)
+tool_executor = ExecutorFerramentas(hospital_tools.TOOLS, timeout=15.0)
+
+# 5a. Roteador local: decide em microssegundos quando está confiante e só
+# chama o supervisor LLM nos casos duvidosos (cujas decisões viram treino)
+ROUTING_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "roteamento_log.jsonl")
+
+seed_routes = [
+    ("Estou com febre e dor de cabeça", "Triage"),
+    ("Tenho tosse há dois dias", "Triage"),
+    ("Sinto uma dor no peito", "Triage"),
+    ("O que é hipertensão?", "Medical"),
+    ("Quais os riscos da diabetes?", "Medical"),
+    ("Como funciona o tratamento da asma?", "Medical"),
+    ("Quero agendar uma consulta", "Admin"),
+    ("Qual o horário da pediatria?", "Admin"),
+    ("Marcar consulta com cardiologista amanhã", "Admin"),
+    ("Obrigado, era só isso", "FINISH"),
+    ("Obrigada", "FINISH"),
+    ("Valeu, tchau", "FINISH"),
+    ("Não preciso de mais nada", "FINISH"),
+]
+
+fast_supervisor = SupervisorHibrido(
+    RoteadorLocal(["FINISH", "Triage", "Medical", "Admin"]),
+    supervisor_agent,
+    caminho_registro=ROUTING_LOG,
+    exemplos_iniciais=seed_routes,
+    # O texto das mensagens só vai para o registro se ROUTING_LOG_TEXT=1
+    registrar_texto=os.getenv("ROUTING_LOG_TEXT") == "1",
+)
+
+# 5b. Modo de chamada única: roteamento + primeira decisão de ferramenta juntos
+class RoutedTurn(BaseModel):
+    """Encaminhamento do paciente e primeira ação do profissional escolhido."""
+    next: Literal["FINISH", "Triage", "Medical", "Admin"] = Field(
+        description="O profissional que atende o paciente ou FINISH."
+    )
+    tool: Optional[Literal["check_symptoms", "schedule_appointment", "get_clinic_hours"]] = Field(
+        default=None, description="Ferramenta a executar, se necessária para responder."
+    )
+    symptoms_text: Optional[str] = Field(default=None, description="check_symptoms: sintomas relatados.")
+    specialty: Optional[str] = Field(default=None, description="schedule_appointment: especialidade.")
+    patient_name: Optional[str] = Field(default=None, description="schedule_appointment: nome do paciente.")
+    date_str: Optional[str] = Field(default=None, description="schedule_appointment: data desejada (DD/MM, 'amanhã', 'segunda de manhã'...).")
+    department: Optional[str] = Field(default=None, description="get_clinic_hours: departamento.")
+    answer: str = Field(
+        default="", description="Resposta ao paciente quando nenhuma ferramenta é necessária."
+    )
+
+single_call_prompt = (
+    system_prompt
+    + " Triage é o Enfermeiro de Triagem (usa check_symptoms);"
+    " Medical é o Médico Especialista (explica condições de forma técnica mas acolhedora);"
+    " Admin é o Secretário (usa schedule_appointment e get_clinic_hours)."
+    " Escolha o profissional e, falando como ele, decida: se precisar de uma ferramenta,"
+    " preencha tool e os argumentos dela; senão, escreva a resposta ao paciente em answer."
+)
+
+def _build_single_call_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", single_call_prompt),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+    return prompt | get_llm().with_structured_output(RoutedTurn)
+
+def route_and_act(state) -> RoutedTurn:
+    chain = obter_vinculado("hospital:single_call", _build_single_call_chain)
+    return chain.invoke(state)
+
 # 6. Classe de Gerenciamento para o Streamlit
 class HospitalCareTeam:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+    def __init__(self, single_call=False, local_router=True):
+        """
+        Args:
+            single_call: Roteia e decide a ferramenta em uma única chamada ao
+                modelo; o resultado da ferramenta só volta ao modelo quando
+                uma ferramenta é usada (1 ou 2 chamadas por mensagem, em vez de 2 ou 3).
+            local_router: Usa o roteador local (roteador_local.py) antes do
+                supervisor LLM quando single_call está desligado
+        """
+        self.single_call = single_call
+        self.local_router = local_router
         self.agents = {
-            "Triage": {"agent": triage_agent, "icon": "🏥"},
-            "Medical": {"agent": medical_agent, "icon": "🩺"},
-            "Admin": {"agent": admin_agent, "icon": "📅"}
+            "Triage": {"icon": "🏥"},
+            "Medical": {"icon": "🩺"},
+            "Admin": {"icon": "📅"}
         }
+
+    @property
+    def llm(self):
+        return get_llm()
     
     def run(self, user_input, history=[]):
+        agent_name, stream, icon = self.run_stream(user_input, history)
+        return agent_name, "".join(stream), icon
+
+    def run_stream(self, user_input, history=[]):
+        """Roteia o paciente e devolve (profissional, gerador de trechos da resposta, ícone).
+
+        Só o roteamento acontece antes do retorno; a resposta é gerada token a
+        token enquanto o gerador é consumido (ex: st.write_stream).
+        """
         try:
             state = {"messages": history + [HumanMessage(content=user_input)]}
-            route = supervisor_agent(state)
+            if self.single_call:
+                return self._run_single_call(state)
+            route = (fast_supervisor if self.local_router else supervisor_agent)(state)
             next_agent = route["next"]
-            
-            if next_agent == "FINISH" or next_agent not in self.agents:
-                resp = self.llm.invoke(state["messages"])
-                return "Diretor Clínico", resp.content, "👨‍⚕️"
-            
-            agent_data = self.agents[next_agent]
-            tools_list = [check_symptoms, schedule_appointment, get_clinic_hours]
-            llm_with_tools = self.llm.bind_tools(tools_list)
-            
-            resp = llm_with_tools.invoke(state["messages"])
-            
-            if hasattr(resp, 'tool_calls') and resp.tool_calls:
-                for tool_call in resp.tool_calls:
-                    t_name = tool_call['name']
-                    t_args = tool_call['args']
-                    if t_name in hospital_tools.TOOLS:
-                        f_resp = hospital_tools.TOOLS[t_name](**t_args)
-                        final_resp = self.llm.invoke(state["messages"] + [resp, HumanMessage(content=f"Resultado da ferramenta {t_name}: {f_resp}. Por favor, responda ao paciente.")])
-                        return next_agent, final_resp.content, agent_data["icon"]
-            
-            return next_agent, resp.content, agent_data["icon"]
         except Exception as e:
-            return "Erro", f"Ocorreu um erro no sistema hospitalar: {e}", "⚠️"
+            return "Erro", iter([f"Ocorreu um erro no sistema hospitalar: {e}"]), "⚠️"
+
+        if next_agent == "FINISH" or next_agent not in self.agents:
+            return "Diretor Clínico", self._stream_answer(state["messages"]), "👨‍⚕️"
+
+        agent_data = self.agents[next_agent]
+        return next_agent, self._stream_with_tools(state["messages"]), agent_data["icon"]
+
+    def _run_single_call(self, state):
+        decision = route_and_act(state)
+        if decision.next in self.agents:
+            agent_name, icon = decision.next, self.agents[decision.next]["icon"]
+        else:
+            agent_name, icon = "Diretor Clínico", "👨‍⚕️"
+
+        if decision.tool in hospital_tools.TOOLS:
+            func = hospital_tools.TOOLS[decision.tool]
+            t_args = {p: getattr(decision, p) for p in inspect.signature(func).parameters}
+            if None in t_args.values():
+                # Argumentos incompletos: volta ao fluxo com ferramentas do LangChain
+                return agent_name, self._stream_with_tools(state["messages"]), icon
+            f_resp = func(**t_args)
+            return agent_name, self._stream_answer(state["messages"] + [HumanMessage(content=f"Resultado da ferramenta {decision.tool}: {f_resp}. Por favor, responda ao paciente.")]), icon
+
+        if decision.answer:
+            return agent_name, iter([decision.answer]), icon
+        return agent_name, self._stream_answer(state["messages"]), icon
+
+    def _stream_answer(self, messages):
+        try:
+            for chunk in self.llm.stream(messages):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            yield f"Ocorreu um erro no sistema hospitalar: {e}"
+
+    def _stream_with_tools(self, messages):
+        """Transmite a resposta; se o modelo pedir ferramentas, executa todas e transmite a resposta final."""
+        try:
+            llm_with_tools = get_llm_with_tools()
+
+            resp = None
+            for chunk in llm_with_tools.stream(messages):
+                resp = chunk if resp is None else resp + chunk
+                if chunk.text:
+                    yield chunk.text
+
+            if resp is not None and resp.tool_calls:
+                # Todas as ferramentas pedidas rodam em paralelo e os resultados
+                # voltam ao modelo em uma única chamada
+                tool_messages = tool_executor.executar(resp.tool_calls)
+                yield from self._stream_answer(messages + [resp] + tool_messages)
+        except Exception as e:
+            yield f"Ocorreu um erro no sistema hospitalar: {e}"
@@ -51,6 +51,11 @@ with st.sidebar:
     st.success("**Médico Especialista**: Orientações e diagnósticos preliminares.")
     st.warning("**Secretaria**: Agendamentos e informações administrativas.")
     
+    st.session_state.hospital_team.single_call = st.toggle(
+        "⚡ Modo rápido", value=True,
+        help="Encaminhamento e decisão de ferramenta em uma única chamada ao modelo."
+    )
+    
     if st.button("Nova Consulta"):
         st.session_state.hospital_messages = []
         st.rerun()
@@ -76,18 +81,19 @@ if prompt := st.chat_input("Como você está se sentindo hoje?"):
     with st.chat_message("user"):
         st.markdown(prompt)
     
+    # O spinner cobre só o encaminhamento; a resposta aparece token a token
     with st.spinner("Nossa equipe médica está analisando seu caso..."):
         history = st.session_state.hospital_messages
-        agent_name, response, icon = st.session_state.hospital_team.run(prompt, history)
-        
-        with st.chat_message("assistant", avatar=icon):
-            st.markdown(f"**{agent_name}**")
-            st.markdown(response)
-        
-        st.session_state.hospital_messages.append(HumanMessage(content=prompt))
-        st.session_state.hospital_messages.append(
-            AIMessage(
-                content=response,
-                additional_kwargs={"agent_name": agent_name, "icon": icon}
-            )
+        agent_name, stream, icon = st.session_state.hospital_team.run_stream(prompt, history)
+    
+    with st.chat_message("assistant", avatar=icon):
+        st.markdown(f"**{agent_name}**")
+        response = st.write_stream(stream)
+    
+    st.session_state.hospital_messages.append(HumanMessage(content=prompt))
+    st.session_state.hospital_messages.append(
+        AIMessage(
+            content=response,
+            additional_kwargs={"agent_name": agent_name, "icon": icon}
         )
+    )
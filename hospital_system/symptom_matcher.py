@@ -0,0 +1,224 @@
+"""Casamento de sintomas em uma única passada (Aho–Corasick).
+
+A tabela de sintomas tem um nome canônico, sinônimos, gravidade e orientação.
+Todos os termos (sem acentos, minúsculos) viram um autômato Aho–Corasick
+construído uma vez; o texto do paciente é percorrido caractere a caractere e
+cada termo encontrado em fronteira de palavra gera um achado. O custo é
+proporcional ao tamanho do texto, não ao tamanho do vocabulário.
+
+Negação: um termo precedido diretamente por "não", "sem", "nem" ou "nunca",
+ou separado deles só por verbos de apoio ("não tenho febre", "sem febre",
+"não estou com tosse"), é ignorado. Achados de emergência (gravidade 3) nunca
+são descartados por negação: "nunca senti tanta dor no peito" e "sem
+melhora da dor no peito" continuam sendo emergências. Na dúvida, a triagem
+prefere o falso alarme.
+
+Casos de regressão e micro-benchmark contra o laço com "in"
+(python -m hospital_system.symptom_matcher).
+"""
+import random
+import re
+import string
+import time
+from collections import deque
+
+from tokenizacao import remover_acentos
+
+# Gravidade: 3 = emergência, 2 = atenção, 1 = leve
+SYMPTOMS = [
+    ("Dor no peito", 3, ["dor no peito", "dor toracica", "aperto no peito", "pressao no peito"],
+     "URGENTE: Procure uma unidade de emergência imediatamente."),
+    ("Falta de ar", 3, ["falta de ar", "dificuldade para respirar", "dispneia", "sem ar", "sem conseguir respirar", "nao consigo respirar"],
+     "URGENTE: Dificuldade respiratória exige avaliação imediata."),
+    ("Desmaio", 3, ["desmaio", "desmaiei", "desmaiou", "perda de consciencia", "sincope"],
+     "URGENTE: Procure atendimento de emergência."),
+    ("Fraqueza em um lado do corpo", 3, ["fraqueza de um lado", "boca torta", "formigamento de um lado", "dificuldade para falar"],
+     "URGENTE: Possível AVC. Ligue 192 imediatamente."),
+    ("Sangramento intenso", 3, ["sangramento intenso", "hemorragia", "vomito com sangue", "sangue nas fezes"],
+     "URGENTE: Procure uma unidade de emergência imediatamente."),
+    ("Convulsão", 3, ["convulsao", "convulsionando", "crise convulsiva"],
+     "URGENTE: Procure atendimento de emergência."),
+    ("Febre", 2, ["febre", "febril", "temperatura alta", "calafrio", "calafrios"],
+     "Possível infecção ou inflamação. Recomenda-se repouso e hidratação."),
+    ("Dor abdominal", 2, ["dor abdominal", "dor na barriga", "dor de barriga", "colica"],
+     "Observe a intensidade; dor forte ou persistente precisa de avaliação médica."),
+    ("Vômito", 2, ["vomito", "vomitando", "vomitei", "enjoo", "nausea"],
+     "Mantenha a hidratação em pequenos goles; procure atendimento se persistir."),
+    ("Diarreia", 2, ["diarreia", "intestino solto", "fezes liquidas"],
+     "Hidrate-se com soro de reidratação; atenção a sinais de desidratação."),
+    ("Tontura", 2, ["tontura", "tonto", "tonta", "vertigem", "zonzo"],
+     "Sente-se ou deite-se; pode ser queda de pressão, desidratação ou labirintite."),
+    ("Palpitação", 2, ["palpitacao", "palpitacoes", "coracao acelerado", "taquicardia"],
+     "Pode ser ansiedade ou arritmia. Procure avaliação se vier com dor ou falta de ar."),
+    ("Dor de cabeça", 1, ["dor de cabeca", "cefaleia", "enxaqueca", "cabeca doendo"],
+     "Pode ser estresse, desidratação ou enxaqueca."),
+    ("Tosse", 1, ["tosse", "tossindo", "tosse seca", "tosse com catarro"],
+     "Avaliar se é seca ou com secreção. Pode ser resfriado ou alergia."),
+    ("Dor de garganta", 1, ["dor de garganta", "garganta inflamada", "dor para engolir"],
+     "Gargarejo morno e hidratação; procure avaliação se houver placas ou febre alta."),
+    ("Coriza", 1, ["coriza", "nariz escorrendo", "nariz entupido", "congestao nasal", "espirro", "espirros"],
+     "Provável resfriado ou rinite. Lavagem nasal com soro ajuda."),
+    ("Dor no corpo", 1, ["dor no corpo", "corpo doendo", "mialgia", "dores musculares"],
+     "Repouso e hidratação; comum em quadros virais."),
+    ("Cansaço", 1, ["cansaco", "fadiga", "indisposicao", "exausto", "exausta"],
+     "Observe sono, alimentação e hidratação; procure avaliação se persistir."),
+    ("Dor nas costas", 1, ["dor nas costas", "dor lombar", "lombalgia"],
+     "Alongamento leve e compressa morna; avalie com ortopedista se persistir."),
+    ("Manchas na pele", 1, ["manchas na pele", "coceira", "urticaria", "alergia na pele", "vermelhidao"],
+     "Possível reação alérgica; evite coçar e procure avaliação se espalhar."),
+]
+
+
+NEGATIONS = {"nao", "sem", "nem", "nunca"}
+# Palavras que podem ficar entre a negação e o termo ("não estou com febre")
+NEGATION_FILLERS = {"tenho", "tive", "tem", "estou", "estava", "esta", "com", "sinto", "senti", "mais", "apresento"}
+
+# Fim de oração: a negação não atravessa pontuação nem "mas"
+_CLAUSE = re.compile(r"[.,;:!?]|\bmas\b|\bporem\b")
+_WORD = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos ("Cefaléia" -> "cefaleia")."""
+    return remover_acentos(text.lower())
+
+
+def negated(folded: str, start: int) -> bool:
+    """Se o termo que começa em start vem logo após uma negação (pulando verbos de apoio)."""
+    clause = _CLAUSE.split(folded[:start])[-1]
+    for word in reversed(_WORD.findall(clause)):
+        if word in NEGATIONS:
+            return True
+        if word not in NEGATION_FILLERS:
+            return False
+    return False
+
+
+def _inside_word(char: str) -> bool:
+    # Hífen junta palavras: "sem ar" não casa em "sem ar-condicionado"
+    return char.isalnum() or char == "-"
+
+
+class AhoCorasick:
+    """Autômato Aho–Corasick sobre caracteres, com saída em fronteira de palavra."""
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Iterável de (termo, valor); o termo já deve estar normalizado
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for term, value in patterns:
+            node = 0
+            for char in term:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(term), value))
+
+        # Links de falha em largura; as saídas herdam as do sufixo
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str):
+        """Gera (início, valor) de cada termo encontrado em fronteira de palavra."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                after_ok = end + 1 == len(text) or not _inside_word(text[end + 1])
+                if not after_ok:
+                    continue
+                for length, value in out[node]:
+                    start = end - length + 1
+                    if start == 0 or not _inside_word(text[start - 1]):
+                        yield start, value
+
+
+class SymptomMatcher:
+    """Achados de triagem a partir do texto livre do paciente."""
+
+    def __init__(self, table=SYMPTOMS):
+        self.table = {name: (severity, advice) for name, severity, _, advice in table}
+        self._automaton = AhoCorasick(
+            (fold(term), name) for name, _, terms, _ in table for term in [name] + terms
+        )
+
+    def match(self, text: str):
+        """Sintomas encontrados, do mais grave para o mais leve (empate: ordem no texto).
+
+        Returns:
+            Lista de (nome, gravidade, orientação)
+        """
+        folded = fold(text)
+        first_seen = {}
+        for start, name in self._automaton.find(folded):
+            if self.table[name][0] < 3 and negated(folded, start):
+                continue
+            if name not in first_seen or start < first_seen[name]:
+                first_seen[name] = start
+        ranked = sorted(first_seen, key=lambda name: (-self.table[name][0], first_seen[name]))
+        return [(name, *self.table[name]) for name in ranked]
+
+
+def _verificar():
+    """Casos de regressão da triagem."""
+    matcher = SymptomMatcher()
+    names = lambda text: [name for name, _, _ in matcher.match(text)]
+    assert names("estou sem ar-condicionado em casa") == []
+    assert names("fiquei sem ar e com dor no peito") == ["Falta de ar", "Dor no peito"]
+    assert names("não tenho febre, mas estou com tosse") == ["Tosse"]
+    assert names("sem febre nem tosse, só cefaléia") == ["Dor de cabeça"]
+    assert names("Tenho FEBRE alta e semfebre") == ["Febre"]
+    assert names("nunca senti tanta dor no peito") == ["Dor no peito"]
+    assert names("sem melhora da dor no peito desde ontem") == ["Dor no peito"]
+    assert names("estou sem ar") == ["Falta de ar"]
+    assert names("não estou com febre e tenho tosse") == ["Tosse"]
+    assert names("nunca tive enxaqueca, mas hoje vomitei") == ["Vômito"]
+    print("✅ Casos de triagem OK")
+
+
+def _benchmark(vocabulary_sizes=(4, 100, 1000, 5000), repeats=2000):
+    """Compara o laço com "in" (implementação anterior) com o autômato."""
+    rng = random.Random(0)
+    text = fold("Estou com febre, tosse seca e uma dor de cabeça forte desde ontem; hoje senti aperto no peito.")
+    base = [term for _, _, terms, _ in SYMPTOMS for term in terms]
+    print(f"{'termos':>7} {'laço (µs)':>10} {'Aho–Corasick (µs)':>18}")
+    for size in vocabulary_sizes:
+        extra = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14))) for _ in range(max(0, size - len(base)))]
+        vocabulary = (base + extra)[:size]
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            [term for term in vocabulary if term in text]
+        loop_us = (time.perf_counter() - start) * 1e6 / repeats
+
+        automaton = AhoCorasick((term, term) for term in vocabulary)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            list(automaton.find(text))
+        ac_us = (time.perf_counter() - start) * 1e6 / repeats
+        print(f"{size:>7} {loop_us:>10.1f} {ac_us:>18.1f}")
+
+
+if __name__ == "__main__":
+    _verificar()
+    _benchmark()
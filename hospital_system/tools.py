@@ -1,41 +1,270 @@
-import random
-from datetime import datetime, timedelta
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from hospital_system.symptom_matcher import SymptomMatcher
+from tokenizacao import remover_acentos
+
+_symptom_matcher = None
+
 
 def check_symptoms(symptoms_text: str):
-    """Analisa sintomas e retorna uma avaliação inicial de triagem."""
-    symptoms_db = {
-        "febre": "Possível infecção ou inflamação. Recomenda-se repouso e hidratação.",
-        "dor de cabeça": "Pode ser estresse, desidratação ou enxaqueca.",
-        "tosse": "Avaliar se é seca ou com secreção. Pode ser resfriado ou alergia.",
-        "dor no peito": "URGENTE: Procure uma unidade de emergência imediatamente.",
-    }
-    
-    findings = []
-    text_lower = symptoms_text.lower()
-    for symptom, advice in symptoms_db.items():
-        if symptom in text_lower:
-            findings.append(f"- {symptom.capitalize()}: {advice}")
-    
+    """Analisa sintomas e retorna uma avaliação inicial de triagem, do achado mais grave ao mais leve."""
+    global _symptom_matcher
+    if _symptom_matcher is None:
+        _symptom_matcher = SymptomMatcher()
+
+    findings = [f"- {name}: {advice}" for name, _, advice in _symptom_matcher.match(symptoms_text)]
+
     if not findings:
         return "Sintomas não conclusivos para triagem automática. Por favor, fale com nosso enfermeiro."
-    
+
     return "Avaliação de Triagem:\n" + "\n".join(findings)
 
+
+# Funcionamento: (dias da semana, abertura, fechamento em minutos, descrição)
+CLINIC_HOURS = {
+    "Pediatria": ({0, 1, 2, 3, 4}, 8 * 60, 18 * 60, "Segunda a Sexta, 08:00 - 18:00"),
+    "Cardiologia": ({0, 1, 2, 3}, 9 * 60, 17 * 60, "Segunda a Quinta, 09:00 - 17:00"),
+    "Clínica Geral": ({0, 1, 2, 3, 4, 5, 6}, 0, 24 * 60, "24 Horas"),
+    "Ortopedia": ({0, 1, 2, 3, 4}, 8 * 60, 20 * 60, "Segunda a Sexta, 08:00 - 20:00"),
+}
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agendamentos.db")
+
+
+def _normalize(text: str) -> str:
+    return remover_acentos(text.strip().lower())
+
+
+def find_department(name: str):
+    """Nome oficial do departamento ("cardiologista", "clinica geral" -> ...)."""
+    key = _normalize(name)[:5]
+    for department in CLINIC_HOURS:
+        if key and _normalize(department).startswith(key):
+            return department
+    return None
+
+
+WEEKDAYS = {"segunda": 0, "terca": 1, "quarta": 2, "quinta": 3, "sexta": 4, "sabado": 5, "domingo": 6}
+RELATIVE_DAYS = {"hoje": 0, "amanha": 1, "depois de amanha": 2}
+PERIODS = {"manha": 8, "tarde": 13, "noite": 18}
+
+_DATE = re.compile(r"\b(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})/(\d{1,2})(?:/(\d{4}))?)\b")
+_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2})|h(\d{2})?)(?!\w)")
+_RELATIVE = re.compile(r"\b(depois de amanha|amanha|hoje)\b")
+_WEEKDAY = re.compile(r"\b(" + "|".join(WEEKDAYS) + r")\b")
+_PERIOD = re.compile(r"\b(" + "|".join(PERIODS) + r")\b")
+
+
+def _parse_when(text: str, today: date):
+    """Data e hora opcionais, em número ou por extenso.
+
+    Aceita DD/MM[/AAAA], AAAA-MM-DD, hoje, amanhã, depois de amanhã e dias
+    da semana ("segunda", "sexta-feira": a próxima ocorrência), com horário
+    HH:MM ou 10h/10h30, ou período (manhã 08:00, tarde 13:00, noite 18:00).
+
+    Returns:
+        datetime se houver horário ou período; date caso contrário
+    """
+    folded = _normalize(text)
+    day = None
+    if m := _DATE.search(folded):
+        if m[1]:
+            day = date(int(m[1]), int(m[2]), int(m[3]))
+        else:
+            day = date(int(m[6] or today.year), int(m[5]), int(m[4]))
+    elif m := _RELATIVE.search(folded):
+        day = today + timedelta(days=RELATIVE_DAYS[m[1]])
+    elif m := _WEEKDAY.search(folded):
+        day = today + timedelta(days=(WEEKDAYS[m[1]] - today.weekday()) % 7 or 7)
+
+    hour = minute = None
+    if m := _TIME.search(_DATE.sub(" ", folded)):
+        hour, minute = int(m[1]), int(m[2] or m[3] or 0)
+    elif m := _PERIOD.search(folded):
+        hour, minute = PERIODS[m[1]], 0
+
+    if day is None and hour is None:
+        raise ValueError(text)
+    if hour is None:
+        return day
+    return datetime.combine(day or today, datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+class AppointmentScheduler:
+    """Agenda de consultas com um bitmap de horários por especialidade e dia.
+
+    Cada dia é dividido em slots (30 min por padrão); um inteiro guarda os slots
+    abertos (horário de funcionamento) e outro os já ocupados, então o próximo
+    horário livre de um dia sai de uma operação de bits. O SQLite é a fonte da
+    verdade: a restrição UNIQUE (especialidade, data, slot) impede reservas
+    duplicadas mesmo entre processos, e o bitmap em memória é só um cache.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, slot_minutes: int = 30):
+        self.db_path = db_path
+        self.slot_minutes = slot_minutes
+        self._booked = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS agendamentos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                especialidade TEXT NOT NULL,
+                data TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                paciente TEXT NOT NULL,
+                criado_em TEXT NOT NULL,
+                UNIQUE (especialidade, data, slot)
+            );
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def open_mask(self, department: str, day: date) -> int:
+        weekdays, start, end, _ = CLINIC_HOURS[department]
+        if day.weekday() not in weekdays:
+            return 0
+        first = -(-start // self.slot_minutes)
+        last = end // self.slot_minutes
+        return ((1 << last) - 1) & ~((1 << first) - 1)
+
+    def _booked_mask(self, department: str, day: date) -> int:
+        """Slots ocupados (chamar com o lock); carrega do banco na primeira vez."""
+        key = (department, day)
+        if key not in self._booked:
+            mask = 0
+            for (slot,) in self._connection().execute(
+                "SELECT slot FROM agendamentos WHERE especialidade = ? AND data = ?",
+                (department, day.isoformat())
+            ):
+                mask |= 1 << slot
+            self._booked[key] = mask
+        return self._booked[key]
+
+    def _free_mask(self, department: str, day: date, not_before: datetime) -> int:
+        free = self.open_mask(department, day) & ~self._booked_mask(department, day)
+        if day == not_before.date():
+            minutes = not_before.hour * 60 + not_before.minute
+            free &= ~((1 << -(-minutes // self.slot_minutes)) - 1)
+        return free
+
+    def _slot_time(self, day: date, slot: int) -> datetime:
+        return datetime.combine(day, datetime.min.time()) + timedelta(minutes=slot * self.slot_minutes)
+
+    def next_available(self, department: str, after: datetime = None, max_days: int = 60):
+        """Primeiro horário livre a partir de after (padrão: agora)."""
+        after = after or datetime.now()
+        with self._lock:
+            for offset in range(max_days):
+                day = after.date() + timedelta(days=offset)
+                free = self._free_mask(department, day, after)
+                if free:
+                    return self._slot_time(day, (free & -free).bit_length() - 1)
+        return None
+
+    def book(self, department: str, patient_name: str, after: datetime = None, max_days: int = 60):
+        """
+        Reserva o primeiro horário livre a partir de after.
+
+        Returns:
+            (id do agendamento, horário) ou None se não houver vaga no período
+        """
+        after = after or datetime.now()
+        with self._lock:
+            for offset in range(max_days):
+                day = after.date() + timedelta(days=offset)
+                free = self._free_mask(department, day, after)
+                while free:
+                    slot = (free & -free).bit_length() - 1
+                    try:
+                        cursor = self._connection().execute(
+                            "INSERT INTO agendamentos (especialidade, data, slot, paciente, criado_em) VALUES (?, ?, ?, ?, ?)",
+                            (department, day.isoformat(), slot, patient_name, datetime.now().isoformat(timespec="seconds"))
+                        )
+                    except sqlite3.IntegrityError:
+                        # Reservado por outro processo: recarrega o dia do banco
+                        self._booked.pop((department, day), None)
+                        free = self._free_mask(department, day, after)
+                        continue
+                    self._booked[(department, day)] |= 1 << slot
+                    return cursor.lastrowid, self._slot_time(day, slot)
+        return None
+
+    def cancel(self, appointment_id: int) -> bool:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT especialidade, data, slot FROM agendamentos WHERE id = ?", (appointment_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            self._connection().execute("DELETE FROM agendamentos WHERE id = ?", (appointment_id,))
+            key = (row[0], date.fromisoformat(row[1]))
+            if key in self._booked:
+                self._booked[key] &= ~(1 << row[2])
+            return True
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> AppointmentScheduler:
+    """Agenda compartilhada, criada no primeiro uso."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = AppointmentScheduler()
+    return _scheduler
+
+
 def schedule_appointment(specialty: str, patient_name: str, date_str: str):
     """Agenda uma consulta para uma especialidade específica."""
-    # Simulação de agendamento
-    appointment_id = random.randint(1000, 9999)
-    return f"Consulta de {specialty} agendada para {patient_name} em {date_str}. Protocolo: HOS-{appointment_id}."
+    department = find_department(specialty)
+    if department is None:
+        return f"Especialidade {specialty} não encontrada. Opções: {', '.join(CLINIC_HOURS)}."
+
+    now = datetime.now()
+    unparsed = ""
+    try:
+        when = _parse_when(date_str, now.date()) if date_str.strip() else now
+    except ValueError:
+        when = now
+        unparsed = f' Não entendi a data "{date_str}"; reservei o próximo horário livre (informe DD/MM e horário para outra data).'
+    if not isinstance(when, datetime):
+        when = datetime.combine(when, datetime.min.time())
+    when = max(when, now)
+
+    booking = get_scheduler().book(department, patient_name, after=when)
+    if booking is None:
+        return f"Não há horários livres em {department} nos próximos dias."
+    appointment_id, slot = booking
+    note = "" if unparsed or slot.date() == when.date() else " (primeiro dia com horário livre)"
+    return f"Consulta de {department} agendada para {patient_name} em {slot:%d/%m/%Y às %H:%M}{note}. Protocolo: HOS-{1000 + appointment_id}.{unparsed}"
 
 def get_clinic_hours(department: str):
     """Retorna o horário de funcionamento de um departamento."""
-    hours = {
-        "Pediatria": "Segunda a Sexta, 08:00 - 18:00",
-        "Cardiologia": "Segunda a Quinta, 09:00 - 17:00",
-        "Clínica Geral": "24 Horas",
-        "Ortopedia": "Segunda a Sexta, 08:00 - 20:00"
-    }
-    return hours.get(department, "Departamento não encontrado ou fechado para manutenção.")
+    found = find_department(department)
+    if found is None:
+        return "Departamento não encontrado ou fechado para manutenção."
+    hours = CLINIC_HOURS[found][3]
+    next_slot = get_scheduler().next_available(found)
+    if next_slot is None:
+        return hours
+    return f"{hours}. Próximo horário livre: {next_slot:%d/%m/%Y às %H:%M}."
 
 # Dicionário de ferramentas
 TOOLS = {
@@ -43,3 +272,54 @@ TOOLS = {
     "schedule_appointment": schedule_appointment,
     "get_clinic_hours": get_clinic_hours
 }
+
+
+def _verificar():
+    """Casos de regressão das datas aceitas no agendamento."""
+    monday = date(2026, 10, 19)
+    assert _parse_when("amanhã", monday) == date(2026, 10, 20)
+    assert _parse_when("segunda de manhã", monday) == datetime(2026, 10, 26, 8, 0)
+    assert _parse_when("sexta-feira às 14h", monday) == datetime(2026, 10, 23, 14, 0)
+    assert _parse_when("depois de amanhã à tarde", monday) == datetime(2026, 10, 21, 13, 0)
+    assert _parse_when("20/10 às 9h30", monday) == datetime(2026, 10, 20, 9, 30)
+    assert _parse_when("2026-11-03 10:00", monday) == datetime(2026, 11, 3, 10, 0)
+    for text in ("31/02", "quando der"):
+        try:
+            _parse_when(text, monday)
+            raise AssertionError(text)
+        except ValueError:
+            pass
+    print("✅ Datas do agendamento OK")
+
+
+if __name__ == "__main__":
+    _verificar()
+
+    # Reservas concorrentes em um banco temporário (python -m hospital_system.tools)
+    with tempfile.TemporaryDirectory() as folder:
+        scheduler = AppointmentScheduler(os.path.join(folder, "teste.db"))
+        start_at = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        n = 2000
+
+        def book(i):
+            t = time.perf_counter()
+            result = scheduler.book(list(CLINIC_HOURS)[i % len(CLINIC_HOURS)], f"Paciente {i}", after=start_at)
+            return result, (time.perf_counter() - t) * 1000
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(book, range(n)))
+        elapsed = time.perf_counter() - t0
+
+        rows = scheduler._connection().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT especialidade || data || slot) FROM agendamentos"
+        ).fetchone()
+        latencies = sorted(ms for _, ms in results)
+        print(f"{n} reservas com 16 threads em {elapsed:.2f}s ({n / elapsed:,.0f}/s)")
+        print(f"Latência p50 {latencies[n // 2]:.2f} ms, p99 {latencies[int(n * 0.99)]:.2f} ms")
+        print(f"Reservas gravadas: {rows[0]}, horários distintos: {rows[1]} (sem conflitos: {rows[0] == rows[1]})")
+
+        t0 = time.perf_counter()
+        for _ in range(10_000):
+            scheduler.next_available("Cardiologia", after=start_at)
+        print(f"next_available: {(time.perf_counter() - t0) * 100:.1f} µs/consulta")
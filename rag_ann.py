@@ -0,0 +1,293 @@
+"""
+Fábrica de índices FAISS aproximados (ANN) para corpora grandes.
+
+O FAISS.from_documents padrão usa um índice Flat: toda consulta é uma
+varredura completa e a memória é 4 bytes x dim x N. Aqui o tipo de índice é
+configurável:
+
+- "flat":   busca exata; ideal para corpora pequenos
+- "hnsw":   grafo HNSW; baixa latência, memória um pouco maior que o Flat
+- "sq8":    Flat com quantização escalar de 8 bits (1/4 da memória)
+- "ivfsq8": listas invertidas (IVF) + quantização de 8 bits
+- "ivfpq":  IVF + product quantization; menor memória para milhões de chunks
+- "auto":   escolhe pelo tamanho do corpus
+
+Índices IVF/PQ/SQ precisam de treino, feito sobre uma amostra dos vetores.
+
+Uso (recall x latência em vetores sintéticos):
+    python rag_ann.py --n 200000 --dim 768
+"""
+import argparse
+import math
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+
+TIPOS_INDICE = ("flat", "hnsw", "sq8", "ivfsq8", "ivfpq")
+
+# O k-means do FAISS pede ao menos 39 pontos de treino por centroide
+_PONTOS_POR_CENTROIDE = 39
+
+# Menos bits por código de PQ que isso (16 centroides) perde recall demais
+_NBITS_MINIMO = 4
+
+# Vetores de treino para códigos de PQ de 8 bits (256 centroides x 39)
+N_MINIMO_PQ_8BITS = 256 * _PONTOS_POR_CENTROIDE
+
+
+def escolher_tipo(n_vetores: int) -> str:
+    """Tipo recomendado para o tamanho do corpus (usado por tipo="auto")."""
+    if n_vetores < 50_000:
+        return "flat"
+    if n_vetores < 1_000_000:
+        return "hnsw"
+    return "ivfpq"
+
+
+def _subquantizadores(dim: int) -> int:
+    """Maior divisor de dim que resulta em sub-vetores de ao menos 8 dimensões."""
+    for m in (96, 64, 48, 32, 24, 16, 8, 4, 2, 1):
+        if dim % m == 0 and dim // m >= 8:
+            return m
+    return 1
+
+
+def fabricar_indice(
+    tipo: str,
+    dim: int,
+    n_vetores: int,
+    nlist: Optional[int] = None,
+    m_pq: Optional[int] = None,
+    hnsw_m: int = 32
+) -> faiss.Index:
+    """
+    Cria um índice FAISS vazio (métrica L2, como o FAISS do LangChain).
+
+    Args:
+        tipo: Um de TIPOS_INDICE ou "auto"
+        dim: Dimensão dos vetores
+        n_vetores: Quantidade esperada de vetores (define nlist e o "auto")
+        nlist: Número de listas invertidas dos índices IVF (padrão: ~4*sqrt(N))
+        m_pq: Número de sub-quantizadores do PQ (padrão: calculado por dim)
+        hnsw_m: Vizinhos por nó do grafo HNSW
+
+    Returns:
+        Índice FAISS (pode precisar de treino: ver treinar_indice); IVF/PQ
+        viram SQ8 quando o corpus é pequeno demais para treiná-los
+    """
+    if tipo == "auto":
+        tipo = escolher_tipo(n_vetores)
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo}. Use um de {TIPOS_INDICE} ou 'auto'")
+
+    if tipo == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if tipo == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = 200
+        index.hnsw.efSearch = 64
+        return index
+
+    # Corpus pequeno demais para treinar o IVF (ou os 2^nbits centroides do
+    # PQ): usa SQ8, que só precisa do mínimo/máximo de cada dimensão
+    nbits = 8
+    if tipo == "ivfpq":
+        nbits = min(8, int(math.log2(n_vetores / _PONTOS_POR_CENTROIDE))) if n_vetores >= _PONTOS_POR_CENTROIDE else 0
+    if tipo in ("ivfsq8", "ivfpq") and (n_vetores < _PONTOS_POR_CENTROIDE or nbits < _NBITS_MINIMO):
+        print(f"⚠️  {n_vetores} vetores são poucos para treinar '{tipo}'; usando 'sq8'")
+        tipo = "sq8"
+
+    if tipo == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+
+    if nlist is None:
+        nlist = int(4 * math.sqrt(max(n_vetores, 1)))
+        nlist = max(1, min(nlist, n_vetores // _PONTOS_POR_CENTROIDE))
+
+    quantizador = faiss.IndexFlatL2(dim)
+    if tipo == "ivfsq8":
+        index = faiss.IndexIVFScalarQuantizer(quantizador, dim, nlist, faiss.ScalarQuantizer.QT_8bit)
+    else:
+        # 8 bits por código pedem 256 x 39 vetores de treino; abaixo disso, menos bits
+        index = faiss.IndexIVFPQ(quantizador, dim, nlist, m_pq or _subquantizadores(dim), nbits)
+    index.nprobe = min(16, nlist)
+    return index
+
+
+def treinar_indice(
+    index: faiss.Index,
+    vetores: np.ndarray,
+    tamanho_amostra: int = 100_000,
+    semente: int = 42
+):
+    """
+    Treina o índice (se necessário) em uma amostra aleatória dos vetores.
+
+    Args:
+        index: Índice criado por fabricar_indice
+        vetores: Matriz float32 (N x dim)
+        tamanho_amostra: Máximo de vetores usados no treino
+        semente: Semente da amostragem
+    """
+    if index.is_trained:
+        return
+    rng = np.random.default_rng(semente)
+    if len(vetores) > tamanho_amostra:
+        amostra = vetores[rng.choice(len(vetores), tamanho_amostra, replace=False)]
+    else:
+        amostra = vetores
+    index.train(np.ascontiguousarray(amostra, dtype=np.float32))
+
+
+def descrever_indice(index: faiss.Index) -> str:
+    """Descrição no formato da index_factory do FAISS (ex: "IVF400,PQ96x8")."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return f"HNSW{index.hnsw.nb_neighbors(1)},Flat"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return f"IVF{index.nlist},PQ{index.pq.M}x{index.pq.nbits}"
+    if isinstance(index, faiss.IndexIVFScalarQuantizer):
+        return f"IVF{index.nlist},SQ8"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "SQ8"
+    if isinstance(index, faiss.IndexFlat):
+        return "Flat"
+    return type(index).__name__
+
+
+def ajustar_busca(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Ajusta o compromisso recall x latência de um índice já construído."""
+    ivf = faiss.try_extract_index_ivf(index) if not isinstance(index, faiss.IndexHNSW) else None
+    if nprobe is not None and ivf is not None:
+        ivf.nprobe = nprobe
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def construir_vectorstore(
+    documentos: List[Document],
+    embeddings: Embeddings,
+    tipo: str = "auto",
+    **opcoes
+) -> FAISS:
+    """
+    Equivalente a FAISS.from_documents, mas com o tipo de índice configurável.
+
+    Args:
+        documentos: Chunks a indexar
+        embeddings: Modelo de embeddings
+        tipo: Um de TIPOS_INDICE ou "auto"
+        **opcoes: Repassadas a fabricar_indice (nlist, m_pq, hnsw_m)
+
+    Returns:
+        Vector store FAISS do LangChain sobre o índice escolhido
+    """
+    vetores = np.asarray(
+        embeddings.embed_documents([doc.page_content for doc in documentos]),
+        dtype=np.float32
+    )
+    index = fabricar_indice(tipo, vetores.shape[1], len(vetores), **opcoes)
+    treinar_indice(index, vetores)
+    index.add(vetores)
+
+    ids = [doc.id or str(uuid.uuid4()) for doc in documentos]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=doc.page_content, metadata=doc.metadata, id=doc_id)
+        for doc_id, doc in zip(ids, documentos)
+    })
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+
+def _dados_sinteticos(n: int, dim: int, consultas: int, semente: int = 0):
+    """Vetores agrupados em clusters, parecidos com embeddings reais."""
+    rng = np.random.default_rng(semente)
+    centros = rng.standard_normal((max(1, n // 500), dim)).astype(np.float32)
+    base = centros[rng.integers(0, len(centros), n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    q = centros[rng.integers(0, len(centros), consultas)] + 0.3 * rng.standard_normal((consultas, dim)).astype(np.float32)
+    return base, q
+
+
+def benchmark(n: int, dim: int, consultas: int = 500, k: int = 10) -> List[Dict]:
+    """
+    Mede recall@k, latência por consulta e memória de cada tipo de índice.
+
+    O gabarito é a busca exata (Flat). Para IVF e HNSW são testados vários
+    valores de nprobe/efSearch, mostrando o compromisso recall x latência.
+    Cada linha traz o índice realmente construído ("indice"), que difere do
+    tipo pedido quando o corpus é pequeno (IVF/PQ viram SQ8, PQ usa menos
+    bits abaixo de N_MINIMO_PQ_8BITS vetores).
+    """
+    base, q = _dados_sinteticos(n, dim, consultas)
+
+    exato = faiss.IndexFlatL2(dim)
+    exato.add(base)
+    _, gabarito = exato.search(q, k)
+
+    resultados = []
+    for tipo in TIPOS_INDICE:
+        inicio = time.perf_counter()
+        index = fabricar_indice(tipo, dim, n)
+        treinar_indice(index, base)
+        index.add(base)
+        construcao = time.perf_counter() - inicio
+        memoria = faiss.serialize_index(index).nbytes
+
+        if isinstance(index, faiss.IndexHNSW):
+            ajustes = [{"ef_search": ef} for ef in (16, 64, 256)]
+        elif faiss.try_extract_index_ivf(index) is not None:
+            ajustes = [{"nprobe": p} for p in (1, 8, 32, 128)]
+        else:
+            ajustes = [{}]
+
+        for ajuste in ajustes:
+            ajustar_busca(index, **ajuste)
+            inicio = time.perf_counter()
+            _, encontrados = index.search(q, k)
+            latencia_ms = (time.perf_counter() - inicio) * 1000 / consultas
+            recall = np.mean([
+                len(set(encontrados[i]) & set(gabarito[i])) / k for i in range(consultas)
+            ])
+            resultados.append({
+                "tipo": tipo,
+                "indice": descrever_indice(index),
+                "ajuste": ", ".join(f"{c}={v}" for c, v in ajuste.items()) or "-",
+                "recall": float(recall),
+                "latencia_ms": latencia_ms,
+                "memoria_mb": memoria / 1e6,
+                "construcao_s": construcao,
+            })
+    return resultados
+
+
+def main():
+    """Imprime a tabela recall x latência x memória."""
+    parser = argparse.ArgumentParser(description="Benchmark de índices FAISS (recall x latência)")
+    parser.add_argument("--n", type=int, default=100_000, help="Número de vetores (padrão: 100000)")
+    parser.add_argument("--dim", type=int, default=768, help="Dimensão (padrão: 768)")
+    parser.add_argument("--consultas", type=int, default=500, help="Consultas medidas (padrão: 500)")
+    parser.add_argument("-k", type=int, default=10, help="k do recall@k (padrão: 10)")
+    args = parser.parse_args()
+    if args.n < N_MINIMO_PQ_8BITS:
+        print(f"⚠️  --n {args.n} é pequeno para o IVFPQ com códigos de 8 bits; usando {N_MINIMO_PQ_8BITS}")
+        args.n = N_MINIMO_PQ_8BITS
+
+    print(f"📏 {args.n} vetores x {args.dim} dims, {args.consultas} consultas, recall@{args.k}\n")
+    print(f"{'tipo':<8} {'índice':<16} {'ajuste':<14} {'recall':>7} {'ms/consulta':>12} {'memória MB':>11} {'construção s':>13}")
+    for r in benchmark(args.n, args.dim, args.consultas, args.k):
+        print(
+            f"{r['tipo']:<8} {r['indice']:<16} {r['ajuste']:<14} {r['recall']:>7.3f} {r['latencia_ms']:>12.3f} "
+            f"{r['memoria_mb']:>11.1f} {r['construcao_s']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
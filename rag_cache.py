@@ -0,0 +1,180 @@
+"""
+Cache semântico de respostas para as chains de RAG.
+
+Muitos usuários fazem a mesma pergunta com palavras diferentes. O
+CacheSemantico embeda a pergunta autônoma, procura a pergunta já respondida
+mais próxima em um pequeno índice FAISS (produto interno sobre vetores
+normalizados = cosseno) e, se a similaridade passar do limiar, devolve a
+resposta guardada com suas fontes, sem recuperação nem chamada ao LLM.
+
+Entradas expiram por TTL e o cache inteiro é descartado quando a versão do
+índice de documentos muda (ex: o PDF foi reindexado): carregar_ou_criar_indice e
+atualizar_indice_incremental recebem o cache em caches= e chamam
+definir_versao com o hash do corpus.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.runnables.utils import AddableDict
+
+
+class CacheSemantico:
+    """Cache de respostas indexado pela semântica da pergunta."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        limiar: float = 0.92,
+        ttl_segundos: float = 3600,
+        max_itens: int = 1000,
+        versao_indice: Optional[str] = None
+    ):
+        """
+        Args:
+            embeddings: Modelo usado para embedar as perguntas
+            limiar: Similaridade de cosseno mínima para considerar um acerto
+            ttl_segundos: Tempo de vida de cada resposta
+            max_itens: Máximo de respostas guardadas (as mais antigas saem)
+            versao_indice: Versão do índice de documentos; atualizada por
+                rag_index (parâmetro caches=) a cada carga do índice
+        """
+        self.embeddings = embeddings
+        self.limiar = limiar
+        self.ttl_segundos = ttl_segundos
+        self.max_itens = max_itens
+        self.versao_indice = versao_indice
+        self.acertos = 0
+        self.consultas = 0
+
+        self._lock = threading.Lock()
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._entradas: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._proximo_id = 0
+
+    def _vetor(self, pergunta: str) -> np.ndarray:
+        vetor = np.asarray([self.embeddings.embed_query(pergunta)], dtype=np.float32)
+        faiss.normalize_L2(vetor)
+        return vetor
+
+    def _remover(self, ids: List[int]):
+        """Remove entradas do índice e do dicionário (chamar com o lock)."""
+        if not ids:
+            return
+        self._index.remove_ids(np.asarray(ids, dtype=np.int64))
+        for id_ in ids:
+            self._entradas.pop(id_, None)
+
+    def _remover_expirados(self):
+        limite = time.time() - self.ttl_segundos
+        # Entradas em ordem de inserção: as expiradas estão no início
+        expirados = []
+        for id_, entrada in self._entradas.items():
+            if entrada["criado_em"] >= limite:
+                break
+            expirados.append(id_)
+        self._remover(expirados)
+
+    def invalidar(self):
+        """Descarta todas as respostas."""
+        with self._lock:
+            self._index = None
+            self._entradas.clear()
+
+    def definir_versao(self, versao: str):
+        """Informa a versão atual do índice; se mudou, o cache é esvaziado."""
+        if versao != self.versao_indice:
+            self.invalidar()
+            self.versao_indice = versao
+
+    def buscar(self, pergunta: str) -> Optional[Dict[str, Any]]:
+        """
+        Procura uma resposta para uma pergunta equivalente.
+
+        Returns:
+            {"pergunta", "resposta", "fontes", "similaridade"} ou None
+        """
+        vetor = self._vetor(pergunta)
+        with self._lock:
+            self.consultas += 1
+            self._remover_expirados()
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            similaridades, ids = self._index.search(vetor, 1)
+            id_, similaridade = int(ids[0][0]), float(similaridades[0][0])
+            if id_ < 0 or similaridade < self.limiar:
+                return None
+            self.acertos += 1
+            entrada = self._entradas[id_]
+            return {**entrada, "similaridade": similaridade}
+
+    def guardar(self, pergunta: str, resposta: str, fontes: Optional[List[Document]] = None):
+        """Guarda a resposta de uma pergunta autônoma."""
+        vetor = self._vetor(pergunta)
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vetor.shape[1]))
+            id_ = self._proximo_id
+            self._proximo_id += 1
+            self._index.add_with_ids(vetor, np.asarray([id_], dtype=np.int64))
+            self._entradas[id_] = {
+                "pergunta": pergunta,
+                "resposta": resposta,
+                "fontes": list(fontes or []),
+                "criado_em": time.time(),
+            }
+            excesso = len(self._entradas) - self.max_itens
+            if excesso > 0:
+                self._remover(list(self._entradas)[:excesso])
+
+    def envolver(self, chain: Runnable, reformular: Optional[Runnable] = None) -> Runnable:
+        """
+        Coloca o cache na frente de uma chain de create_retrieval_chain.
+
+        A entrada é {"input", "chat_history"}; a saída mantém o formato da
+        chain ({"input", "chat_history", "context", "answer"}), então o
+        resultado funciona com RunnableWithMessageHistory. Em .stream() os
+        trechos da resposta são repassados assim que a chain os produz.
+
+        Args:
+            chain: Chain de RAG (ex: rag_chain)
+            reformular: Runnable que transforma {"input", "chat_history"} na
+                pergunta autônoma (str); só é chamado quando há histórico
+        """
+        def executar(entrada: Dict[str, Any], config=None) -> Iterator[AddableDict]:
+            historico: List[BaseMessage] = entrada.get("chat_history") or []
+            pergunta = entrada["input"]
+            if historico and reformular is not None:
+                pergunta = reformular.invoke(entrada, config=config)
+
+            encontrado = self.buscar(pergunta)
+            if encontrado:
+                yield AddableDict({**entrada, "context": encontrado["fontes"], "answer": encontrado["resposta"]})
+                return
+
+            # Repassa os trechos da chain à medida que chegam (streaming da
+            # resposta) e guarda a resposta completa no final
+            saida = AddableDict()
+            for trecho in chain.stream(entrada, config=config):
+                saida = saida + trecho
+                yield trecho
+            self.guardar(pergunta, saida.get("answer", ""), saida.get("context"))
+
+        return RunnableLambda(executar)
+
+    def estatisticas(self) -> dict:
+        """Consultas, acertos e tamanho atual do cache."""
+        taxa = self.acertos / self.consultas if self.consultas else 0.0
+        return {
+            "consultas": self.consultas,
+            "acertos": self.acertos,
+            "taxa_acerto": taxa,
+            "itens": len(self._entradas),
+        }
@@ -0,0 +1,343 @@
+"""
+Cache de embeddings endereçado por conteúdo.
+
+EmbeddingsComCache envolve qualquer modelo de embeddings do LangChain (ex:
+GoogleGenerativeAIEmbeddings) e guarda cada vetor em um banco SQLite local,
+com chave = hash(modelo + tipo + texto). Em cada chamada os textos são
+consultados em lote e apenas os ausentes são enviados à API, de modo que
+reindexar um corpus quase inalterado praticamente não gera chamadas.
+
+EmbeddingsLocais roda inteiramente na CPU, sem rede: usa um
+sentence-transformer quando o pacote está instalado ou, como alternativa sem
+dependências, feature hashing de palavras e n-gramas de caracteres. Serve ao
+ambiente de auditoria isolado da internet e à execução determinística das
+lições em CI. criar_embeddings escolhe o provedor pela variável de ambiente
+RAG_EMBEDDINGS ("google", "local", "sentence-transformers" ou "hashing").
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from tokenizacao import remover_acentos
+
+
+CAMINHO_PADRAO = ".embeddings_cache.db"
+
+# Limite de parâmetros por consulta no SQLite
+_LOTE_SQL = 500
+
+
+class EmbeddingsComCache(Embeddings):
+    """Embeddings com cache persistente em SQLite."""
+
+    def __init__(
+        self,
+        base: Embeddings,
+        caminho: str = CAMINHO_PADRAO,
+        dtype: str = "float32",
+        modelo: Optional[str] = None,
+        tamanho_lote: int = 100
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            base: Modelo de embeddings real, chamado apenas nos misses
+            caminho: Arquivo SQLite do cache
+            dtype: "float32" (exato) ou "float16" (metade do espaço)
+            modelo: Identificador do modelo na chave; por padrão usa base.model
+            tamanho_lote: Máximo de textos enviados à API por chamada
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype deve ser 'float32' ou 'float16'")
+        self.base = base
+        self.caminho = caminho
+        self.dtype = np.dtype(dtype)
+        self.model = modelo or getattr(base, "model", None) or type(base).__name__
+        self.tamanho_lote = tamanho_lote
+        self.consultas = 0
+        self.acertos = 0
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def get_connection(self):
+        """Cria e retorna uma conexão com o banco do cache."""
+        return sqlite3.connect(self.caminho, timeout=30)
+
+    def init_database(self):
+        """Cria a tabela do cache se não existir."""
+        conn = self.get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                chave TEXT PRIMARY KEY,
+                dtype TEXT NOT NULL,
+                vetor BLOB NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _chave(self, texto: str, tipo: str) -> str:
+        """Chave endereçada por conteúdo: modelo + tipo (doc/query) + texto."""
+        dados = f"{self.model}\x00{tipo}\x00{texto}".encode("utf-8")
+        return hashlib.sha256(dados).hexdigest()
+
+    def _buscar(self, chaves: List[str]) -> Dict[str, List[float]]:
+        """Busca em lote os vetores já armazenados."""
+        encontrados = {}
+        conn = self.get_connection()
+        try:
+            for i in range(0, len(chaves), _LOTE_SQL):
+                lote = chaves[i:i + _LOTE_SQL]
+                marcadores = ",".join("?" * len(lote))
+                linhas = conn.execute(
+                    f"SELECT chave, dtype, vetor FROM embeddings WHERE chave IN ({marcadores})",
+                    lote
+                )
+                for chave, dtype, blob in linhas:
+                    encontrados[chave] = np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+        finally:
+            conn.close()
+        return encontrados
+
+    def _gravar(self, itens: Dict[str, List[float]]):
+        """Grava novos vetores no cache."""
+        conn = self.get_connection()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (chave, dtype, vetor) VALUES (?, ?, ?)",
+                [
+                    (chave, self.dtype.name, np.asarray(vetor, dtype=self.dtype).tobytes())
+                    for chave, vetor in itens.items()
+                ]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeda documentos, enviando à API apenas os textos fora do cache."""
+        chaves = [self._chave(t, "doc") for t in texts]
+        encontrados = self._buscar(list(set(chaves)))
+
+        # Textos repetidos no mesmo lote são embedados uma única vez
+        faltantes = {}
+        for chave, texto in zip(chaves, texts):
+            if chave not in encontrados:
+                faltantes.setdefault(chave, texto)
+
+        novos = {}
+        itens = list(faltantes.items())
+        for i in range(0, len(itens), self.tamanho_lote):
+            lote = itens[i:i + self.tamanho_lote]
+            vetores = self.base.embed_documents([texto for _, texto in lote])
+            novos.update({chave: vetor for (chave, _), vetor in zip(lote, vetores)})
+
+        if novos:
+            self._gravar(novos)
+            encontrados.update(novos)
+
+        with self._lock:
+            self.consultas += len(texts)
+            self.acertos += len(texts) - len(faltantes)
+
+        return [encontrados[chave] for chave in chaves]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embeda uma consulta, reaproveitando o cache."""
+        chave = self._chave(text, "query")
+        encontrado = self._buscar([chave])
+        with self._lock:
+            self.consultas += 1
+            self.acertos += len(encontrado)
+        if encontrado:
+            return encontrado[chave]
+
+        vetor = self.base.embed_query(text)
+        self._gravar({chave: vetor})
+        return vetor
+
+    def estatisticas(self) -> dict:
+        """Consultas, acertos e taxa de acerto desde a criação do objeto."""
+        taxa = self.acertos / self.consultas if self.consultas else 0.0
+        return {"consultas": self.consultas, "acertos": self.acertos, "taxa_acerto": taxa}
+
+
+def criar_embeddings_google(
+    modelo: str = "models/embedding-001",
+    caminho_cache: str = CAMINHO_PADRAO,
+    dtype: str = "float32"
+) -> EmbeddingsComCache:
+    """Atalho: GoogleGenerativeAIEmbeddings com cache local."""
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return EmbeddingsComCache(
+        GoogleGenerativeAIEmbeddings(model=modelo),
+        caminho=caminho_cache,
+        dtype=dtype
+    )
+
+
+_PALAVRA = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=200_000)
+def _hash_termo(termo: str, dim: int):
+    """Posição e sinal de um termo no vetor (hash estável entre processos)."""
+    h = int.from_bytes(hashlib.blake2b(termo.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % dim, 1.0 if (h >> 63) else -1.0
+
+
+class EmbeddingsLocais(Embeddings):
+    """Embeddings calculados localmente na CPU, em lotes de textos de tamanho parecido."""
+
+    MODELO_PADRAO = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        modelo: Optional[str] = None,
+        dim: int = 768,
+        tamanho_lote: int = 64,
+        max_threads: Optional[int] = None,
+        dtype: str = "float32"
+    ):
+        """
+        Inicializa o provedor local.
+
+        Args:
+            backend: "sentence-transformers", "hashing" ou "auto" (usa
+                sentence-transformers se estiver instalado, senão hashing)
+            modelo: Modelo do sentence-transformers (padrão: multilíngue MiniLM)
+            dim: Dimensão dos vetores do backend de hashing
+            tamanho_lote: Textos por lote enviado ao sentence-transformer
+            max_threads: Threads que processam lotes do sentence-transformer
+                em paralelo (o PyTorch libera o GIL; o hashing, em Python
+                puro, não, e roda em uma thread só)
+            dtype: "float32" ou "float16" (vetores arredondados para meia precisão)
+        """
+        if backend == "auto":
+            try:
+                import sentence_transformers  # noqa: F401
+                backend = "sentence-transformers"
+            except ImportError:
+                backend = "hashing"
+        if backend not in ("sentence-transformers", "hashing"):
+            raise ValueError("backend deve ser 'sentence-transformers', 'hashing' ou 'auto'")
+
+        self.backend = backend
+        self.tamanho_lote = tamanho_lote
+        self.max_threads = max_threads or min(8, os.cpu_count() or 1)
+        self.dtype = np.dtype(dtype)
+
+        if backend == "sentence-transformers":
+            from sentence_transformers import SentenceTransformer
+
+            nome = modelo or self.MODELO_PADRAO
+            self._modelo = SentenceTransformer(nome, device="cpu")
+            self.model = nome
+        else:
+            self._modelo = None
+            self.dim = dim
+            self.model = f"hashing-{dim}"
+
+    def _embedar_hashing(self, textos: List[str]) -> np.ndarray:
+        """Feature hashing de palavras e trigramas de caracteres, normalizado (L2)."""
+        matriz = np.zeros((len(textos), self.dim), dtype=np.float32)
+        for linha, texto in enumerate(textos):
+            for palavra in _PALAVRA.findall(remover_acentos(texto.lower())):
+                termos = [palavra]
+                marcada = f"<{palavra}>"
+                termos.extend(marcada[i:i + 3] for i in range(len(marcada) - 2))
+                for termo in termos:
+                    posicao, sinal = _hash_termo(termo, self.dim)
+                    matriz[linha, posicao] += sinal
+        # Frequência sublinear e normalização L2 (similaridade de cosseno)
+        matriz = np.sign(matriz) * np.log1p(np.abs(matriz))
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        return matriz / np.where(normas == 0, 1, normas)
+
+    def _embedar_lote(self, textos: List[str]) -> np.ndarray:
+        if self._modelo is not None:
+            return self._modelo.encode(
+                textos,
+                batch_size=len(textos),
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+        return self._embedar_hashing(textos)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeda documentos; no sentence-transformer, em lotes paralelos.
+
+        Os textos são ordenados por tamanho antes de formar lotes de
+        tamanho_lote (menos padding no transformer) e o resultado volta na
+        ordem original. O hashing não tem padding nem libera o GIL: embeda
+        tudo de uma vez, na thread atual.
+        """
+        if not texts:
+            return []
+        if self._modelo is None:
+            return self._embedar_hashing(texts).astype(self.dtype).astype(np.float32).tolist()
+        ordem = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        lotes = [ordem[i:i + self.tamanho_lote] for i in range(0, len(ordem), self.tamanho_lote)]
+
+        def processar(indices: List[int]) -> np.ndarray:
+            return self._embedar_lote([texts[i] for i in indices])
+
+        if len(lotes) == 1:
+            resultados = [processar(lotes[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_threads) as pool:
+                resultados = list(pool.map(processar, lotes))
+
+        saida = np.empty((len(texts), resultados[0].shape[1]), dtype=self.dtype)
+        for indices, vetores in zip(lotes, resultados):
+            saida[indices] = vetores
+        return saida.astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embeda uma consulta."""
+        return self.embed_documents([text])[0]
+
+
+def criar_embeddings(
+    provedor: Optional[str] = None,
+    cache: bool = True,
+    caminho_cache: str = CAMINHO_PADRAO
+) -> Embeddings:
+    """
+    Cria o modelo de embeddings das lições de RAG.
+
+    Args:
+        provedor: "google", "local", "sentence-transformers" ou "hashing";
+            por padrão lê RAG_EMBEDDINGS (e usa "google" se não definida)
+        cache: Envolve o modelo com EmbeddingsComCache
+        caminho_cache: Arquivo SQLite do cache
+
+    Returns:
+        Modelo de embeddings do LangChain
+    """
+    provedor = (provedor or os.getenv("RAG_EMBEDDINGS", "google")).lower()
+    if provedor == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        base = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    elif provedor == "local":
+        base = EmbeddingsLocais(backend="auto")
+    elif provedor in ("sentence-transformers", "hashing"):
+        base = EmbeddingsLocais(backend=provedor)
+    else:
+        raise ValueError(f"Provedor de embeddings desconhecido: {provedor}")
+
+    return EmbeddingsComCache(base, caminho=caminho_cache) if cache else base
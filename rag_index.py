@@ -0,0 +1,304 @@
+"""
+Índice vetorial FAISS persistente e reutilizável para as lições de RAG.
+
+Em vez de reembedar o corpus inteiro a cada execução com
+FAISS.from_documents(...), o índice e o docstore são salvos em disco em uma
+pasta identificada pelo hash do corpus. Nas execuções seguintes o índice é
+apenas aberto (memory-mapped quando o FAISS permite) e só é reconstruído
+quando os documentos de origem mudam.
+
+Caches de respostas (rag_cache.CacheSemantico) passados em caches= recebem a
+versão do índice a cada carga e se esvaziam quando ela muda.
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+import faiss
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from rag_ann import construir_vectorstore
+
+
+DIRETORIO_PADRAO = ".faiss_cache"
+
+# Nomes usados por FAISS.save_local
+_ARQUIVO_INDICE = "index.faiss"
+_ARQUIVO_DOCSTORE = "index.pkl"
+_ARQUIVO_MANIFESTO = "manifesto.json"
+
+
+def _avisar_caches(caches: Iterable, versao: str):
+    """Informa a versão do índice aos caches de respostas (ver CacheSemantico.definir_versao)."""
+    for cache in caches:
+        cache.definir_versao(versao)
+
+
+def identificar_embeddings(embeddings: Embeddings) -> str:
+    """Identificador do modelo de embeddings, parte da chave do índice."""
+    modelo = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    return f"{type(embeddings).__name__}:{modelo}"
+
+
+def hash_corpus(documentos: List[Document], embeddings_id: str = "") -> str:
+    """
+    Calcula o hash SHA-256 do corpus (conteúdo + metadados de cada chunk).
+
+    Args:
+        documentos: Chunks que serão indexados
+        embeddings_id: Identificador do modelo de embeddings
+
+    Returns:
+        Hash hexadecimal; muda sempre que algum chunk ou o modelo muda
+    """
+    h = hashlib.sha256(embeddings_id.encode("utf-8"))
+    for doc in documentos:
+        h.update(doc.page_content.encode("utf-8"))
+        h.update(json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def salvar_indice(vectorstore: FAISS, pasta: str, manifesto: Optional[dict] = None):
+    """
+    Salva índice e docstore de forma atômica: grava em uma pasta temporária
+    e a renomeia para o destino final.
+
+    Args:
+        vectorstore: Índice a salvar
+        pasta: Pasta de destino
+        manifesto: Metadados gravados junto, em manifesto.json (opcional)
+    """
+    temporaria = f"{pasta}.tmp"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    vectorstore.save_local(temporaria)
+    if manifesto is not None:
+        with open(os.path.join(temporaria, _ARQUIVO_MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+
+
+def abrir_indice(pasta: str, embeddings: Embeddings, mmap: bool = True) -> FAISS:
+    """
+    Abre um índice salvo por salvar_indice.
+
+    Args:
+        pasta: Pasta com index.faiss e index.pkl
+        embeddings: Modelo usado para embedar as consultas
+        mmap: Mapeia o índice em memória (somente leitura) em vez de lê-lo
+            inteiro; se o tipo de índice não suportar, faz a leitura normal
+
+    Returns:
+        Vector store FAISS pronto para consultas
+    """
+    caminho_indice = os.path.join(pasta, _ARQUIVO_INDICE)
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(caminho_indice, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = None
+    if index is None:
+        index = faiss.read_index(caminho_indice)
+
+    # O docstore é um pickle gerado por nós mesmos em salvar_indice
+    with open(os.path.join(pasta, _ARQUIVO_DOCSTORE), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def carregar_ou_criar_indice(
+    documentos: List[Document],
+    embeddings: Embeddings,
+    nome: str = "indice",
+    diretorio: str = DIRETORIO_PADRAO,
+    mmap: bool = True,
+    tipo: str = "flat",
+    caches: Iterable = (),
+    **opcoes_indice
+) -> FAISS:
+    """
+    Retorna o índice FAISS do corpus, reutilizando o salvo em disco.
+
+    O índice fica em <diretorio>/<nome>_<hash>. Se a pasta existir, é apenas
+    aberta; caso contrário os documentos são embedados, o índice é salvo e
+    versões antigas com o mesmo nome são removidas.
+
+    Args:
+        documentos: Chunks a indexar
+        embeddings: Modelo de embeddings
+        nome: Nome lógico do índice (ex: "lei_13303")
+        diretorio: Pasta onde os índices são guardados
+        mmap: Abre o índice memory-mapped (somente leitura)
+        tipo: Tipo de índice FAISS (ver rag_ann.TIPOS_INDICE); padrão "flat"
+        caches: Caches de respostas avisados da versão (hash do corpus)
+        **opcoes_indice: Repassadas a rag_ann.fabricar_indice
+
+    Returns:
+        Vector store FAISS
+    """
+    embeddings_id = identificar_embeddings(embeddings)
+    if tipo != "flat":
+        embeddings_id += f"|{tipo}|{json.dumps(opcoes_indice, sort_keys=True)}"
+    chave = hash_corpus(documentos, embeddings_id)[:16]
+    pasta = os.path.join(diretorio, f"{nome}_{chave}")
+    _avisar_caches(caches, chave)
+
+    if os.path.exists(os.path.join(pasta, _ARQUIVO_INDICE)):
+        print(f"📂 Índice '{nome}' carregado de {pasta}")
+        return abrir_indice(pasta, embeddings, mmap=mmap)
+
+    print(f"🧮 Embedando {len(documentos)} chunks para o índice '{nome}'...")
+    if tipo == "flat":
+        vectorstore = FAISS.from_documents(documentos, embeddings)
+    else:
+        vectorstore = construir_vectorstore(documentos, embeddings, tipo=tipo, **opcoes_indice)
+
+    os.makedirs(diretorio, exist_ok=True)
+    salvar_indice(vectorstore, pasta)
+    _remover_versoes_antigas(diretorio, nome, manter=pasta)
+    print(f"💾 Índice '{nome}' salvo em {pasta}")
+
+    if mmap:
+        return abrir_indice(pasta, embeddings, mmap=True)
+    return vectorstore
+
+
+def _remover_versoes_antigas(diretorio: str, nome: str, manter: Optional[str] = None):
+    """Remove índices de versões anteriores do corpus."""
+    for pasta in Path(diretorio).glob(f"{nome}_*"):
+        chave = pasta.name[len(nome) + 1:]
+        if pasta.is_dir() and str(pasta) != manter and re.fullmatch(r"[0-9a-f]{16}", chave):
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+def hash_texto(texto: str) -> str:
+    """SHA-256 de um texto."""
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _id_chunk(doc_id: str, chunk: Document) -> str:
+    """Id estável de um chunk: depende do documento de origem e do conteúdo."""
+    return hash_texto(f"{doc_id}\x00{chunk.page_content}")
+
+
+def atualizar_indice_incremental(
+    documentos: List[Document],
+    embeddings: Embeddings,
+    dividir: Callable[[Document], List[Document]],
+    nome: str = "indice",
+    diretorio: str = DIRETORIO_PADRAO,
+    chave_id: str = "source",
+    caches: Iterable = ()
+) -> FAISS:
+    """
+    Atualiza um índice FAISS embedando apenas o que mudou no corpus.
+
+    Um manifesto guarda, para cada documento, o hash do texto e os ids dos
+    seus chunks (hash do conteúdo). A cada execução:
+    - documentos com o mesmo hash são ignorados;
+    - em documentos alterados, só chunks com id novo são embedados e os
+      chunks que deixaram de existir são removidos do índice pelo id;
+    - documentos que sumiram do corpus têm todos os chunks removidos.
+
+    Args:
+        documentos: Documentos de origem; metadata[chave_id] identifica cada um
+        embeddings: Modelo de embeddings
+        dividir: Função que divide um documento em chunks
+            (ex: lambda d: splitter.split_documents([d]))
+        nome: Nome lógico do índice
+        diretorio: Pasta onde os índices são guardados
+        chave_id: Campo de metadata com o identificador do documento
+        caches: Caches de respostas avisados da versão (hash dos ids dos chunks)
+
+    Returns:
+        Vector store FAISS atualizado (já salvo em disco)
+    """
+    inicio = time.perf_counter()
+    pasta = os.path.join(diretorio, nome)
+    modelo = identificar_embeddings(embeddings)
+
+    manifesto = {"modelo": modelo, "documentos": {}}
+    vectorstore = None
+    caminho_manifesto = os.path.join(pasta, _ARQUIVO_MANIFESTO)
+    if os.path.exists(caminho_manifesto):
+        with open(caminho_manifesto, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        # Vetores de outro modelo não são comparáveis: reconstruir do zero
+        if anterior.get("modelo") == modelo:
+            manifesto = anterior
+            vectorstore = abrir_indice(pasta, embeddings, mmap=False)
+        else:
+            print(f"⚠️  Modelo de embeddings mudou; reconstruindo o índice '{nome}'")
+
+    registros = manifesto["documentos"]
+    novos_chunks, novos_ids, remover = [], [], []
+    atuais = set()
+    inalterados = 0
+
+    for doc in documentos:
+        doc_id = str(doc.metadata[chave_id])
+        atuais.add(doc_id)
+        hash_doc = hash_texto(doc.page_content)
+        registro = registros.get(doc_id)
+        if registro and registro["hash"] == hash_doc:
+            inalterados += 1
+            continue
+
+        ids_antigos = set(registro["chunks"]) if registro else set()
+        ids_doc = []
+        for chunk in dividir(doc):
+            chunk_id = _id_chunk(doc_id, chunk)
+            if chunk_id in ids_doc:
+                continue
+            ids_doc.append(chunk_id)
+            if chunk_id not in ids_antigos:
+                novos_chunks.append(chunk)
+                novos_ids.append(chunk_id)
+
+        remover.extend(ids_antigos - set(ids_doc))
+        registros[doc_id] = {"hash": hash_doc, "chunks": ids_doc}
+
+    for doc_id in list(registros):
+        if doc_id not in atuais:
+            remover.extend(registros.pop(doc_id)["chunks"])
+
+    versao = hash_texto(modelo + "".join(sorted(c for r in registros.values() for c in r["chunks"])))[:16]
+    _avisar_caches(caches, versao)
+
+    if not novos_ids and not remover and vectorstore is not None:
+        print(f"📂 Índice '{nome}' já atualizado ({inalterados} documentos inalterados)")
+        return vectorstore
+
+    if remover and vectorstore is not None:
+        vectorstore.delete(ids=remover)
+    if novos_ids:
+        if vectorstore is None:
+            vectorstore = FAISS.from_documents(novos_chunks, embeddings, ids=novos_ids)
+        else:
+            vectorstore.add_documents(novos_chunks, ids=novos_ids)
+
+    if vectorstore is None:
+        raise ValueError(f"Índice '{nome}' vazio: nenhum chunk para indexar")
+
+    manifesto["atualizado_em"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    os.makedirs(diretorio, exist_ok=True)
+    salvar_indice(vectorstore, pasta, manifesto=manifesto)
+
+    duracao = time.perf_counter() - inicio
+    print(
+        f"💾 Índice '{nome}' atualizado em {duracao:.1f}s: "
+        f"+{len(novos_ids)} chunks, -{len(remover)} chunks, "
+        f"{inalterados} documentos inalterados"
+    )
+    return vectorstore
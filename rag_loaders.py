@@ -0,0 +1,172 @@
+"""
+Ingestão paralela e em streaming de PDFs grandes (ex: Diário Oficial).
+
+PyPDFLoader(...).load() extrai todas as páginas em um único núcleo e mantém o
+documento inteiro em memória antes de dividir. O CarregadorPDFParalelo
+distribui faixas de páginas entre processos, entrega as páginas em ordem e
+sob demanda (lazy_load) e limita quantas páginas ficam em trânsito. A função
+ingerir_pdf_streaming encadeia páginas -> chunks -> embeddings em lotes, de
+modo que a memória fica limitada a uma janela de páginas.
+
+Uso (medição de vazão):
+    python rag_loaders.py diario_teste.pdf --processos 4
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from pypdf import PdfReader
+
+
+def contar_paginas(caminho: str) -> int:
+    """Número de páginas do PDF."""
+    return len(PdfReader(caminho).pages)
+
+
+def _extrair_faixa(caminho: str, inicio: int, fim: int) -> List[Tuple[int, str]]:
+    """
+    Extrai o texto das páginas [inicio, fim). Roda no processo trabalhador,
+    que abre o arquivo por conta própria (nada de páginas serializadas).
+    """
+    leitor = PdfReader(caminho)
+    return [(i, leitor.pages[i].extract_text() or "") for i in range(inicio, fim)]
+
+
+class CarregadorPDFParalelo(BaseLoader):
+    """Loader de PDF com extração em um pool de processos."""
+
+    def __init__(
+        self,
+        caminho: str,
+        processos: Optional[int] = None,
+        paginas_por_tarefa: int = 8,
+        janela: int = 64
+    ):
+        """
+        Args:
+            caminho: Arquivo PDF
+            processos: Tamanho do pool (padrão: número de CPUs)
+            paginas_por_tarefa: Páginas extraídas por tarefa enviada ao pool
+            janela: Máximo de páginas em extração ou aguardando consumo
+        """
+        self.caminho = caminho
+        self.processos = processos or os.cpu_count() or 1
+        self.paginas_por_tarefa = max(1, paginas_por_tarefa)
+        self.janela = max(janela, self.paginas_por_tarefa)
+
+    def lazy_load(self) -> Iterator[Document]:
+        """Entrega uma página por vez, na ordem do documento."""
+        total = contar_paginas(self.caminho)
+        faixas = [
+            (inicio, min(inicio + self.paginas_por_tarefa, total))
+            for inicio in range(0, total, self.paginas_por_tarefa)
+        ]
+        max_pendentes = max(1, self.janela // self.paginas_por_tarefa)
+
+        # Poucas páginas não compensam o custo de subir processos
+        if self.processos == 1 or len(faixas) == 1:
+            for inicio, fim in faixas:
+                for numero, texto in _extrair_faixa(self.caminho, inicio, fim):
+                    yield self._documento(numero, texto)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.processos) as pool:
+            pendentes = deque()
+            proximas = iter(faixas)
+
+            for inicio, fim in proximas:
+                pendentes.append(pool.submit(_extrair_faixa, self.caminho, inicio, fim))
+                if len(pendentes) >= max_pendentes:
+                    break
+
+            while pendentes:
+                paginas = pendentes.popleft().result()
+                # Repõe a janela antes de entregar as páginas ao consumidor
+                faixa = next(proximas, None)
+                if faixa:
+                    pendentes.append(pool.submit(_extrair_faixa, self.caminho, *faixa))
+                for numero, texto in paginas:
+                    yield self._documento(numero, texto)
+
+    def _documento(self, numero: int, texto: str) -> Document:
+        # Mesmos metadados do PyPDFLoader
+        return Document(page_content=texto, metadata={"source": self.caminho, "page": numero})
+
+
+def ingerir_pdf_streaming(
+    caminho: str,
+    embeddings: Embeddings,
+    splitter,
+    vectorstore: Optional[FAISS] = None,
+    lote_chunks: int = 64,
+    **opcoes_loader
+) -> FAISS:
+    """
+    Extrai, divide e embeda um PDF em streaming.
+
+    As páginas chegam do pool de processos, são divididas em chunks e
+    enviadas ao modelo de embeddings em lotes de lote_chunks; nenhum
+    momento exige o documento inteiro em memória.
+
+    Args:
+        caminho: Arquivo PDF
+        embeddings: Modelo de embeddings
+        splitter: Text splitter do LangChain (ex: RecursiveCharacterTextSplitter)
+        vectorstore: Índice existente para acrescentar os chunks (opcional)
+        lote_chunks: Chunks por chamada de embeddings
+        **opcoes_loader: Repassadas ao CarregadorPDFParalelo
+
+    Returns:
+        Vector store FAISS com os chunks do PDF
+    """
+    loader = CarregadorPDFParalelo(caminho, **opcoes_loader)
+    lote: List[Document] = []
+    total = 0
+
+    def descarregar(vs: Optional[FAISS]) -> FAISS:
+        if vs is None:
+            return FAISS.from_documents(lote, embeddings)
+        vs.add_documents(lote)
+        return vs
+
+    for pagina in loader.lazy_load():
+        lote.extend(splitter.split_documents([pagina]))
+        if len(lote) >= lote_chunks:
+            vectorstore = descarregar(vectorstore)
+            total += len(lote)
+            lote = []
+
+    if lote:
+        vectorstore = descarregar(vectorstore)
+        total += len(lote)
+
+    if vectorstore is None:
+        raise ValueError(f"Nenhum texto extraído de {caminho}")
+
+    print(f"📄 {caminho}: {total} chunks indexados")
+    return vectorstore
+
+
+def main():
+    """Mede a vazão de extração (páginas/s) com 1 e N processos."""
+    parser = argparse.ArgumentParser(description="Mede a vazão de extração de um PDF")
+    parser.add_argument("pdf", help="Arquivo PDF")
+    parser.add_argument("-p", "--processos", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    for processos in sorted({1, args.processos}):
+        inicio = time.perf_counter()
+        paginas = sum(1 for _ in CarregadorPDFParalelo(args.pdf, processos=processos).lazy_load())
+        duracao = time.perf_counter() - inicio
+        print(f"{processos} processo(s): {paginas} páginas em {duracao:.2f}s ({paginas / duracao:.1f} páginas/s)")
+
+
+if __name__ == "__main__":
+    main()
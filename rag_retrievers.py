@@ -0,0 +1,344 @@
+"""
+Recuperadores para os RAGs: busca híbrida e histórico com caminho rápido.
+
+Perguntas jurídicas dependem de tokens exatos ("Art. 29", "inciso II",
+"R$ 50.000,00") que os embeddings densos tendem a borrar. O
+RecuperadorHibrido combina um índice invertido BM25, com estatísticas de
+termos pré-calculadas, com os resultados do FAISS via Reciprocal Rank Fusion
+(RRF), e é exposto como um retriever do LangChain.
+
+O RecuperadorComHistoricoRapido substitui create_history_aware_retriever:
+só chama o LLM para reformular a pergunta quando ela depende do histórico.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+from langchain_core.vectorstores import VectorStore
+
+from rag_splitters import artigos_citados
+from tokenizacao import remover_acentos, tokenizar
+
+
+def _chave_documento(doc: Document) -> str:
+    """Identifica o mesmo chunk vindo do BM25 e do FAISS."""
+    return doc.id or doc.page_content
+
+
+class IndiceBM25:
+    """Índice invertido com pontuação BM25 (Okapi)."""
+
+    def __init__(self, documentos: List[Document], k1: float = 1.5, b: float = 0.75):
+        """
+        Constrói o índice em uma passada sobre os documentos.
+
+        Args:
+            documentos: Chunks a indexar
+            k1: Saturação da frequência do termo
+            b: Peso da normalização pelo tamanho do documento
+        """
+        self.documentos = documentos
+        self.k1 = k1
+        self.b = b
+
+        # termo -> [(índice do documento, frequência no documento)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.tamanhos: List[int] = []
+        for i, doc in enumerate(documentos):
+            tokens = tokenizar(doc.page_content)
+            self.tamanhos.append(len(tokens))
+            for termo, freq in Counter(tokens).items():
+                self.postings[termo].append((i, freq))
+
+        n = len(documentos)
+        media = (sum(self.tamanhos) / n) if n else 0.0
+        self.idf = {
+            termo: math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termo, lista in self.postings.items()
+        }
+        # Parte da normalização que só depende do documento, pré-calculada
+        self._norma = [
+            k1 * (1 - b + b * (tamanho / media if media else 0.0))
+            for tamanho in self.tamanhos
+        ]
+
+    @classmethod
+    def de_vectorstore(cls, vectorstore: VectorStore, **kwargs) -> "IndiceBM25":
+        """Constrói o índice com os mesmos chunks guardados no docstore do FAISS."""
+        documentos = []
+        for doc_id, doc in vectorstore.docstore._dict.items():
+            if doc.id is None:
+                doc = Document(page_content=doc.page_content, metadata=doc.metadata, id=doc_id)
+            documentos.append(doc)
+        return cls(documentos, **kwargs)
+
+    def buscar(self, consulta: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """
+        Retorna os k documentos com maior pontuação BM25.
+
+        Args:
+            consulta: Texto da consulta
+            k: Número de resultados
+
+        Returns:
+            Lista de (documento, pontuação), em ordem decrescente
+        """
+        pontuacoes: Dict[int, float] = defaultdict(float)
+        for termo in set(tokenizar(consulta)):
+            idf = self.idf.get(termo)
+            if idf is None:
+                continue
+            for i, freq in self.postings[termo]:
+                pontuacoes[i] += idf * freq * (self.k1 + 1) / (freq + self._norma[i])
+
+        melhores = heapq.nlargest(k, pontuacoes.items(), key=lambda item: item[1])
+        return [(self.documentos[i], pontuacao) for i, pontuacao in melhores]
+
+
+def fusao_rrf(rankings: Iterable[List[Document]], k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Reciprocal Rank Fusion: soma 1 / (k + posição) de cada lista.
+
+    Args:
+        rankings: Listas de documentos, cada uma em ordem de relevância
+        k: Constante de suavização (60 é o valor usual)
+
+    Returns:
+        Documentos únicos com a pontuação fundida, em ordem decrescente
+    """
+    pontuacoes: Dict[str, float] = defaultdict(float)
+    documentos: Dict[str, Document] = {}
+    for ranking in rankings:
+        for posicao, doc in enumerate(ranking, 1):
+            chave = _chave_documento(doc)
+            documentos.setdefault(chave, doc)
+            pontuacoes[chave] += 1.0 / (k + posicao)
+    ordenados = sorted(pontuacoes.items(), key=lambda item: item[1], reverse=True)
+    return [(documentos[chave], pontuacao) for chave, pontuacao in ordenados]
+
+
+class RecuperadorHibrido(BaseRetriever):
+    """
+    Retriever que funde BM25 e busca vetorial com RRF.
+
+    Se os chunks tiverem "artigo" nos metadados (ver DivisorLegislacao) e a
+    pergunta citar artigos ("art. 29"), os chunks desses artigos entram como
+    uma terceira lista na fusão, obtidos direto pelos metadados.
+    """
+
+    vectorstore: VectorStore
+    bm25: IndiceBM25
+    por_artigo: Dict[str, List[Document]] = {}
+    k: int = 4
+    k_candidatos: int = 20
+    k_rrf: int = 60
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @classmethod
+    def criar(cls, vectorstore: VectorStore, **kwargs) -> "RecuperadorHibrido":
+        """Cria o retriever, construindo o BM25 a partir do docstore do índice."""
+        bm25 = IndiceBM25.de_vectorstore(vectorstore)
+        por_artigo: Dict[str, List[Document]] = defaultdict(list)
+        for doc in bm25.documentos:
+            if doc.metadata.get("artigo"):
+                por_artigo[str(doc.metadata["artigo"])].append(doc)
+        return cls(vectorstore=vectorstore, bm25=bm25, por_artigo=dict(por_artigo), **kwargs)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: Optional[CallbackManagerForRetrieverRun] = None
+    ) -> List[Document]:
+        esparsos = [doc for doc, _ in self.bm25.buscar(query, self.k_candidatos)]
+        densos = self.vectorstore.similarity_search(query, k=self.k_candidatos)
+        rankings = [esparsos, densos]
+        diretos = [
+            doc
+            for artigo in artigos_citados(query)
+            for doc in self.por_artigo.get(artigo, [])
+        ]
+        if diretos:
+            rankings.append(diretos)
+        fundidos = fusao_rrf(rankings, k=self.k_rrf)
+        return [doc for doc, _ in fundidos[:self.k]]
+
+
+# Palavras que indicam referência a algo dito antes na conversa. Comparadas
+# antes de remover acentos ("está" é verbo, não anáfora) e sem formas comuns
+# em perguntas autônomas ("este", "esta", "mesmo", "também", "la"/"lo").
+_ANAFORAS = {
+    "ele", "ela", "eles", "elas", "dele", "dela", "deles", "delas", "nele", "nela",
+    "isso", "isto", "aquilo", "disso", "disto", "nisso", "daquilo",
+    "esse", "essa", "esses", "essas",
+    "desse", "dessa", "deste", "desta", "nesse", "nessa", "neste", "nesta",
+    "aquele", "aquela", "anterior", "acima", "lhe",
+}
+_CONTINUACOES = ("e ", "mas ", "entao ", "e quanto", "e sobre", "e se", "tambem ")
+
+
+class ClassificadorReformulacao:
+    """
+    Decide se uma pergunta precisa ser reformulada com base no histórico.
+
+    Regras resolvem os casos óbvios (sem histórico: nunca; pronome ou
+    continuação: sempre) e um modelo logístico minúsculo, com pesos
+    ajustáveis por treinar(), decide o resto a partir de poucas features.
+    """
+
+    def __init__(self, pesos: Optional[List[float]] = None, limiar: float = 0.5):
+        # features: [viés, anáforas, continuação, palavras <= 4, sobreposição com o último turno]
+        self.pesos = pesos or [-1.5, 2.5, 2.0, 1.5, -1.0]
+        self.limiar = limiar
+
+    @staticmethod
+    def _features(pergunta: str, historico: List) -> List[float]:
+        palavras = re.findall(r"\w+", pergunta.lower())
+        normalizada = remover_acentos(pergunta.lower()).strip()
+        ultimo = historico[-1].content if historico and hasattr(historico[-1], "content") else ""
+        termos_ultimo = set(tokenizar(str(ultimo)))
+        termos = set(tokenizar(pergunta))
+        sobreposicao = len(termos & termos_ultimo) / len(termos) if termos else 0.0
+        return [
+            1.0,
+            float(sum(1 for p in palavras if p in _ANAFORAS)),
+            1.0 if normalizada.startswith(_CONTINUACOES) else 0.0,
+            1.0 if len(palavras) <= 4 else 0.0,
+            sobreposicao,
+        ]
+
+    def probabilidade(self, pergunta: str, historico: List) -> float:
+        """Probabilidade estimada de a pergunta depender do histórico."""
+        z = sum(p * f for p, f in zip(self.pesos, self._features(pergunta, historico)))
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def precisa_reformular(self, pergunta: str, historico: List) -> bool:
+        if not historico:
+            return False
+        features = self._features(pergunta, historico)
+        if features[1] or features[2]:
+            return True
+        return self.probabilidade(pergunta, historico) >= self.limiar
+
+    def treinar(self, exemplos: List[Tuple[str, List, bool]], epocas: int = 200, taxa: float = 0.1):
+        """
+        Ajusta os pesos por regressão logística (gradiente descendente).
+
+        Args:
+            exemplos: (pergunta, histórico, precisou reformular?)
+        """
+        dados = [(self._features(p, h), 1.0 if y else 0.0) for p, h, y in exemplos]
+        for _ in range(epocas):
+            gradiente = [0.0] * len(self.pesos)
+            for x, y in dados:
+                erro = 1.0 / (1.0 + math.exp(-sum(p * f for p, f in zip(self.pesos, x)))) - y
+                for i, f in enumerate(x):
+                    gradiente[i] += erro * f
+            self.pesos = [p - taxa * g / len(dados) for p, g in zip(self.pesos, gradiente)]
+
+
+class RecuperadorComHistoricoRapido:
+    """
+    Substituto de create_history_aware_retriever com caminho rápido.
+
+    - Sem histórico, ou quando o classificador julga a pergunta autônoma, a
+      busca é feita direto com a pergunta original (sem chamada ao LLM).
+    - Quando é preciso reformular, a reformulação e uma busca especulativa
+      com a pergunta original rodam em paralelo; se a reformulação tiver os
+      mesmos termos da pergunta, a busca especulativa é aproveitada.
+    - pergunta_autonoma() (usada pelo cache semântico) e buscar() com a
+      mesma entrada compartilham a reformulação e a busca: na chain com
+      cache, a busca roda enquanto o LLM reformula e o cache é consultado.
+    """
+
+    def __init__(self, llm, retriever, prompt, classificador: Optional[ClassificadorReformulacao] = None):
+        """
+        Args:
+            llm: Modelo usado para reformular
+            retriever: Retriever de documentos
+            prompt: Prompt de reformulação (com "chat_history" e "input")
+            classificador: Decide quando reformular (padrão: regras + logístico)
+        """
+        self.retriever = retriever
+        self.reformulador = prompt | llm | StrOutputParser()
+        self.classificador = classificador or ClassificadorReformulacao()
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        # Reformulação e busca por (pergunta, histórico): o cache semântico
+        # pede a pergunta autônoma e a chain, logo depois, os documentos; a
+        # busca iniciada no primeiro pedido é reaproveitada no segundo
+        self._memo: "OrderedDict[Tuple, Tuple[str, Future]]" = OrderedDict()
+        self._memo_max = 256
+        self._memo_lock = threading.Lock()
+        self.reformulacoes = 0
+        self.atalhos = 0
+
+    @staticmethod
+    def _chave(entrada: Dict) -> Tuple:
+        historico = entrada.get("chat_history") or []
+        return (entrada["input"], tuple(str(getattr(m, "content", m)) for m in historico))
+
+    def _reformular_e_buscar(self, entrada: Dict, config=None) -> Tuple[str, Future]:
+        """Reformula com o LLM enquanto busca com a pergunta original; devolve (reformulada, busca)."""
+        chave = self._chave(entrada)
+        with self._memo_lock:
+            if chave in self._memo:
+                self._memo.move_to_end(chave)
+                return self._memo[chave]
+
+        pergunta = entrada["input"]
+        especulativa = self._pool.submit(self.retriever.invoke, pergunta)
+        reformulada = self.reformulador.invoke(entrada, config=config).strip()
+        # Mesmos termos (ignorando caixa, acentos, pontuação e stopwords): a
+        # busca especulativa já é a busca certa
+        if set(tokenizar(reformulada)) == set(tokenizar(pergunta)):
+            busca = especulativa
+        else:
+            especulativa.cancel()
+            busca = self._pool.submit(self.retriever.invoke, reformulada, config)
+
+        with self._memo_lock:
+            self.reformulacoes += 1
+            self._memo[chave] = (reformulada, busca)
+            if len(self._memo) > self._memo_max:
+                self._memo.popitem(last=False)
+        return reformulada, busca
+
+    def pergunta_autonoma(self, entrada: Dict, config=None) -> str:
+        """Pergunta autônoma: a original ou a reformulada pelo LLM, se necessário.
+
+        Quando reformula, já deixa a busca correspondente em andamento; o
+        buscar() seguinte com a mesma entrada só espera por ela.
+        """
+        if not self.classificador.precisa_reformular(entrada["input"], entrada.get("chat_history") or []):
+            return entrada["input"]
+        return self._reformular_e_buscar(entrada, config)[0]
+
+    def buscar(self, entrada: Dict, config=None) -> List[Document]:
+        """Recupera os documentos para {"input", "chat_history"}."""
+        pergunta = entrada["input"]
+        if not self.classificador.precisa_reformular(pergunta, entrada.get("chat_history") or []):
+            self.atalhos += 1
+            return self.retriever.invoke(pergunta, config=config)
+
+        _, busca = self._reformular_e_buscar(entrada, config)
+        try:
+            return busca.result()
+        except Exception:
+            # Não guarda falhas: a próxima chamada tenta de novo
+            with self._memo_lock:
+                self._memo.pop(self._chave(entrada), None)
+            raise
+
+    def como_runnable(self):
+        """Runnable para usar no lugar de create_history_aware_retriever."""
+        return RunnableLambda(self.buscar).with_config(run_name="chat_retriever_chain")
@@ -0,0 +1,169 @@
+"""
+Divisor de textos normativos brasileiros sensível à estrutura.
+
+Em vez de cortar a lei a cada N caracteres (misturando artigos e duplicando
+trechos pelo overlap), o DivisorLegislacao percorre o texto uma única vez
+reconhecendo Lei -> Art. -> § -> inciso -> alínea. Cada chunk pertence a um
+único artigo e carrega lei/artigo/parágrafo/inciso nos metadados, o que
+permite filtrar por artigo sem busca vetorial.
+"""
+import copy
+import re
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
+
+_LEI = re.compile(r"^\s*LEI\s+(?:COMPLEMENTAR\s+)?N[º°o.]?\s*([\d.]+)", re.IGNORECASE)
+# Sufixo de letra só em maiúscula colada ao número ("Art. 29-A"); "Art. 1º - Esta Lei" não tem sufixo
+_SUFIXO = r"(?:-(?-i:([A-Z]))\b)?"
+_ARTIGO = re.compile(rf"^\s*Art\.?\s*(\d+)\s*[º°o]?{_SUFIXO}\s*\.?", re.IGNORECASE)
+_PARAGRAFO = re.compile(r"^\s*(?:§\s*(\d+)\s*[º°o]?|(Par[áa]grafo\s+[úu]nico))", re.IGNORECASE)
+_INCISO = re.compile(r"^\s*([IVXLCDM]+)\s*[-–—]")
+_ALINEA = re.compile(r"^\s*([a-z])\)")
+
+# Referências a artigos dentro de uma pergunta ("art. 29", "artigo 1º"), inclusive
+# listas ("arts. 29 e 30", "arts. 5º, 6º e 7º-A"); _NUMERO_ARTIGO separa cada item
+_NUMERO_ARTIGO = re.compile(rf"(\d+)\s*[º°o]?{_SUFIXO}", re.IGNORECASE)
+_ITEM = r"\d+\s*[º°o]?(?:-(?-i:[A-Z])\b)?"
+_REFERENCIA_ARTIGO = re.compile(rf"\bart(?:igo)?s?\.?\s*({_ITEM}(?:\s*(?:,|\be\b)\s*{_ITEM})*)", re.IGNORECASE)
+
+
+def _rotulo_artigo(numero: str, letra: Optional[str]) -> str:
+    """Normaliza o número do artigo ("29", "29-A")."""
+    return f"{int(numero)}-{letra.upper()}" if letra else str(int(numero))
+
+
+def artigos_citados(texto: str) -> List[str]:
+    """Números de artigo citados em um texto, na ordem, sem repetição."""
+    vistos = []
+    for lista in _REFERENCIA_ARTIGO.findall(texto):
+        for numero, letra in _NUMERO_ARTIGO.findall(lista):
+            rotulo = _rotulo_artigo(numero, letra or None)
+            if rotulo not in vistos:
+                vistos.append(rotulo)
+    return vistos
+
+
+def filtrar_por_artigo(documentos: List[Document], artigo: str) -> List[Document]:
+    """Chunks de um artigo, pelos metadados (sem busca vetorial)."""
+    return [doc for doc in documentos if doc.metadata.get("artigo") == str(artigo)]
+
+
+class DivisorLegislacao(TextSplitter):
+    """Divide leis por dispositivo (artigo, parágrafo, inciso, alínea)."""
+
+    def __init__(self, chunk_size: int = 1500, **kwargs: Any):
+        """
+        Args:
+            chunk_size: Tamanho máximo de um chunk. Artigos maiores são
+                divididos nas fronteiras de parágrafo/inciso; só um dispositivo
+                isolado maior que o limite é cortado por caracteres.
+        """
+        kwargs["chunk_overlap"] = 0
+        super().__init__(chunk_size=chunk_size, **kwargs)
+        self._fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
+
+    def _unidades(self, texto: str) -> List[Dict[str, Any]]:
+        """
+        Percorre o texto linha a linha, em uma única passada, e devolve os
+        dispositivos com o contexto estrutural de cada um.
+        """
+        contexto: Dict[str, Optional[str]] = {
+            "lei": None, "artigo": None, "paragrafo": None, "inciso": None, "alinea": None
+        }
+        unidades: List[Dict[str, Any]] = []
+
+        for linha in texto.splitlines():
+            if not linha.strip():
+                continue
+
+            novo = True
+            if m := _LEI.match(linha):
+                contexto.update(lei=m.group(1).rstrip("."), artigo=None, paragrafo=None, inciso=None, alinea=None)
+            elif m := _ARTIGO.match(linha):
+                contexto.update(artigo=_rotulo_artigo(m.group(1), m.group(2)), paragrafo=None, inciso=None, alinea=None)
+            elif m := _PARAGRAFO.match(linha):
+                rotulo = "único" if m.group(2) else m.group(1)
+                contexto.update(paragrafo=rotulo, inciso=None, alinea=None)
+            elif contexto["artigo"] and (m := _INCISO.match(linha)):
+                contexto.update(inciso=m.group(1), alinea=None)
+            elif contexto["artigo"] and (m := _ALINEA.match(linha)):
+                contexto.update(alinea=m.group(1))
+            else:
+                novo = False
+
+            if novo or not unidades:
+                unidades.append({"texto": linha.strip(), "contexto": dict(contexto)})
+            else:
+                # Continuação do dispositivo anterior (quebra de linha no meio)
+                unidades[-1]["texto"] += " " + linha.strip()
+
+        return unidades
+
+    def _agrupar(self, unidades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Junta dispositivos consecutivos do mesmo artigo até o tamanho máximo."""
+        chunks: List[Dict[str, Any]] = []
+        atual: Optional[Dict[str, Any]] = None
+
+        for unidade in unidades:
+            ctx = unidade["contexto"]
+            cabe = (
+                atual is not None
+                and atual["contexto"]["artigo"] == ctx["artigo"]
+                and atual["contexto"]["lei"] == ctx["lei"]
+                and self._length_function(atual["texto"]) + 1 + self._length_function(unidade["texto"]) <= self._chunk_size
+            )
+            if cabe:
+                atual["texto"] += "\n" + unidade["texto"]
+            else:
+                atual = {"texto": unidade["texto"], "contexto": ctx}
+                chunks.append(atual)
+
+        return chunks
+
+    def _chunks(self, texto: str) -> List[Dict[str, Any]]:
+        chunks = []
+        for chunk in self._agrupar(self._unidades(texto)):
+            if self._length_function(chunk["texto"]) <= self._chunk_size:
+                chunks.append(chunk)
+            else:
+                for parte in self._fallback.split_text(chunk["texto"]):
+                    chunks.append({"texto": parte, "contexto": chunk["contexto"]})
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk["texto"] for chunk in self._chunks(text)]
+
+    def create_documents(
+        self, texts: List[str], metadatas: Optional[List[dict]] = None
+    ) -> List[Document]:
+        """Cria um Document por chunk, com lei/artigo/parágrafo/inciso nos metadados."""
+        metadatas = metadatas or [{}] * len(texts)
+        documentos = []
+        for texto, metadata in zip(texts, metadatas):
+            for chunk in self._chunks(texto):
+                meta = copy.deepcopy(metadata)
+                ctx = chunk["contexto"]
+                for campo in ("lei", "artigo", "paragrafo", "inciso"):
+                    if ctx[campo] is not None:
+                        meta[campo] = ctx[campo]
+                documentos.append(Document(page_content=chunk["texto"], metadata=meta))
+        return documentos
+
+
+def _verificar():
+    """Casos de regressão do reconhecimento de artigos (python rag_splitters.py)."""
+    texto = "LEI Nº 8.666\nArt. 1º - Esta Lei estabelece normas.\nArt. 2º - As obras serão licitadas.\nArt. 24-A. Incluído.\nArt. 25. Inexigível."
+    artigos = [ctx["contexto"]["artigo"] for ctx in DivisorLegislacao()._unidades(texto)[1:]]
+    assert artigos == ["1", "2", "24-A", "25"], artigos
+    assert artigos_citados("o que diz o art. 24 - inciso II?") == ["24"]
+    assert artigos_citados("compare os arts. 29 e 30") == ["29", "30"]
+    assert artigos_citados("arts. 5º, 6º e 7º-A da lei") == ["5", "6", "7-A"]
+    assert artigos_citados("artigo 29-A e art. 1o") == ["29-A", "1"]
+    print("✅ Reconhecimento de artigos OK")
+
+
+if __name__ == "__main__":
+    _verificar()
@@ -0,0 +1,338 @@
+"""
+Roteador local (centroide mais próximo) para os supervisores multiagente.
+
+Os supervisores do CareFlow e da SkyFlow chamam o Gemini a cada mensagem só
+para escolher entre 3 ou 4 rótulos. O RoteadorLocal aprende essa escolha a
+partir das decisões já tomadas pelo LLM (registradas em um arquivo JSONL):
+cada mensagem (somada à mensagem anterior do usuário, para "Sim" e "e
+amanhã?") vira um vetor de palavras com hashing (ou um embedding, se um
+modelo for informado), cada rótulo é o centroide dos seus exemplos e a
+decisão é o centroide mais próximo. Com palavras, a decisão leva
+microssegundos; quando a margem sobre o segundo rótulo é pequena, o
+supervisor LLM decide e a decisão dele entra no treino. O registro guarda
+o vetor esparso de buckets com hashing (não o texto), que basta para
+retreinar o roteador e para o benchmark.
+
+Uso (cobertura e acurácia x LLM para cada margem mínima):
+    python roteador_local.py hospital_system/roteamento_log.jsonl
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from tokenizacao import tokenizar
+
+
+def _radical(token: str) -> str:
+    """Radical grosseiro: "agendamento", "agendar" -> "agend"."""
+    return token if token[0].isdigit() else token[:5]
+
+
+def carregar_registro(caminho: str) -> List[dict]:
+    """Lê as decisões registradas ({"hash", "rotulo", "margem", "latencia_ms", "vetor"} e, se gravado, "texto")."""
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def _ultima_pergunta_anterior(mensagens: List) -> Optional[str]:
+    """Texto da mensagem anterior do usuário (contexto de "Sim", "e amanhã?")."""
+    for mensagem in reversed(mensagens[:-1]):
+        if getattr(mensagem, "type", None) == "human":
+            return mensagem.content
+    return None
+
+
+class RoteadorLocal:
+    """Classificador de centroide mais próximo com aprendizado incremental.
+
+    A decisão local exige duas coisas: similaridade mínima com o centroide
+    vencedor (a mensagem se parece com algo já visto) e margem mínima sobre o
+    segundo colocado (não é ambígua). Similaridades de cosseno não são
+    probabilidades, então o gate usa a margem em vez de um softmax. Os padrões
+    vêm de validação deixando um exemplo de fora nos seed_routes dos agentes:
+    os erros ficaram com similaridade até 0.16, abaixo de similaridade_minima.
+    """
+
+    def __init__(
+        self,
+        rotulos: Iterable[str],
+        margem_minima: float = 0.15,
+        similaridade_minima: float = 0.3,
+        min_exemplos: int = 3,
+        dim: int = 4096,
+        peso_contexto: float = 0.5,
+        embeddings: Optional[Embeddings] = None
+    ):
+        """
+        Args:
+            rotulos: Rótulos possíveis (ex: ["Triage", "Medical", "Admin", "FINISH"])
+            margem_minima: Diferença mínima de similaridade entre o 1º e o 2º
+                rótulos; abaixo disso, prever() devolve None (use o LLM)
+            similaridade_minima: Similaridade mínima com o centroide vencedor
+            min_exemplos: Exemplos mínimos de um rótulo antes de confiar nele
+            dim: Dimensão do vetor de palavras com hashing
+            peso_contexto: Peso da mensagem anterior do usuário no vetor
+            embeddings: Modelo de embeddings no lugar das palavras (mais lento)
+        """
+        self.rotulos = list(rotulos)
+        self.margem_minima = margem_minima
+        self.similaridade_minima = similaridade_minima
+        self.min_exemplos = min_exemplos
+        self.dim = dim
+        self.peso_contexto = peso_contexto
+        self.embeddings = embeddings
+        self._somas: Optional[np.ndarray] = None
+        self._contagens = np.zeros(len(self.rotulos), dtype=np.int64)
+        self._centroides: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _vetor_texto(self, texto: str) -> np.ndarray:
+        if self.embeddings is not None:
+            vetor = np.asarray(self.embeddings.embed_query(texto), dtype=np.float32)
+        else:
+            radicais = [_radical(t) for t in tokenizar(texto)]
+            termos = radicais + [f"{a} {b}" for a, b in zip(radicais, radicais[1:])]
+            vetor = np.zeros(self.dim, dtype=np.float32)
+            for termo, n in Counter(termos).items():
+                vetor[zlib.crc32(termo.encode("utf-8")) % self.dim] += 1.0 + np.log(n)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+    def _vetor(self, texto: str, contexto: Optional[str] = None) -> np.ndarray:
+        """Vetor da mensagem, somado ao da mensagem anterior com peso_contexto."""
+        vetor = self._vetor_texto(texto)
+        if contexto:
+            vetor = vetor + self.peso_contexto * self._vetor_texto(contexto)
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+    def vetor_esparso(self, texto: str, contexto: Optional[str] = None) -> List[List[float]]:
+        """Buckets não nulos do vetor com hashing, [[índice, peso], ...] (não guarda o texto)."""
+        vetor = self._vetor(texto, contexto)
+        return [[int(i), round(float(vetor[i]), 4)] for i in np.flatnonzero(vetor)]
+
+    def vetor_do_registro(self, registro: dict) -> Optional[np.ndarray]:
+        """Vetor de uma decisão registrada: do texto, se gravado, ou dos buckets esparsos."""
+        if "texto" in registro:
+            return self._vetor(registro["texto"], registro.get("contexto"))
+        if "vetor" not in registro or self.embeddings is not None or registro.get("dim") != self.dim:
+            return None
+        vetor = np.zeros(self.dim, dtype=np.float32)
+        for indice, peso in registro["vetor"]:
+            vetor[indice] = peso
+        norma = np.linalg.norm(vetor)
+        return vetor / norma if norma else vetor
+
+    def aprender(self, texto: str, rotulo: str, contexto: Optional[str] = None):
+        """Acrescenta um exemplo (ex: uma decisão recém-tomada pelo LLM)."""
+        if rotulo in self.rotulos:
+            self.aprender_vetor(self._vetor(texto, contexto), rotulo)
+
+    def aprender_vetor(self, vetor: np.ndarray, rotulo: str):
+        """Acrescenta um exemplo já vetorizado (ex: lido do registro)."""
+        if rotulo not in self.rotulos:
+            return
+        with self._lock:
+            if self._somas is None:
+                self._somas = np.zeros((len(self.rotulos), len(vetor)), dtype=np.float32)
+            i = self.rotulos.index(rotulo)
+            self._somas[i] += vetor
+            self._contagens[i] += 1
+            normas = np.linalg.norm(self._somas, axis=1, keepdims=True)
+            self._centroides = self._somas / np.maximum(normas, 1e-12)
+
+    def treinar(self, exemplos: Iterable[Tuple[str, str]]) -> "RoteadorLocal":
+        """Treina com pares (texto, rótulo)."""
+        for texto, rotulo in exemplos:
+            self.aprender(texto, rotulo)
+        return self
+
+    def similaridades(self, texto: str, contexto: Optional[str] = None) -> Dict[str, float]:
+        """Cosseno entre a mensagem e cada centroide (rótulos sem exemplos ficam de fora)."""
+        return self._similaridades(self._vetor(texto, contexto))
+
+    def _similaridades(self, vetor: np.ndarray) -> Dict[str, float]:
+        if self._centroides is None:
+            return {}
+        escores = self._centroides @ vetor
+        return {r: float(e) for r, e, n in zip(self.rotulos, escores, self._contagens) if n > 0}
+
+    def prever(self, texto: str, contexto: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            (rótulo, margem sobre o 2º colocado); rótulo é None se a margem ou
+            a similaridade forem baixas, ou se o rótulo tiver menos de
+            min_exemplos exemplos
+        """
+        return self.prever_vetor(self._vetor(texto, contexto))
+
+    def prever_vetor(self, vetor: np.ndarray) -> Tuple[Optional[str], float]:
+        """Como prever(), para um vetor já calculado."""
+        sims = self._similaridades(vetor)
+        if not sims:
+            return None, 0.0
+        ordem = sorted(sims, key=sims.get, reverse=True)
+        rotulo = ordem[0]
+        margem = sims[rotulo] - (sims[ordem[1]] if len(ordem) > 1 else 0.0)
+        if (
+            margem < self.margem_minima
+            or sims[rotulo] < self.similaridade_minima
+            or self._contagens[self.rotulos.index(rotulo)] < self.min_exemplos
+        ):
+            return None, margem
+        return rotulo, margem
+
+
+class SupervisorHibrido:
+    """Roteador local na frente do supervisor LLM, com registro das decisões do LLM.
+
+    Por padrão o registro guarda rótulo, margem, latência, um hash da
+    mensagem e os buckets esparsos do vetor com hashing, que bastam para
+    retreinar o roteador ao iniciar; o texto só é gravado com
+    registrar_texto=True.
+    """
+
+    def __init__(
+        self,
+        roteador: RoteadorLocal,
+        supervisor_llm: Callable[[dict], dict],
+        caminho_registro: Optional[str] = None,
+        exemplos_iniciais: Iterable[Tuple[str, str]] = (),
+        registrar_texto: bool = False
+    ):
+        """
+        Args:
+            roteador: RoteadorLocal com os rótulos do supervisor
+            supervisor_llm: Função state -> {"next": rótulo} (o supervisor original)
+            caminho_registro: JSONL onde as decisões do LLM são gravadas e de
+                onde o roteador é treinado ao iniciar
+            exemplos_iniciais: Pares (texto, rótulo) para o início a frio
+            registrar_texto: Grava o texto das mensagens no registro (opt-in;
+                contém o que o usuário escreveu)
+        """
+        self.roteador = roteador
+        self.supervisor_llm = supervisor_llm
+        self.caminho_registro = caminho_registro
+        self.registrar_texto = registrar_texto
+        self.decisoes_locais = 0
+        self.decisoes_llm = 0
+        self._lock = threading.Lock()
+
+        roteador.treinar(exemplos_iniciais)
+        if caminho_registro:
+            for r in carregar_registro(caminho_registro):
+                vetor = roteador.vetor_do_registro(r)
+                if vetor is not None:
+                    roteador.aprender_vetor(vetor, r["rotulo"])
+
+    def __call__(self, state: dict) -> dict:
+        texto = state["messages"][-1].content
+        contexto = _ultima_pergunta_anterior(state["messages"])
+        rotulo, margem = self.roteador.prever(texto, contexto)
+        if rotulo is not None:
+            self.decisoes_locais += 1
+            return {"next": rotulo}
+
+        inicio = time.perf_counter()
+        resultado = self.supervisor_llm(state)
+        latencia_ms = (time.perf_counter() - inicio) * 1000
+        self.decisoes_llm += 1
+        self.roteador.aprender(texto, resultado["next"], contexto)
+        self._registrar(texto, contexto, resultado["next"], margem, latencia_ms)
+        return resultado
+
+    def _registrar(self, texto: str, contexto: Optional[str], rotulo: str, margem: float, latencia_ms: float):
+        if not self.caminho_registro:
+            return
+        registro = {
+            "hash": hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16],
+            "rotulo": rotulo,
+            "margem": round(margem, 3),
+            "latencia_ms": round(latencia_ms, 1),
+        }
+        if self.roteador.embeddings is None:
+            registro["dim"] = self.roteador.dim
+            registro["vetor"] = self.roteador.vetor_esparso(texto, contexto)
+        if self.registrar_texto:
+            registro["texto"] = texto
+            if contexto:
+                registro["contexto"] = contexto
+        linha = json.dumps(registro, ensure_ascii=False)
+        with self._lock, open(self.caminho_registro, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+
+
+def benchmark(registros: List[dict], margem_minima: float = 0.15, fracao_teste: float = 0.3, semente: int = 42) -> dict:
+    """
+    Treina em parte das decisões do LLM e mede, no restante, a acurácia e a
+    cobertura (fração decidida localmente) do roteador local. Usa o texto,
+    se gravado, ou os buckets esparsos do vetor com hashing.
+    """
+    rotulos = sorted({r["rotulo"] for r in registros})
+    dims = [r["dim"] for r in registros if "dim" in r]
+    roteador = RoteadorLocal(rotulos, margem_minima=margem_minima, dim=max(set(dims), key=dims.count) if dims else 4096)
+    exemplos = [(v, r) for r in registros if (v := roteador.vetor_do_registro(r)) is not None]
+    random.Random(semente).shuffle(exemplos)
+    corte = int(len(exemplos) * (1 - fracao_teste))
+    treino, teste = exemplos[:corte], exemplos[corte:]
+    if not teste:
+        raise ValueError("Poucos registros com texto ou vetor para avaliar")
+
+    for vetor, r in treino:
+        roteador.aprender_vetor(vetor, r["rotulo"])
+
+    acertos = decididos = 0
+    inicio = time.perf_counter()
+    previsoes = [roteador.prever_vetor(vetor)[0] for vetor, _ in teste]
+    latencia_us = (time.perf_counter() - inicio) * 1e6 / len(teste)
+    for previsto, (_, registro) in zip(previsoes, teste):
+        if previsto is not None:
+            decididos += 1
+            acertos += previsto == registro["rotulo"]
+
+    latencias_llm = [r["latencia_ms"] for r in registros if r.get("latencia_ms")]
+    llm_ms = float(np.median(latencias_llm)) if latencias_llm else 0.0
+    cobertura = decididos / len(teste)
+    return {
+        "treino": len(treino),
+        "teste": len(teste),
+        "cobertura": cobertura,
+        "acuracia_decididos": acertos / decididos if decididos else 0.0,
+        "acuracia_total": (acertos + len(teste) - decididos) / len(teste),
+        "latencia_local_us": latencia_us,
+        "latencia_llm_ms": llm_ms,
+        "economia_ms_por_turno": cobertura * llm_ms,
+    }
+
+
+def main():
+    """Compara o roteador local com as decisões registradas do LLM, para várias margens."""
+    parser = argparse.ArgumentParser(description="Benchmark do roteador local contra as decisões do LLM")
+    parser.add_argument("registro", help="Arquivo JSONL de decisões (ex: hospital_system/roteamento_log.jsonl)")
+    parser.add_argument("--margens", type=float, nargs="+", default=[0.05, 0.1, 0.15, 0.2, 0.3],
+                        help="Margens mínimas a comparar (padrão: 0.05 0.1 0.15 0.2 0.3)")
+    args = parser.parse_args()
+
+    registros = carregar_registro(args.registro)
+    print(f"{'margem':>7} {'cobertura':>10} {'acurácia local':>15} {'acurácia total':>15} {'economia ms/turno':>18}")
+    for margem in args.margens:
+        r = benchmark(registros, margem_minima=margem)
+        print(f"{margem:>7.2f} {r['cobertura']:>10.1%} {r['acuracia_decididos']:>15.1%} "
+              f"{r['acuracia_total']:>15.1%} {r['economia_ms_por_turno']:>18.0f}")
+    print(f"📊 {r['treino']} decisões de treino, {r['teste']} de teste; "
+          f"local {r['latencia_local_us']:.0f} µs/decisão, LLM {r['latencia_llm_ms']:.0f} ms (mediana)")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
 import os
 import functools
+import inspect
 import operator
-from typing import Annotated, Sequence, TypedDict, Union, Literal
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Annotated, Dict, List, Optional, Sequence, TypedDict, Union, Literal
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, END, START
+from langgraph.types import Send
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from clientes_llm import obter_llm, obter_vinculado
+from executor_ferramentas import ExecutorFerramentas
+from roteador_local import RoteadorLocal, SupervisorHibrido
+
 # Carrega chaves
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts/.env"))
 
@@ -18,9 +29,10 @@ load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts/.e
 import skyflow_airline.tools as airline_tools
 
 @tool
-def search_flights(origin: str, destination: str):
-    """Procura voos disponíveis entre duas cidades. Cidades válidas: São Paulo, Rio de Janeiro, Paris, Londres, Nova York, Tóquio."""
-    return airline_tools.search_flights(origin, destination)
+def search_flights(origin: str, destination: str, date_str: str = "", max_price: float = 0):
+    """Procura voos disponíveis entre duas cidades. Cidades válidas: São Paulo, Rio de Janeiro, Paris, Londres, Nova York, Tóquio.
+    Opcional: date_str (DD/MM/AAAA) para um dia específico e max_price (R$) como preço máximo."""
+    return airline_tools.search_flights(origin, destination, date_str, max_price)
 
 @tool
 def check_flight_status(flight_number: str):
@@ -38,7 +50,7 @@ class AgentState(TypedDict):
     next: str
 
 # 3. Helper para criar agentes especialistas
-def create_agent(llm: ChatGoogleGenerativeAI, tools: list, system_prompt: str):
+def create_agent(llm, tools: list, system_prompt: str):
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
@@ -47,26 +59,36 @@ def create_agent(llm: ChatGoogleGenerativeAI, tools: list, system_prompt: str):
     agent = prompt | llm.bind_tools(tools)
     return agent
 
-# 4. Implementação dos Agentes
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+# 4. LLM e agentes sob demanda: o cliente é criado no primeiro uso e
+# compartilhado (clientes_llm.py); os vínculos de ferramentas são feitos uma vez
+ALL_TOOLS = [search_flights, check_flight_status, create_support_ticket]
 
-# Agente de Reservas
-booking_agent = create_agent(
-    llm, [search_flights],
-    "Você é o Consultor de Reservas da SkyFlow. Ajude os clientes a encontrar os melhores voos."
-)
+def get_llm():
+    return obter_llm("gemini-2.0-flash")
 
-# Agente de Informação
-info_agent = create_agent(
-    llm, [check_flight_status],
-    "Você é o Especialista em Voos da SkyFlow. Forneça atualizações precisas sobre status e portões."
-)
+def get_llm_with_tools():
+    return obter_vinculado("skyflow:tools", lambda: get_llm().bind_tools(ALL_TOOLS))
 
-# Agente de Suporte
-support_agent = create_agent(
-    llm, [create_support_ticket],
-    "Você é o Especialista de Suporte da SkyFlow. Seja empático e resolva os problemas dos clientes."
-)
+AGENT_SPECS = {
+    # Agente de Reservas
+    "Booking": (
+        [search_flights],
+        "Você é o Consultor de Reservas da SkyFlow. Ajude os clientes a encontrar os melhores voos."
+    ),
+    # Agente de Informação
+    "FlightInfo": (
+        [check_flight_status],
+        "Você é o Especialista em Voos da SkyFlow. Forneça atualizações precisas sobre status e portões."
+    ),
+    # Agente de Suporte
+    "Support": (
+        [create_support_ticket],
+        "Você é o Especialista de Suporte da SkyFlow. Seja empático e resolva os problemas dos clientes."
+    ),
+}
+
+def get_agent(name):
+    return obter_vinculado(f"skyflow:agent:{name}", lambda: create_agent(get_llm(), *AGENT_SPECS[name]))
 
 # 5. Agente Supervisor (Roteador)
 members = ["Booking", "FlightInfo", "Support"]
@@ -82,7 +104,7 @@ class Router(BaseModel):
         description="O próximo trabalhador a agir ou FINISH se concluído."
     )
 
-def supervisor_agent(state):
+def _build_supervisor_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         MessagesPlaceholder(variable_name="messages"),
@@ -92,8 +114,10 @@ def supervisor_agent(state):
             " Escolha um de: FINISH, Booking, FlightInfo, Support",
         ),
     ])
+    return prompt | get_llm().with_structured_output(Router)
 
-    chain = prompt | llm.with_structured_output(Router)
+def supervisor_agent(state):
+    chain = obter_vinculado("skyflow:supervisor", _build_supervisor_chain)
     result = chain.invoke(state)
     
     # Garantindo que retornamos um dicionário com a chave 'next'
@@ -105,56 +129,428 @@ def supervisor_agent(state):
         # Fallback de segurança
         return {"next": "FINISH"}
 
+# Executor das chamadas de ferramenta (paralelas, com timeout)
+tool_executor = ExecutorFerramentas(airline_tools.TOOLS, timeout=15.0)
+
+# 5a. Roteador local: decide em microssegundos quando está confiante e só
+# chama o supervisor LLM nos casos duvidosos (cujas decisões viram treino)
+ROUTING_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "roteamento_log.jsonl")
+
+seed_routes = [
+    ("Quero voos de São Paulo para Paris", "Booking"),
+    ("Procuro passagem para Londres", "Booking"),
+    ("Tem voo do Rio para Nova York?", "Booking"),
+    ("Qual o status do voo SF101?", "FlightInfo"),
+    ("Meu voo está atrasado?", "FlightInfo"),
+    ("Qual o portão do SF202?", "FlightInfo"),
+    ("Minha bagagem foi extraviada", "Support"),
+    ("Quero pedir reembolso", "Support"),
+    ("Quero fazer uma reclamação", "Support"),
+    ("Obrigado, era só isso", "FINISH"),
+    ("Obrigada", "FINISH"),
+    ("Valeu, tchau", "FINISH"),
+    ("Não preciso de mais nada", "FINISH"),
+]
+
+fast_supervisor = SupervisorHibrido(
+    RoteadorLocal(["FINISH", "Booking", "FlightInfo", "Support"]),
+    supervisor_agent,
+    caminho_registro=ROUTING_LOG,
+    exemplos_iniciais=seed_routes,
+    # O texto das mensagens só vai para o registro se ROUTING_LOG_TEXT=1
+    registrar_texto=os.getenv("ROUTING_LOG_TEXT") == "1",
+)
+
+# 5b. Modo de chamada única: roteamento + primeira decisão de ferramenta juntos
+class RoutedTurn(BaseModel):
+    """Trabalhador escolhido e sua primeira ação."""
+    next: Literal["FINISH", "Booking", "FlightInfo", "Support"] = Field(
+        description="O trabalhador que atende o cliente ou FINISH."
+    )
+    tool: Optional[Literal["search_flights", "check_flight_status", "create_support_ticket"]] = Field(
+        default=None, description="Ferramenta a executar, se necessária para responder."
+    )
+    origin: Optional[str] = Field(default=None, description="search_flights: cidade de origem.")
+    destination: Optional[str] = Field(default=None, description="search_flights: cidade de destino.")
+    date_str: Optional[str] = Field(default=None, description="search_flights (opcional): data do voo, DD/MM/AAAA.")
+    max_price: Optional[float] = Field(default=None, description="search_flights (opcional): preço máximo em R$.")
+    flight_number: Optional[str] = Field(default=None, description="check_flight_status: número do voo.")
+    complaint_type: Optional[str] = Field(default=None, description="create_support_ticket: tipo do problema.")
+    details: Optional[str] = Field(default=None, description="create_support_ticket: detalhes do problema.")
+    answer: str = Field(
+        default="", description="Resposta ao cliente quando nenhuma ferramenta é necessária."
+    )
+
+single_call_prompt = (
+    system_prompt
+    + " Booking é o Consultor de Reservas (usa search_flights; cidades válidas: São Paulo,"
+    " Rio de Janeiro, Paris, Londres, Nova York, Tóquio);"
+    " FlightInfo é o Especialista em Voos (usa check_flight_status);"
+    " Support é o Especialista de Suporte, empático (usa create_support_ticket)."
+    " Escolha o trabalhador e, falando como ele, decida: se precisar de uma ferramenta,"
+    " preencha tool e os argumentos dela; senão, escreva a resposta ao cliente em answer."
+)
+
+def _build_single_call_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", single_call_prompt),
+        MessagesPlaceholder(variable_name="messages"),
+    ])
+    return prompt | get_llm().with_structured_output(RoutedTurn)
+
+def route_and_act(state) -> RoutedTurn:
+    chain = obter_vinculado("skyflow:single_call", _build_single_call_chain)
+    return chain.invoke(state)
+
 # 6. Definindo os Nodos (Funções de execução)
 def agent_node(state, agent, name):
     result = agent.invoke(state)
     return {"messages": [result]}
 
+# 7. Grafo compilado (caminho de produção)
+# supervisor -> especialistas em paralelo (um por intenção independente) -> compose.
+# O checkpointer guarda a conversa por thread_id; cada nó registra seu tempo e
+# respeita o orçamento de latência do turno.
+def _merge_timings(current, new):
+    # None no input zera os tempos do turno anterior
+    return {} if new is None else {**(current or {}), **new}
+
+def _append_partials(current, new):
+    return [] if new is None else (current or []) + new
+
+class SkyFlowGraphState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], operator.add]
+    intents: List[str]
+    partials: Annotated[List[dict], _append_partials]
+    timings: Annotated[Dict[str, float], _merge_timings]
+    deadline: float
+    answer: str
+
+def _timed(name, node):
+    @functools.wraps(node)
+    def wrapper(state):
+        start = time.perf_counter()
+        update = node(state)
+        update["timings"] = {name: (time.perf_counter() - start) * 1000}
+        return update
+    return wrapper
+
+# As chamadas ao modelo nos nós rodam neste pool para que o orçamento do turno
+# seja um timeout de verdade (o contexto é copiado: o streaming de tokens segue
+# funcionando). Uma chamada que estoura continua na sua thread; só o resultado
+# dela é descartado.
+_deadline_pool = ContextThreadPoolExecutor(max_workers=16, thread_name_prefix="skyflow-no")
+
+def _before_deadline(state, fn, *args):
+    """fn(*args) limitado ao tempo que resta do turno; TimeoutError se esgotar."""
+    remaining = state["deadline"] - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError
+    try:
+        return _deadline_pool.submit(fn, *args).result(timeout=remaining)
+    except FuturesTimeout:
+        raise TimeoutError
+
+_INTENT_SPLIT = re.compile(r"[,;?!]|\s+e\s+|\btambém\b", re.IGNORECASE)
+
+def detect_intents(text):
+    """Intenções independentes de uma mensagem ("status do SF101 e voos para Paris").
+
+    Cada trecho da mensagem passa pelo roteador local; só há fan-out quando
+    dois ou mais trechos têm rótulos diferentes com confiança alta.
+    """
+    intents = []
+    for part in _INTENT_SPLIT.split(text):
+        if len(part.split()) < 2:
+            continue
+        label, _ = fast_supervisor.roteador.prever(part)
+        if label in members and label not in intents:
+            intents.append(label)
+    return intents
+
+def supervisor_node(state):
+    intents = detect_intents(state["messages"][-1].content)
+    if len(intents) < 2:
+        intents = [fast_supervisor(state)["next"]]
+    return {"intents": intents}
+
+def route_intents(state):
+    targets = [name for name in state["intents"] if name in members]
+    if not targets:
+        return "compose"
+    return [Send(name, state) for name in targets]
+
+def specialist_node(name):
+    def work(state):
+        resp = get_agent(name).invoke({"messages": state["messages"], "agent_scratchpad": []})
+        if resp.tool_calls:
+            tool_messages = tool_executor.executar(resp.tool_calls)
+            return {"agent": name, "tools": [(m.name, m.content) for m in tool_messages]}
+        return {"agent": name, "text": resp.text}
+
+    def node(state):
+        try:
+            return {"partials": [_before_deadline(state, work, state)]}
+        except TimeoutError:
+            return {"partials": [{"agent": name, "text": "Não foi possível concluir esta parte a tempo."}]}
+    return node
+
+def compose_node(state):
+    partials = state["partials"]
+    if len(partials) == 1 and "text" in partials[0]:
+        # Um especialista respondeu direto: nenhuma chamada extra
+        answer = partials[0]["text"]
+    else:
+        results = []
+        for partial in partials:
+            for t_name, content in partial.get("tools", []):
+                results.append(f"[{partial['agent']}] {t_name}: {content}")
+            if partial.get("text"):
+                results.append(f"[{partial['agent']}] {partial['text']}")
+        messages = list(state["messages"])
+        if results:
+            messages.append(HumanMessage(content=(
+                "Resultados dos especialistas:\n" + "\n".join(results)
+                + "\nPor favor, responda ao cliente em uma única mensagem."
+            )))
+        try:
+            answer = _before_deadline(state, lambda: get_llm().invoke(messages).text)
+        except TimeoutError:
+            # Orçamento esgotado: entrega os resultados brutos dos especialistas
+            answer = "\n\n".join(results) or "Desculpe, não consegui responder a tempo. Pode repetir?"
+    return {"answer": answer, "messages": [AIMessage(content=answer)]}
+
+def build_graph():
+    from langgraph.checkpoint.memory import MemorySaver
+
+    workflow = StateGraph(SkyFlowGraphState)
+    workflow.add_node("supervisor", _timed("supervisor", supervisor_node))
+    for name in members:
+        workflow.add_node(name, _timed(name, specialist_node(name)))
+        workflow.add_edge(name, "compose")
+    workflow.add_node("compose", _timed("compose", compose_node))
+
+    workflow.add_edge(START, "supervisor")
+    # Fan-out: um especialista por intenção, todos no mesmo passo
+    workflow.add_conditional_edges("supervisor", route_intents, members + ["compose"])
+    workflow.add_edge("compose", END)
+    return workflow.compile(checkpointer=MemorySaver())
+
+def get_graph():
+    return obter_vinculado("skyflow:graph", build_graph)
+
+# Conversas com checkpoint no MemorySaver: as ociosas há mais de THREAD_TTL_S
+# e as mais antigas além de MAX_THREADS são apagadas, para a memória do
+# servidor não crescer sem limite
+MAX_THREADS = 500
+THREAD_TTL_S = 2 * 3600
+_threads = OrderedDict()
+_threads_lock = threading.Lock()
+
+def forget_thread(thread_id):
+    """Apaga o checkpoint de uma conversa."""
+    with _threads_lock:
+        _threads.pop(thread_id, None)
+    get_graph().checkpointer.delete_thread(thread_id)
+
+def _touch_thread(thread_id):
+    """Marca a conversa como usada agora e apaga as expiradas/excedentes."""
+    now = time.monotonic()
+    expired = []
+    with _threads_lock:
+        _threads.pop(thread_id, None)
+        _threads[thread_id] = now
+        while _threads:
+            oldest, last_used = next(iter(_threads.items()))
+            if len(_threads) <= MAX_THREADS and now - last_used <= THREAD_TTL_S:
+                break
+            _threads.popitem(last=False)
+            expired.append(oldest)
+    for old in expired:
+        get_graph().checkpointer.delete_thread(old)
+
 # Simplificação radical para o Streamlit (usando LangChain padrão p/ facilitar visualização)
 class SkyFlowTeam:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
+    def __init__(self, single_call=False, local_router=True, use_graph=True,
+                 latency_budget_s=30.0, recursion_limit=10):
+        """
+        Args:
+            use_graph: Executa pelo grafo compilado (padrão): intenções
+                independentes em paralelo, checkpoint por thread_id e tempo por nó
+            latency_budget_s: Orçamento de tempo do turno no grafo; é o timeout
+                das chamadas ao modelo nos nós, que ao estourar respondem com o
+                que já têm
+            recursion_limit: Máximo de passos do grafo por turno
+            single_call: Roteia e decide a ferramenta em uma única chamada ao
+                modelo; o resultado da ferramenta só volta ao modelo quando
+                uma ferramenta é usada (1 ou 2 chamadas por mensagem, em vez de 2 ou 3).
+            local_router: Usa o roteador local (roteador_local.py) antes do
+                supervisor LLM no fluxo sem grafo (o grafo sempre usa)
+        """
+        self.single_call = single_call
+        self.local_router = local_router
+        self.use_graph = use_graph
+        self.latency_budget_s = latency_budget_s
+        self.recursion_limit = recursion_limit
+        self.last_timings = {}
         self.agents = {
-            "Booking": {"agent": booking_agent, "icon": "🎟️"},
-            "FlightInfo": {"agent": info_agent, "icon": "✈️"},
-            "Support": {"agent": support_agent, "icon": "🛠️"}
+            "Booking": {"icon": "🎟️"},
+            "FlightInfo": {"icon": "✈️"},
+            "Support": {"icon": "🛠️"}
         }
+
+    @property
+    def llm(self):
+        return get_llm()
     
-    def run(self, user_input, history=[]):
+    def run(self, user_input, history=[], thread_id="default"):
+        agent_name, stream, icon = self.run_stream(user_input, history, thread_id)
+        return agent_name, "".join(stream), icon
+
+    def run_stream(self, user_input, history=[], thread_id="default"):
+        """Roteia a solicitação e devolve (agente, gerador de trechos da resposta, ícone).
+
+        Só o supervisor roda antes do retorno; a resposta é gerada token a
+        token enquanto o gerador é consumido (ex: st.write_stream).
+        """
         try:
             # Primeiro, o supervisor decide
             state = {"messages": history + [HumanMessage(content=user_input)]}
-            route = supervisor_agent(state)
+            if self.single_call:
+                return self._run_single_call(state)
+            if self.use_graph:
+                return self._run_graph(user_input, history, thread_id)
+            route = (fast_supervisor if self.local_router else supervisor_agent)(state)
             next_agent = route["next"]
-            
-            print(f"Supervisor roteou para: {next_agent}")
-            
-            if next_agent == "FINISH" or next_agent not in self.agents:
-                # O próprio Supervisor responde ou pede pro último repetir
-                resp = self.llm.invoke(state["messages"])
-                return "Supervisor", resp.content, "🧑‍✈️"
-            
-            # O especialista selecionado responde
-            agent_data = self.agents[next_agent]
-            tools_list = [search_flights, check_flight_status, create_support_ticket]
-            llm_with_tools = self.llm.bind_tools(tools_list)
-            
-            resp = llm_with_tools.invoke(state["messages"])
-            
-            # Processamento de ferramentas (se houver)
-            if hasattr(resp, 'tool_calls') and resp.tool_calls:
-                for tool_call in resp.tool_calls:
-                    t_name = tool_call['name']
-                    t_args = tool_call['args']
-                    if t_name in airline_tools.TOOLS:
-                        print(f"Executando ferramenta: {t_name}")
-                        f_resp = airline_tools.TOOLS[t_name](**t_args)
-                        final_resp = self.llm.invoke(state["messages"] + [resp, HumanMessage(content=f"Resultado da ferramenta {t_name}: {f_resp}. Por favor, responda ao cliente.")])
-                        return next_agent, final_resp.content, agent_data["icon"]
-            
-            return next_agent, resp.content, agent_data["icon"]
         except Exception as e:
             print(f"ERRO NO RUN: {e}")
             import traceback
             traceback.print_exc()
-            return "Erro", f"Desculpe, ocorreu um erro interno: {e}", "⚠️"
+            return "Erro", iter([f"Desculpe, ocorreu um erro interno: {e}"]), "⚠️"
+
+        print(f"Supervisor roteou para: {next_agent}")
+
+        if next_agent == "FINISH" or next_agent not in self.agents:
+            # O próprio Supervisor responde ou pede pro último repetir
+            return "Supervisor", self._stream_answer(state["messages"]), "🧑‍✈️"
+
+        # O especialista selecionado responde
+        agent_data = self.agents[next_agent]
+        return next_agent, self._stream_with_tools(state["messages"]), agent_data["icon"]
+
+    def reset(self, thread_id):
+        """Esquece a conversa (checkpoint do grafo) de um thread_id."""
+        if self.use_graph:
+            forget_thread(thread_id)
+
+    def _run_graph(self, user_input, history, thread_id):
+        graph = get_graph()
+        _touch_thread(thread_id)
+        config = {"configurable": {"thread_id": thread_id}, "recursion_limit": self.recursion_limit}
+        # O checkpoint já tem a conversa desta thread; senão, parte do histórico da interface
+        saved = graph.get_state(config).values.get("messages")
+        inputs = {
+            "messages": (history if not saved else []) + [HumanMessage(content=user_input)],
+            "intents": [],
+            "partials": None,
+            "timings": None,
+            "deadline": time.monotonic() + self.latency_budget_s,
+            "answer": "",
+        }
+        events = graph.stream(inputs, config, stream_mode=["updates", "messages"])
+
+        intents = []
+        for mode, data in events:
+            if mode == "updates" and "supervisor" in data:
+                intents = data["supervisor"]["intents"]
+                break
+        print(f"Supervisor roteou para: {intents}")
+
+        agents = [name for name in intents if name in self.agents]
+        if len(agents) == 1:
+            agent_name, icon = agents[0], self.agents[agents[0]]["icon"]
+        elif agents:
+            agent_name, icon = " + ".join(agents), "🧑‍✈️"
+        else:
+            agent_name, icon = "Supervisor", "🧑‍✈️"
+        return agent_name, self._graph_tokens(events, graph, config), icon
+
+    def _graph_tokens(self, events, graph, config):
+        """Tokens do nó compose; se ele não chamou o modelo (ou estourou o
+        orçamento no meio da resposta), a resposta pronta."""
+        streamed = ""
+        try:
+            for mode, data in events:
+                if mode == "messages":
+                    chunk, metadata = data
+                    if metadata.get("langgraph_node") == "compose" and chunk.text:
+                        streamed += chunk.text
+                        yield chunk.text
+                elif mode == "updates" and "compose" in data:
+                    answer = data["compose"]["answer"]
+                    if not streamed:
+                        yield answer
+                    elif answer.strip() != streamed.strip():
+                        yield "\n\n" + answer
+            self.last_timings = graph.get_state(config).values.get("timings", {})
+            print("Tempo por nó (ms):", {n: round(ms) for n, ms in self.last_timings.items()})
+        except Exception as e:
+            print(f"ERRO NO RUN: {e}")
+            yield f"Desculpe, ocorreu um erro interno: {e}"
+
+    def _run_single_call(self, state):
+        decision = route_and_act(state)
+        print(f"Supervisor roteou para: {decision.next} (ferramenta: {decision.tool})")
+        if decision.next in self.agents:
+            agent_name, icon = decision.next, self.agents[decision.next]["icon"]
+        else:
+            agent_name, icon = "Supervisor", "🧑‍✈️"
+
+        if decision.tool in airline_tools.TOOLS:
+            func = airline_tools.TOOLS[decision.tool]
+            params = inspect.signature(func).parameters
+            t_args = {p: getattr(decision, p) for p, param in params.items() if param.default is param.empty}
+            if None in t_args.values():
+                # Argumentos incompletos: volta ao fluxo com ferramentas do LangChain
+                return agent_name, self._stream_with_tools(state["messages"]), icon
+            # Opcionais (data, preço máximo) só quando o modelo os preencheu
+            t_args.update({p: getattr(decision, p) for p, param in params.items()
+                           if param.default is not param.empty and getattr(decision, p, None) is not None})
+            print(f"Executando ferramenta: {decision.tool}")
+            f_resp = func(**t_args)
+            return agent_name, self._stream_answer(state["messages"] + [HumanMessage(content=f"Resultado da ferramenta {decision.tool}: {f_resp}. Por favor, responda ao cliente.")]), icon
+
+        if decision.answer:
+            return agent_name, iter([decision.answer]), icon
+        return agent_name, self._stream_answer(state["messages"]), icon
+
+    def _stream_answer(self, messages):
+        try:
+            for chunk in self.llm.stream(messages):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            print(f"ERRO NO RUN: {e}")
+            yield f"Desculpe, ocorreu um erro interno: {e}"
+
+    def _stream_with_tools(self, messages):
+        """Transmite a resposta; se o modelo pedir ferramentas, executa todas e transmite a resposta final."""
+        try:
+            llm_with_tools = get_llm_with_tools()
+
+            resp = None
+            for chunk in llm_with_tools.stream(messages):
+                resp = chunk if resp is None else resp + chunk
+                if chunk.text:
+                    yield chunk.text
+
+            # Processamento de ferramentas (se houver)
+            if resp is not None and resp.tool_calls:
+                # Todas as ferramentas pedidas rodam em paralelo e os resultados
+                # voltam ao modelo em uma única chamada
+                print(f"Executando ferramentas: {[c['name'] for c in resp.tool_calls]}")
+                tool_messages = tool_executor.executar(resp.tool_calls)
+                yield from self._stream_answer(messages + [resp] + tool_messages)
+        except Exception as e:
+            print(f"ERRO NO RUN: {e}")
+            yield f"Desculpe, ocorreu um erro interno: {e}"
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import sys
+import uuid
 
 # Adiciona o diretório base ao path para facilitar imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -45,6 +46,10 @@ if "team" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Identifica a conversa no checkpoint do grafo
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = str(uuid.uuid4())
+
 # Sidebar - Informações da Empresa
 with st.sidebar:
     st.title("✈️ SkyFlow Airlines")
@@ -61,8 +66,14 @@ with st.sidebar:
         st.write("Dedicado a resolver qualquer imprevisto com sua viagem ou bagagem.")
     
     st.markdown("---")
+    st.session_state.team.single_call = st.toggle(
+        "⚡ Modo rápido", value=False,
+        help="Roteamento e decisão de ferramenta em uma única chamada ao modelo."
+    )
     if st.button("Limpar Conversa"):
         st.session_state.messages = []
+        st.session_state.team.reset(st.session_state.thread_id)
+        st.session_state.thread_id = str(uuid.uuid4())
         st.rerun()
 
 # Layout Principal
@@ -88,23 +99,28 @@ if prompt := st.chat_input("Como posso ajudar com sua viagem hoje?"):
     with st.chat_message("user"):
         st.markdown(prompt)
     
-    # Processamento com a Equipe
+    # Processamento com a Equipe: o spinner cobre só o roteamento
     with st.spinner("A equipa SkyFlow está a analisar o seu pedido..."):
         # Prepara histórico para os agentes
         history = st.session_state.messages
         # Roda o sistema multi-agente
-        agent_name, response, icon = st.session_state.team.run(prompt, history)
-        
-        # Renderiza resposta do assistente
-        with st.chat_message("assistant", avatar=icon):
-            st.markdown(f"**{agent_name}**")
-            st.markdown(response)
-        
-        # Salva no histórico
-        st.session_state.messages.append(HumanMessage(content=prompt))
-        st.session_state.messages.append(
-            AIMessage(
-                content=response, 
-                additional_kwargs={"agent_name": agent_name, "icon": icon}
-            )
+        agent_name, stream, icon = st.session_state.team.run_stream(
+            prompt, history, thread_id=st.session_state.thread_id
+        )
+    
+    # Renderiza a resposta do assistente à medida que é gerada
+    with st.chat_message("assistant", avatar=icon):
+        st.markdown(f"**{agent_name}**")
+        response = st.write_stream(stream)
+        timings = st.session_state.team.last_timings
+        if timings and not st.session_state.team.single_call:
+            st.caption(" · ".join(f"{node}: {ms:.0f} ms" for node, ms in timings.items()))
+    
+    # Salva no histórico
+    st.session_state.messages.append(HumanMessage(content=prompt))
+    st.session_state.messages.append(
+        AIMessage(
+            content=response, 
+            additional_kwargs={"agent_name": agent_name, "icon": icon}
         )
+    )
@@ -1,28 +1,207 @@
 import random
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, datetime, timedelta
 
-def search_flights(origin: str, destination: str):
-    """Procura voos entre duas cidades."""
-    cities = ["São Paulo", "Rio de Janeiro", "Paris", "Londres", "Nova York", "Tóquio"]
-    if origin not in cities or destination not in cities:
+import numpy as np
+
+from tokenizacao import remover_acentos
+
+CITIES = ["São Paulo", "Rio de Janeiro", "Paris", "Londres", "Nova York", "Tóquio"]
+
+# Duração aproximada (minutos) entre cada par de cidades, na ordem de CITIES
+DURATIONS = np.array([
+    [0, 60, 690, 705, 600, 1440],
+    [60, 0, 675, 690, 600, 1470],
+    [690, 675, 0, 75, 480, 840],
+    [705, 690, 75, 0, 450, 840],
+    [600, 600, 480, 450, 0, 840],
+    [1440, 1470, 840, 840, 840, 0],
+], dtype=np.int32)
+
+STATUSES = np.array(["No horário", "Atrasado", "Cancelado", "Embarque Próximo"])
+STATUS_WEIGHTS = np.array([0.7, 0.18, 0.04, 0.08])
+GATES = np.array(["A1", "A4", "B12", "B7", "C5", "C9", "D20", "D3"])
+
+
+def _normalize(text: str) -> str:
+    return remover_acentos(text.strip().lower())
+
+
+def _parse_date(text: str, today: date) -> date:
+    """Aceita AAAA-MM-DD, DD/MM/AAAA ou DD/MM (ano corrente)."""
+    text = text.strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    return datetime.strptime(f"{text}/{today.year}", "%d/%m/%Y").date()
+
+
+def _uniform(seed: int, salt: int, keys: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Uniforme em (0, 1] determinística por (semente, voo da tabela, dia do calendário)."""
+    with np.errstate(over="ignore"):
+        x = keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        x ^= days.astype(np.uint64) * np.uint64(0xBF58476D1CE4E5B9)
+        x ^= np.uint64((seed * 0x100 + salt) & 0xFFFFFFFFFFFFFFFF)
+        # Finalizador splitmix64
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return ((x >> np.uint64(11)).astype(np.float64) + 1.0) / 2.0 ** 53
+
+
+class FlightInventory:
+    """Inventário de voos em memória, com armazenamento colunar e índice por rota.
+
+    Cada rota (origem, destino) tem alguns horários fixos; cada horário gera um
+    voo por dia no horizonte. As colunas (rota, dia, horário, preço, assentos)
+    ficam em arrays NumPy ordenados por rota e dia, e o índice rota -> faixa de
+    linhas permite filtrar datas com busca binária e preços com uma máscara.
+    O simulador é determinístico para uma mesma semente: preço e assentos de
+    um voo dependem só do voo e da data do calendário, então recriar o
+    inventário com outro start (janela que avança a cada dia) não muda os
+    voos já vistos.
+    """
+
+    def __init__(self, seed: int = 42, days: int = 90, start: date = None):
+        """
+        Args:
+            seed: Semente do simulador (mesma semente, mesmo inventário)
+            days: Horizonte de dias com voos a partir de start
+            start: Primeiro dia do inventário (padrão: hoje)
+        """
+        self.seed = seed
+        self.days = days
+        self.start = start or date.today()
+        self._city_ids = {_normalize(c): i for i, c in enumerate(CITIES)}
+        rng = np.random.default_rng(seed)
+
+        # Horários fixos (tabela de voos): 2 a 4 por rota
+        sched_route, sched_minute, sched_base = [], [], []
+        for o in range(len(CITIES)):
+            for d in range(len(CITIES)):
+                if o == d:
+                    continue
+                for minute in np.sort(rng.choice(np.arange(6 * 60, 23 * 60, 15), rng.integers(2, 5), replace=False)):
+                    sched_route.append(o * len(CITIES) + d)
+                    sched_minute.append(minute)
+                    sched_base.append(150 + DURATIONS[o, d] * rng.uniform(1.2, 2.0))
+        self.sched_route = np.array(sched_route, dtype=np.int16)
+        self.sched_minute = np.array(sched_minute, dtype=np.int16)
+        self.sched_base = np.array(sched_base, dtype=np.float32)
+        self.sched_number = np.array([f"SF{100 + i}" for i in range(len(sched_route))])
+        self._number_ids = {n: i for i, n in enumerate(self.sched_number)}
+
+        # Voos (horário x dia), ordenados por rota, dia e horário
+        n_sched = len(self.sched_route)
+        sched = np.repeat(np.arange(n_sched, dtype=np.int32), days)
+        day = np.tile(np.arange(days, dtype=np.int16), n_sched)
+        order = np.lexsort((self.sched_minute[sched], day, self.sched_route[sched]))
+        self.sched = sched[order]
+        self.day = day[order]
+        self.route = self.sched_route[self.sched]
+        calendar_day = self.day.astype(np.int64) + self.start.toordinal()
+        u1, u2, u3 = (_uniform(seed, salt, self.sched, calendar_day) for salt in range(3))
+        demand = np.exp(0.25 * np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2))  # lognormal(0, 0.25)
+        self.price = np.round(self.sched_base[self.sched] * demand).astype(np.int32)
+        self.seats = np.minimum(u3 * 180, 179).astype(np.int16)
+
+        # Índice rota -> [início, fim) das linhas
+        bounds = np.searchsorted(self.route, np.arange(len(CITIES) ** 2 + 1))
+        self._route_slices = {r: (bounds[r], bounds[r + 1]) for r in range(len(CITIES) ** 2) if bounds[r] < bounds[r + 1]}
+
+    def city_id(self, name: str):
+        return self._city_ids.get(_normalize(name))
+
+    def search(self, origin: str, destination: str, date_from: date = None, date_to: date = None,
+               max_price: float = None, limit: int = 5, now: datetime = None):
+        """Voos futuros com assentos livres na rota, no intervalo de datas e até o preço máximo."""
+        o, d = self.city_id(origin), self.city_id(destination)
+        if o is None or d is None or o == d:
+            return None
+        now = now or datetime.now()
+        today = (now.date() - self.start).days
+        lo, hi = self._route_slices[o * len(CITIES) + d]
+        days = self.day[lo:hi]
+        first = today if date_from is None else (date_from - self.start).days
+        last = self.days - 1 if date_to is None else (date_to - self.start).days
+        lo, hi = lo + np.searchsorted(days, max(first, today, 0), "left"), lo + np.searchsorted(days, last, "right")
+
+        mask = self.seats[lo:hi] > 0
+        if lo < hi and self.day[lo] == today:
+            # Voos de hoje que já partiram
+            mask &= (self.day[lo:hi] != today) | (self.sched_minute[self.sched[lo:hi]] > now.hour * 60 + now.minute)
+        if max_price:
+            mask &= self.price[lo:hi] <= max_price
+        rows = lo + np.flatnonzero(mask)[:limit]
+        return [self._flight(i) for i in rows]
+
+    def _flight(self, i: int) -> dict:
+        s = self.sched[i]
+        o, d = divmod(int(self.sched_route[s]), len(CITIES))
+        duration = int(DURATIONS[o, d])
+        return {
+            "flight": str(self.sched_number[s]),
+            "date": self.start + timedelta(days=int(self.day[i])),
+            "time": f"{self.sched_minute[s] // 60:02d}:{self.sched_minute[s] % 60:02d}",
+            "duration": f"{duration // 60}h" + (f" {duration % 60}m" if duration % 60 else ""),
+            "price": int(self.price[i]),
+            "seats": int(self.seats[i]),
+        }
+
+    def status(self, flight_number: str, on: date = None):
+        """Status e portão simulados, estáveis para o mesmo voo e dia."""
+        s = self._number_ids.get(flight_number.strip().upper())
+        if s is None:
+            return None
+        rng = np.random.default_rng([self.seed, s, (on or date.today()).toordinal()])
+        return str(rng.choice(STATUSES, p=STATUS_WEIGHTS)), str(rng.choice(GATES))
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory() -> FlightInventory:
+    """Inventário compartilhado, criado no primeiro uso e recriado quando o dia muda
+    (a janela de voos sempre começa hoje)."""
+    global _inventory
+    today = date.today()
+    if _inventory is None or _inventory.start != today:
+        with _inventory_lock:
+            if _inventory is None or _inventory.start != today:
+                _inventory = FlightInventory(start=today)
+    return _inventory
+
+
+def search_flights(origin: str, destination: str, date_str: str = "", max_price: float = 0):
+    """Procura voos entre duas cidades, opcionalmente em uma data e até um preço máximo."""
+    inventory = get_inventory()
+    on = None
+    if date_str:
+        try:
+            on = _parse_date(date_str, inventory.start)
+        except ValueError:
+            return f"Data inválida: {date_str}. Use DD/MM/AAAA."
+    flights = inventory.search(origin, destination, date_from=on, date_to=on, max_price=max_price or None)
+    if flights is None:
         return f"Desculpe, não operamos voos entre {origin} e {destination} no momento."
-    
-    flights = [
-        {"flight": "SF101", "price": random.randint(300, 1500), "time": "10:00", "duration": "12h"},
-        {"flight": "SF202", "price": random.randint(400, 2000), "time": "15:30", "duration": "11h 30m"},
-        {"flight": "SF303", "price": random.randint(500, 2500), "time": "22:15", "duration": "13h"},
-    ]
+    if not flights:
+        return f"Não há voos disponíveis de {origin} para {destination} com esses critérios."
+
     return f"Encontrei os seguintes voos de {origin} para {destination}:\n" + \
-           "\n".join([f"- {f['flight']}: R$ {f['price']} às {f['time']} (Duração: {f['duration']})" for f in flights])
+           "\n".join([f"- {f['flight']}: R$ {f['price']} em {f['date']:%d/%m} às {f['time']} (Duração: {f['duration']}, {f['seats']} assentos)" for f in flights])
 
 def check_flight_status(flight_number: str):
     """Verifica o status e o portão de um voo específico."""
-    statuses = ["No horário", "Atrasado", "Cancelado", "Embarque Próximo"]
-    gates = ["A1", "B12", "C5", "D20", "Portão não definido"]
-    
-    status = random.choice(statuses)
-    gate = random.choice(gates)
-    
+    result = get_inventory().status(flight_number)
+    if result is None:
+        return f"Voo {flight_number} não encontrado."
+    status, gate = result
     return f"Voo {flight_number}:\nStatus: {status}\nPortão: {gate}"
 
 def create_support_ticket(complaint_type: str, details: str):
@@ -36,3 +215,20 @@ TOOLS = {
     "check_flight_status": check_flight_status,
     "create_support_ticket": create_support_ticket
 }
+
+
+if __name__ == "__main__":
+    # Vazão de busca (python -m skyflow_airline.tools)
+    start = time.perf_counter()
+    inventory = get_inventory()
+    print(f"Inventário: {len(inventory.day)} voos em {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = random.Random(0)
+    n = 20_000
+    start = time.perf_counter()
+    for _ in range(n):
+        o, d = rng.sample(CITIES, 2)
+        first = inventory.start + timedelta(days=rng.randrange(60))
+        inventory.search(o, d, first, first + timedelta(days=7), max_price=rng.choice([None, 2000, 4000]))
+    elapsed = time.perf_counter() - start
+    print(f"{n} buscas em {elapsed:.2f}s ({n / elapsed:,.0f} buscas/s)")
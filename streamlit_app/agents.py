@@ -55,9 +55,28 @@ def drafting_node(state: AuditState):
     
     return {"findings": result.findings}
 
+# Built once: the finding text goes in as template variables, so every
+# finding reuses the same prompt and structured LLM.
+risk_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a Risk Assessment Expert. Evaluate the risk of the following audit finding."),
+    ("human", """
+    Finding: {title}
+    Description: {description}
+    
+    Contextual Anomaly Score (from AI model): {anomaly_score} (High score > 10 indicates potential irregularity)
+    
+    Classify the risk (High/Medium/Low), give a score (0-10), and justify.
+    """)
+])
+risk_chain = risk_prompt | llm.with_structured_output(RiskAssessment)
+
+# Max findings assessed in parallel (bounded to stay under the API rate limit)
+RISK_MAX_CONCURRENCY = int(os.getenv("RISK_MAX_CONCURRENCY", "8"))
+
 def risk_node(state: AuditState):
     """
     Agent 2: Assess risks using PyOD tool and LLM judgment.
+    All findings are assessed concurrently in a single batch call.
     """
     print("--- Risk Node ---")
     findings = state.findings
@@ -66,25 +85,17 @@ def risk_node(state: AuditState):
     # Calulate anomaly score for the whole case text as a signal
     anomaly_score = run_pyod_anomaly_detection.invoke(case_input)
     
+    # batch() returns results in input order, so risks[i] belongs to findings[i]
+    assessments = risk_chain.batch(
+        [
+            {"title": finding.title, "description": finding.description, "anomaly_score": f"{anomaly_score:.4f}"}
+            for finding in findings
+        ],
+        config={"max_concurrency": RISK_MAX_CONCURRENCY},
+    )
+    
     risks = []
-    for finding in findings:
-        # Ask LLM to assess risk, injecting the anomaly score as context
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a Risk Assessment Expert. Evaluate the risk of the following audit finding."),
-            ("human", f"""
-            Finding: {finding.title}
-            Description: {finding.description}
-            
-            Contextual Anomaly Score (from AI model): {anomaly_score:.4f} (High score > 10 indicates potential irregularity)
-            
-            Classify the risk (High/Medium/Low), give a score (0-10), and justify.
-            """)
-        ])
-        
-        structured_llm = llm.with_structured_output(RiskAssessment)
-        chain = prompt | structured_llm
-        assessment = chain.invoke({})
-        
+    for finding, assessment in zip(findings, assessments):
         # Ensure finding title matches (or just force it)
         assessment.finding_title = finding.title
         assessment.anomaly_score = anomaly_score # persist the score in the object
@@ -1,9 +1,9 @@
 import os
 import requests
-import pandas as pd
-from pyod.models.ecod import ECOD
 from langchain_core.tools import tool
 
+from anomaly_detector import get_detector
+
 @tool
 def run_pyod_anomaly_detection(input_text: str) -> float:
     """
@@ -14,40 +14,15 @@ def run_pyod_anomaly_detection(input_text: str) -> float:
     Returns the anomaly score (higher is more anomalous).
     """
     try:
-        # Simulate feature extraction from text
-        # In a real scenario, this would extract financial figures or log data
-        # Here we use text metrics as proxfy features
-        features = {
-            "length": len(input_text),
-            "word_count": len(input_text.split()),
-            "avg_word_len": sum(len(w) for w in input_text.split()) / len(input_text.split()) if input_text else 0,
-            "capital_ratio": sum(1 for c in input_text if c.isupper()) / len(input_text) if input_text else 0
-        }
-        
-        # Create a small 'context' dataset to compare against (simulated normal behavior)
-        # We generate some synthetic 'normal' data points
-        normal_data = pd.DataFrame([
-            {"length": 500, "word_count": 80, "avg_word_len": 5.5, "capital_ratio": 0.05},
-            {"length": 600, "word_count": 100, "avg_word_len": 5.0, "capital_ratio": 0.04},
-            {"length": 450, "word_count": 70, "avg_word_len": 6.0, "capital_ratio": 0.06},
-            {"length": 550, "word_count": 90, "avg_word_len": 5.2, "capital_ratio": 0.05},
-            {"length": 520, "word_count": 85, "avg_word_len": 5.3, "capital_ratio": 0.05},
-        ])
-        
-        current_data = pd.DataFrame([features])
-        
-        # Train ECOD (Unsupervised) on 'normal' data + current data to see where it stands
-        # Note: In production, you'd load a pre-trained model.
-        combined_data = pd.concat([normal_data, current_data], ignore_index=True)
-        
-        clf = ECOD()
-        clf.fit(combined_data)
+        # The detector is fitted once on the baseline corpus and persisted;
+        # scoring only looks the features up in its empirical CDFs.
+        detector = get_detector()
+        input_score = detector.score(input_text)
         
-        # Get score for the last element (our input)
-        scores = clf.decision_scores_
-        input_score = scores[-1]
+        # Non-anomalous cases join the baseline on the next background refresh
+        detector.record([input_text])
         
-        return float(input_score)
+        return input_score
         
     except Exception as e:
         print(f"Error in PyOD tool: {e}")
@@ -2,7 +2,7 @@
 Analisador de notícias do TCU usando LangChain e Google Gemini.
 """
 import os
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 from datetime import datetime
 from collections import Counter
 
@@ -99,30 +99,41 @@ Analise esta notícia do TCU.
         Returns:
             Lista de NoticiaAnalisada
         """
-        noticias_analisadas = []
-        
         print(f"🔍 Analisando {len(noticias)} notícias com IA...\n")
         
+        noticias_analisadas = list(self.iterar_analises(noticias, total=len(noticias)))
+        
+        print(f"✅ {len(noticias_analisadas)} notícias analisadas!\n")
+        return noticias_analisadas
+    
+    def iterar_analises(
+        self,
+        noticias: Iterable[NoticiaCompleta],
+        total: Optional[int] = None
+    ) -> Iterator[NoticiaAnalisada]:
+        """
+        Analisa notícias à medida que chegam, entregando cada resultado logo
+        que fica pronto. Notícias cuja análise falha são descartadas.
+        
+        Args:
+            noticias: Iterável (pode ser um gerador) de notícias a analisar
+            total: Quantidade esperada, usada apenas nas mensagens de progresso
+            
+        Yields:
+            NoticiaAnalisada
+        """
         for i, noticia in enumerate(noticias, 1):
-            print(f"[{i}/{len(noticias)}] Analisando: {noticia.titulo[:60]}...")
+            progresso = f"{i}/{total}" if total else str(i)
+            print(f"[{progresso}] Analisando: {noticia.titulo[:60]}...")
             
             try:
                 analise = self.analisar_noticia(noticia)
-                
-                noticia_analisada = NoticiaAnalisada(
-                    noticia=noticia,
-                    analise=analise
-                )
-                
-                noticias_analisadas.append(noticia_analisada)
-                print(f"  ✓ Categoria: {analise.categoria} | Relevância: {analise.relevancia}\n")
-                
             except Exception as e:
                 print(f"  ❌ Erro na análise: {e}\n")
                 continue
-        
-        print(f"✅ {len(noticias_analisadas)} notícias analisadas!\n")
-        return noticias_analisadas
+            
+            print(f"  ✓ Categoria: {analise.categoria} | Relevância: {analise.relevancia}\n")
+            yield NoticiaAnalisada(noticia=noticia, analise=analise)
     
     def gerar_relatorio_executivo(
         self,
@@ -0,0 +1,212 @@
+"""
+Monitoramento contínuo do portal do TCU.
+
+Processo de longa duração que consulta o portal em intervalos regulares,
+extrai e analisa apenas as notícias ainda não vistas e regrava o relatório
+executivo de forma atômica. O app web (app_tcu_web.py) passa a ler um relatório
+sempre pronto, em vez de esperar minutos pela geração.
+
+Uso:
+    python tcu_monitor.py --intervalo 30      # a cada 30 minutos
+    python tcu_monitor.py --uma-vez           # um único ciclo (cron)
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+from dotenv import load_dotenv
+
+from tcu_scraper import TCUScraper
+from tcu_analyzer import TCUAnalyzer
+from tcu_models import NoticiaAnalisada
+from tcu_pipeline import processar_noticias_stream
+from app_tcu_noticias import gerar_relatorio_markdown
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def escrever_atomico(arquivo: str, conteudo: str):
+    """
+    Grava um arquivo de forma atômica: escreve em um temporário no mesmo
+    diretório e o renomeia por cima do destino. Leitores nunca veem um
+    arquivo parcialmente escrito.
+    """
+    diretorio = os.path.dirname(os.path.abspath(arquivo))
+    fd, temporario = tempfile.mkstemp(dir=diretorio, prefix=".tmp_", suffix=".part")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, arquivo)
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class MonitorTCU:
+    """Mantém um relatório executivo do TCU sempre atualizado."""
+
+    def __init__(
+        self,
+        saida: str = "tcu_monitor",
+        quantidade: int = 10,
+        janela: int = 30,
+        delay: float = 1.0
+    ):
+        """
+        Inicializa o monitor.
+
+        Args:
+            saida: Nome base dos arquivos mantidos pelo monitor
+            quantidade: Notícias mais recentes consultadas a cada ciclo
+            janela: Máximo de notícias analisadas mantidas no relatório
+            delay: Tempo de espera entre requisições ao portal (em segundos)
+        """
+        self.arquivo_estado = f"{saida}_analises.json"
+        self.arquivo_relatorio_json = f"{saida}_relatorio_atual.json"
+        self.arquivo_relatorio_md = f"{saida}_relatorio_atual.md"
+        self.quantidade = quantidade
+        self.janela = janela
+        self.scraper = TCUScraper(delay=delay)
+        self.analyzer = TCUAnalyzer()
+
+    def carregar_analises(self) -> List[NoticiaAnalisada]:
+        """Carrega as análises acumuladas em ciclos anteriores."""
+        if not os.path.exists(self.arquivo_estado):
+            return []
+        try:
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as f:
+                return [NoticiaAnalisada(**dados) for dados in json.load(f)]
+        except Exception as e:
+            print(f"⚠️  Estado inválido em {self.arquivo_estado}, recomeçando: {e}")
+            return []
+
+    def executar_ciclo(self) -> int:
+        """
+        Executa um ciclo incremental de extração, análise e relatório.
+
+        Returns:
+            Quantidade de notícias novas analisadas no ciclo
+        """
+        print(f"\n🔄 Ciclo de monitoramento - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+
+        anteriores = self.carregar_analises()
+        urls_conhecidas = {n.noticia.url for n in anteriores}
+
+        novas = list(processar_noticias_stream(
+            self.scraper,
+            self.analyzer,
+            quantidade=self.quantidade,
+            ignorar_urls=urls_conhecidas
+        ))
+
+        if not novas and os.path.exists(self.arquivo_relatorio_json):
+            print("✅ Nenhuma notícia nova. Relatório mantido.")
+            return 0
+
+        # Notícias mais recentes primeiro, limitadas à janela configurada
+        analises = (novas + anteriores)[:self.janela]
+        if not analises:
+            print("⚠️  Nenhuma notícia disponível para o relatório.")
+            return 0
+
+        relatorio = self.analyzer.gerar_relatorio_executivo(analises)
+
+        # O estado é gravado primeiro: se o processo cair antes do relatório,
+        # o próximo ciclo não reanalisa as mesmas notícias
+        escrever_atomico(
+            self.arquivo_estado,
+            json.dumps([n.model_dump() for n in analises], ensure_ascii=False, indent=2, default=str)
+        )
+        escrever_atomico(
+            self.arquivo_relatorio_json,
+            json.dumps(relatorio.model_dump(), ensure_ascii=False, indent=2, default=str)
+        )
+
+        temporario_md = self.arquivo_relatorio_md + ".part"
+        gerar_relatorio_markdown(relatorio, temporario_md)
+        os.replace(temporario_md, self.arquivo_relatorio_md)
+
+        print(f"✅ {len(novas)} notícia(s) nova(s). Relatório atualizado: {self.arquivo_relatorio_json}")
+        return len(novas)
+
+    def executar(self, intervalo_minutos: float):
+        """
+        Executa ciclos indefinidamente, aguardando o intervalo entre eles.
+        Falhas em um ciclo são registradas e não interrompem o monitor.
+        """
+        print(f"👀 Monitorando o portal do TCU a cada {intervalo_minutos} minuto(s). Ctrl+C para sair.")
+        try:
+            while True:
+                inicio = time.monotonic()
+                try:
+                    self.executar_ciclo()
+                except Exception as e:
+                    print(f"❌ Erro no ciclo de monitoramento: {e}")
+                decorrido = time.monotonic() - inicio
+                time.sleep(max(0.0, intervalo_minutos * 60 - decorrido))
+        except KeyboardInterrupt:
+            print("\n👋 Monitoramento encerrado.")
+
+
+def main():
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Monitora o portal do TCU e mantém o relatório executivo atualizado"
+    )
+    parser.add_argument(
+        '-i', '--intervalo',
+        type=float,
+        default=30,
+        help='Intervalo entre consultas, em minutos (padrão: 30)'
+    )
+    parser.add_argument(
+        '-q', '--quantidade',
+        type=int,
+        default=10,
+        help='Notícias mais recentes consultadas por ciclo (padrão: 10)'
+    )
+    parser.add_argument(
+        '-j', '--janela',
+        type=int,
+        default=30,
+        help='Máximo de notícias mantidas no relatório (padrão: 30)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        type=str,
+        default='tcu_monitor',
+        help='Nome base dos arquivos mantidos (padrão: tcu_monitor)'
+    )
+    parser.add_argument(
+        '--uma-vez',
+        action='store_true',
+        help='Executa um único ciclo e encerra (útil com cron)'
+    )
+
+    args = parser.parse_args()
+
+    if not os.getenv("GOOGLE_API_KEY"):
+        print("❌ GOOGLE_API_KEY não configurada!")
+        return
+
+    monitor = MonitorTCU(
+        saida=args.output,
+        quantidade=args.quantidade,
+        janela=args.janela
+    )
+
+    if args.uma_vez:
+        monitor.executar_ciclo()
+    else:
+        monitor.executar(args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Pipeline em streaming para extração e análise de notícias do TCU.
+
+A extração roda em uma thread produtora que coloca cada notícia baixada em uma
+fila limitada; o analisador consome a fila enquanto as próximas notícias ainda
+estão sendo baixadas. O tempo total tende a max(extração, análise) em vez da
+soma das duas etapas, e a fila limitada impede que o download acumule todas as
+notícias em memória quando a análise é mais lenta.
+"""
+import json
+import queue
+import threading
+from typing import Iterator, Optional, Set
+
+from tcu_scraper import TCUScraper
+from tcu_analyzer import TCUAnalyzer
+from tcu_models import NoticiaCompleta, NoticiaAnalisada
+
+
+_FIM = object()
+
+
+class EscritorJSONL:
+    """Grava registros em JSON Lines, um por linha, à medida que chegam."""
+
+    def __init__(self, arquivo: str):
+        """
+        Args:
+            arquivo: Caminho do arquivo .jsonl (sobrescrito se existir)
+        """
+        self.arquivo = arquivo
+        self._f = open(arquivo, 'w', encoding='utf-8')
+
+    def escrever(self, dados: dict):
+        """Acrescenta um registro e força a gravação em disco."""
+        self._f.write(json.dumps(dados, ensure_ascii=False, default=str) + "\n")
+        self._f.flush()
+
+    def fechar(self):
+        """Fecha o arquivo."""
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def ler_jsonl(arquivo: str) -> list:
+    """Lê um arquivo JSON Lines gerado pelo EscritorJSONL."""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def _produzir(
+    scraper: TCUScraper,
+    quantidade: int,
+    fila: "queue.Queue",
+    parar: threading.Event,
+    ignorar_urls: Optional[Set[str]] = None
+):
+    """Thread produtora: baixa notícias e as coloca na fila limitada."""
+    try:
+        for noticia in scraper.iterar_noticias_completas(quantidade, ignorar_urls):
+            # put com timeout para poder desistir se o consumidor encerrar
+            while not parar.is_set():
+                try:
+                    fila.put(noticia, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if parar.is_set():
+                return
+    except Exception as e:
+        print(f"❌ Erro na extração: {e}")
+    finally:
+        # Sempre sinalizar o fim, mesmo em caso de erro
+        while not parar.is_set():
+            try:
+                fila.put(_FIM, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+
+
+def iterar_noticias(
+    scraper: TCUScraper,
+    quantidade: int,
+    tamanho_fila: int = 4,
+    ignorar_urls: Optional[Set[str]] = None
+) -> Iterator[NoticiaCompleta]:
+    """
+    Entrega notícias completas lidas de uma fila alimentada em segundo plano.
+
+    Args:
+        scraper: Scraper usado para baixar as notícias
+        quantidade: Número de notícias a extrair
+        tamanho_fila: Máximo de notícias baixadas aguardando consumo
+        ignorar_urls: URLs já processadas, que não são baixadas novamente
+
+    Yields:
+        NoticiaCompleta, na ordem em que foram baixadas
+    """
+    fila = queue.Queue(maxsize=tamanho_fila)
+    parar = threading.Event()
+    produtor = threading.Thread(
+        target=_produzir,
+        args=(scraper, quantidade, fila, parar, ignorar_urls),
+        daemon=True
+    )
+    produtor.start()
+
+    try:
+        while True:
+            item = fila.get()
+            if item is _FIM:
+                break
+            yield item
+    finally:
+        # Se o consumidor parar no meio, liberar a thread produtora
+        parar.set()
+        produtor.join(timeout=1.0)
+
+
+def processar_noticias_stream(
+    scraper: TCUScraper,
+    analyzer: TCUAnalyzer,
+    quantidade: int,
+    tamanho_fila: int = 4,
+    arquivo_noticias: Optional[str] = None,
+    arquivo_analises: Optional[str] = None,
+    ignorar_urls: Optional[Set[str]] = None
+) -> Iterator[NoticiaAnalisada]:
+    """
+    Extrai e analisa notícias em streaming, sobrepondo download e análise.
+
+    Os resultados parciais são gravados em JSON Lines assim que ficam
+    prontos, de modo que uma execução interrompida preserva o que já foi
+    processado.
+
+    Args:
+        scraper: Scraper usado para baixar as notícias
+        analyzer: Analisador que classifica cada notícia
+        quantidade: Número de notícias a extrair
+        tamanho_fila: Máximo de notícias baixadas aguardando análise
+        arquivo_noticias: Arquivo .jsonl para as notícias extraídas (opcional)
+        arquivo_analises: Arquivo .jsonl para as análises (opcional)
+        ignorar_urls: URLs já analisadas, que são puladas (modo incremental)
+
+    Yields:
+        NoticiaAnalisada, uma por notícia analisada com sucesso
+    """
+    escritor_noticias = EscritorJSONL(arquivo_noticias) if arquivo_noticias else None
+    escritor_analises = EscritorJSONL(arquivo_analises) if arquivo_analises else None
+
+    def noticias_gravadas():
+        for noticia in iterar_noticias(scraper, quantidade, tamanho_fila, ignorar_urls):
+            if escritor_noticias:
+                escritor_noticias.escrever(noticia.model_dump())
+            yield noticia
+
+    try:
+        for analisada in analyzer.iterar_analises(noticias_gravadas(), total=quantidade):
+            if escritor_analises:
+                escritor_analises.escrever(analisada.model_dump())
+            yield analisada
+    finally:
+        if escritor_noticias:
+            escritor_noticias.fechar()
+        if escritor_analises:
+            escritor_analises.fechar()
@@ -3,7 +3,7 @@ Scraper para extração de notícias do portal do TCU.
 """
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Optional
+from typing import Iterator, List, Optional, Set
 import time
 from tcu_models import NoticiaBasica, NoticiaCompleta
 
@@ -199,34 +199,55 @@ class TCUScraper:
             print(f"  ❌ Erro ao extrair notícia {url}: {e}")
             return None
     
-    def extrair_noticias_completas(self, quantidade: int = 5) -> List[NoticiaCompleta]:
+    def iterar_noticias_completas(
+        self,
+        quantidade: int = 5,
+        ignorar_urls: Optional[Set[str]] = None
+    ) -> Iterator[NoticiaCompleta]:
         """
-        Extrai notícias completas (lista + conteúdo).
+        Extrai notícias completas sob demanda, uma de cada vez.
+        
+        Cada notícia é entregue assim que seu conteúdo é baixado, permitindo
+        que o consumidor (ex: o analisador) processe uma enquanto as próximas
+        ainda estão sendo extraídas.
         
         Args:
             quantidade: Número de notícias a extrair
+            ignorar_urls: URLs já processadas, que não são baixadas novamente
             
-        Returns:
-            Lista de NoticiaCompleta
+        Yields:
+            NoticiaCompleta
         """
         # Primeiro, listar as notícias
         noticias_basicas = self.listar_noticias(quantidade)
-        
-        # Depois, extrair conteúdo completo de cada uma
-        noticias_completas = []
+        if ignorar_urls:
+            noticias_basicas = [n for n in noticias_basicas if n.url not in ignorar_urls]
         
         print(f"📖 Extraindo conteúdo completo de {len(noticias_basicas)} notícias...\n")
         
+        total = 0
         for i, noticia_basica in enumerate(noticias_basicas, 1):
             print(f"[{i}/{len(noticias_basicas)}] {noticia_basica.titulo[:60]}...")
             
             noticia_completa = self.extrair_noticia(noticia_basica.url)
             
             if noticia_completa:
-                noticias_completas.append(noticia_completa)
+                total += 1
                 print(f"  ✓ Conteúdo extraído ({len(noticia_completa.conteudo)} caracteres)\n")
+                yield noticia_completa
             else:
                 print(f"  ⚠️  Falha na extração\n")
         
-        print(f"✅ {len(noticias_completas)} notícias completas extraídas!\n")
-        return noticias_completas
+        print(f"✅ {total} notícias completas extraídas!\n")
+    
+    def extrair_noticias_completas(self, quantidade: int = 5) -> List[NoticiaCompleta]:
+        """
+        Extrai notícias completas (lista + conteúdo).
+        
+        Args:
+            quantidade: Número de notícias a extrair
+            
+        Returns:
+            Lista de NoticiaCompleta
+        """
+        return list(self.iterar_noticias_completas(quantidade))
@@ -0,0 +1,37 @@
+"""
+Tokenização compartilhada em português (minúsculas, sem acentos).
+
+Usada pela busca BM25 dos RAGs (rag_retrievers.py), pelo roteador local dos
+supervisores (roteador_local.py), pelos embeddings locais (rag_embeddings.py)
+e pelas ferramentas do CareFlow e da SkyFlow, sem que um dependa do outro.
+"""
+import re
+import unicodedata
+from typing import List
+
+# Números com separadores ("100.000,00", "13.303") viram um único token
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|\w+")
+
+STOPWORDS = {
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na",
+    "nos", "nas", "um", "uma", "por", "para", "com", "que", "se", "ao", "aos",
+    "ou", "qual", "quais", "como", "sobre",
+}
+
+
+def remover_acentos(texto: str) -> str:
+    """Remove acentos e cedilhas ("licitação" -> "licitacao")."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Tokeniza em minúsculas, sem acentos, preservando números inteiros."""
+    tokens = []
+    for token in _TOKEN.findall(remover_acentos(texto.lower())):
+        if token[0].isdigit():
+            token = token.replace(".", "")
+        elif token in STOPWORDS:
+            continue
+        tokens.append(token)
+    return tokens